@@ -0,0 +1,100 @@
+﻿using System.Text.Json;
+using System.Text.Json.Serialization;
+
+namespace BatteryVisualizer.Models
+{
+    // ml-service/export_lod.py çıktısındaki index.json
+    public class LodIndex
+    {
+        [JsonPropertyName("version")] public int Version { get; set; }
+        [JsonPropertyName("series")] public List<string> Series { get; set; } = new();
+        [JsonPropertyName("levels")] public List<int> Levels { get; set; } = new();
+        [JsonPropertyName("method")] public string Method { get; set; } = "";
+        [JsonPropertyName("groups")] public Dictionary<string, LodGroup> Groups { get; set; } = new();
+
+        public static LodIndex Load(string dir)
+        {
+            var json = File.ReadAllText(Path.Combine(dir, "index.json"));
+            return JsonSerializer.Deserialize<LodIndex>(json)
+                   ?? throw new InvalidDataException($"index.json okunamadı: {dir}");
+        }
+    }
+
+    public class LodGroup
+    {
+        [JsonPropertyName("file")] public string File { get; set; } = "";
+        [JsonPropertyName("cells")] public List<string> Cells { get; set; } = new();
+        [JsonPropertyName("week_range")] public List<double> WeekRange { get; set; } = new();
+    }
+
+    // <grup>.lod: sadece başlık ve dizin okunur; seri blokları istendiğinde Seek ile okunur
+    public sealed class LodReader : IDisposable
+    {
+        public static readonly string[] SeriesNames = { "capacity", "soh", "rul" };
+        private const int Version = 1;
+
+        private readonly FileStream _stream;
+        private readonly BinaryReader _reader;
+        private readonly ulong[] _offsets;
+        private readonly uint[] _counts;
+        private readonly int _nSeries;
+
+        public int CellCount { get; }
+        public int[] Levels { get; }
+
+        public LodReader(string path)
+        {
+            _stream = File.OpenRead(path);
+            _reader = new BinaryReader(_stream);
+            if (new string(_reader.ReadChars(4)) != "BLOD" || _reader.ReadUInt16() != Version)
+                throw new InvalidDataException($"Geçersiz LOD dosyası: {path}");
+            _nSeries = _reader.ReadUInt16();
+            int nLevels = _reader.ReadUInt16();
+            _reader.ReadUInt16();                     // yöntem (lttb/minmax), okuma için gerekmez
+            CellCount = (int)_reader.ReadUInt32();
+
+            Levels = new int[nLevels];
+            for (int i = 0; i < nLevels; i++)
+                Levels[i] = (int)_reader.ReadUInt32();
+
+            int n = CellCount * _nSeries * nLevels;
+            _offsets = new ulong[n];
+            _counts = new uint[n];
+            for (int i = 0; i < n; i++)
+            {
+                _offsets[i] = _reader.ReadUInt64();
+                _counts[i] = _reader.ReadUInt32();
+                _reader.ReadUInt32();
+            }
+        }
+
+        private int Entry(int cell, string series, int level) =>
+            (cell * _nSeries + Array.IndexOf(SeriesNames, series)) * Levels.Length + level;
+
+        public int PointCount(int cell, string series, int level) => (int)_counts[Entry(cell, series, level)];
+
+        // maxPoints'e sığan en ayrıntılı seviye (hiçbiri sığmıyorsa en kaba seviye)
+        public int PickLevel(int cell, string series, int maxPoints)
+        {
+            for (int level = 0; level < Levels.Length; level++)
+                if (PointCount(cell, series, level) <= maxPoints)
+                    return level;
+            return Levels.Length - 1;
+        }
+
+        public (double X, double Y)[] Read(int cell, string series, int level)
+        {
+            int e = Entry(cell, series, level);
+            var points = new (double X, double Y)[_counts[e]];
+            _stream.Seek((long)_offsets[e], SeekOrigin.Begin);
+            for (int i = 0; i < points.Length; i++)
+                points[i] = (_reader.ReadSingle(), _reader.ReadSingle());
+            return points;
+        }
+
+        public (double X, double Y)[] ReadForWidth(int cell, string series, int maxPoints) =>
+            Read(cell, series, PickLevel(cell, series, maxPoints));
+
+        public void Dispose() => _reader.Dispose();
+    }
+}
@@ -1,42 +1,99 @@
 ﻿using System.Collections.Generic;
+using BatteryVisualizer.Models;
 using LiveChartsCore;
+using LiveChartsCore.Defaults;
 using LiveChartsCore.SkiaSharpView;
 
 namespace BatteryVisualizer.ViewModels
 {
     public class MainViewModel
     {
+        // Hücre başına çizilecek en fazla nokta (grafik genişliği mertebesinde)
+        private const int MaxPointsPerCell = 1024;
+        private const int MaxCells = 8;
+
         public IEnumerable<ISeries> CapacitySeries { get; }
         public IEnumerable<ISeries> SOHSeries { get; }
+        public IEnumerable<ISeries> RULSeries { get; }
 
         public List<Axis> CapacityXAxes { get; }
         public List<Axis> CapacityYAxes { get; }
         public List<Axis> SOHXAxes { get; }
         public List<Axis> SOHYAxes { get; }
+        public List<Axis> RULXAxes { get; }
+        public List<Axis> RULYAxes { get; }
 
         public MainViewModel()
         {
-            // Örnek veriler
-            CapacitySeries = new ISeries[]
+            // BATTERY_LOD_DIR: export_lod.py çıktısı (index.json + <grup>.lod); yoksa örnek veriler
+            var lodDir = Environment.GetEnvironmentVariable("BATTERY_LOD_DIR");
+            if (!string.IsNullOrEmpty(lodDir) && File.Exists(Path.Combine(lodDir, "index.json")))
+            {
+                var index = LodIndex.Load(lodDir);
+                var (name, group) = index.Groups.First();
+                using var reader = new LodReader(Path.Combine(lodDir, group.File));
+                int nCells = Math.Min(reader.CellCount, MaxCells);
+                CapacitySeries = LoadSeries(reader, group, "capacity", nCells);
+                SOHSeries = LoadSeries(reader, group, "soh", nCells);
+                RULSeries = LoadSeries(reader, group, "rul", nCells);
+                CapacityXAxes = new() { new Axis { Name = $"Week ({name})" } };
+                SOHXAxes = new() { new Axis { Name = $"Week ({name})" } };
+                RULXAxes = new() { new Axis { Name = $"Origin week ({name})" } };
+            }
+            else
             {
-                new LineSeries<double>
+                // Örnek veriler
+                CapacitySeries = new ISeries[]
                 {
-                    Values = new double[] { 100, 96, 93, 90, 86, 83, 80 }
-                }
-            };
+                    new LineSeries<double>
+                    {
+                        Values = new double[] { 100, 96, 93, 90, 86, 83, 80 }
+                    }
+                };
 
-            SOHSeries = new ISeries[]
-            {
-                new LineSeries<double>
+                SOHSeries = new ISeries[]
                 {
-                    Values = new double[] { 1.00, 0.97, 0.95, 0.92, 0.89, 0.86, 0.83 }
-                }
-            };
+                    new LineSeries<double>
+                    {
+                        Values = new double[] { 1.00, 0.97, 0.95, 0.92, 0.89, 0.86, 0.83 }
+                    }
+                };
+
+                RULSeries = new ISeries[]
+                {
+                    new LineSeries<double>
+                    {
+                        Values = new double[] { 60, 52, 45, 37, 30, 22, 15 }
+                    }
+                };
+
+                CapacityXAxes = new() { new Axis { Name = "Cycle" } };
+                SOHXAxes = new() { new Axis { Name = "Cycle" } };
+                RULXAxes = new() { new Axis { Name = "Cycle" } };
+            }
 
-            CapacityXAxes = new() { new Axis { Name = "Cycle" } };
             CapacityYAxes = new() { new Axis { Name = "Capacity (Ah)" } };
-            SOHXAxes = new() { new Axis { Name = "Cycle" } };
             SOHYAxes = new() { new Axis { Name = "SOH" } };
+            RULYAxes = new() { new Axis { Name = "RUL (weeks)" } };
+        }
+
+        // Her hücre için ekrana sığan seviye okunur; diğer seviyeler/hücreler diskte kalır
+        private static ISeries[] LoadSeries(LodReader reader, LodGroup group, string series, int nCells)
+        {
+            var result = new List<ISeries>();
+            for (int cell = 0; cell < nCells; cell++)
+            {
+                var points = reader.ReadForWidth(cell, series, MaxPointsPerCell);
+                if (points.Length == 0)
+                    continue;
+                result.Add(new LineSeries<ObservablePoint>
+                {
+                    Name = group.Cells[cell],
+                    Values = points.Select(p => new ObservablePoint(p.X, p.Y)).ToArray(),
+                    GeometrySize = 0
+                });
+            }
+            return result.ToArray();
         }
     }
 }
@@ -0,0 +1,30 @@
+#pragma once
+#include <cstdint>
+
+#if defined(_WIN32) || defined(_WIN64)
+  #ifdef CORE_ENGINE_EXPORTS
+    #define CORE_API __declspec(dllexport)
+  #else
+    #define CORE_API __declspec(dllimport)
+  #endif
+#else
+  #define CORE_API __attribute__((visibility("default")))
+#endif
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// Dizinin ortalaması ve (popülasyon) standart sapması; length <= 0 ise NaN
+CORE_API void compute_mean_std(const double* data, int length, double* mean, double* stddev);
+
+// offsets ile ayrılmış n_segments segmentin her biri için NaN yok sayan ortalama, std (popülasyon),
+// min, max ve geçerli örnek sayısı. offsets uzunluğu n_segments + 1; uzunluklar 64 bit.
+// Welford (blok içi) + Chan (bloklar arası) birleştirme; segmentler/bloklar OpenMP ile paralel.
+CORE_API void compute_segment_stats(const double* data, const int64_t* offsets, int64_t n_segments,
+                                    double* mean, double* stddev, double* min, double* max,
+                                    int64_t* count);
+
+#ifdef __cplusplus
+}
+#endif
@@ -1,5 +1,6 @@
 #pragma once
 #include <cstddef>
+#include <cstdint>
 
 #if defined(_WIN32) || defined(_WIN64)
   #ifdef KALMAN_SOH_EXPORTS
@@ -24,6 +25,13 @@ KALMAN_API void kalman_batch(KalmanHandle h, const double* z, int n, double* out
 KALMAN_API void kalman_smooth(double q, double r, double x0, double p0,
                               const double* z, int n, double* out);
 
+// Birden çok seriyi tek çağrıda süzer. Seri i: z[offsets[i] .. offsets[i+1]).
+// Her seri ilk sonlu gözlemiyle başlatılır; sonlu olmayan gözlemlerde sadece tahmin adımı yapılır
+// (ilk sonlu gözlemden önceki çıktılar NaN). Seriler OpenMP ile paralel işlenir.
+KALMAN_API void kalman_smooth_batch(double q, double r, double p0,
+                                    const double* z, const int64_t* offsets, int64_t n_series,
+                                    double* out);
+
 #ifdef __cplusplus
 }
 #endif
@@ -1,32 +1,123 @@
 #include <vector>
-#include <numeric>
 #include <cmath>
-#include <iostream>
-#include <omp.h>   // OpenMP ekledik
+#include <limits>
+#include <algorithm>
+#include "core_engine.h"
+
+namespace {
+
+// Bir veri parçasının (blok) özeti: Welford ile tek geçişte
+struct Partial {
+    int64_t n = 0;
+    double mean = 0.0;
+    double m2 = 0.0;   // ortalamadan sapmaların kareleri toplamı
+    double min = std::numeric_limits<double>::infinity();
+    double max = -std::numeric_limits<double>::infinity();
+};
+
+// Büyük segmentler bu boyuttaki bloklara bölünür; bloklar paralel özetlenip Chan ile birleştirilir
+const int64_t BLOCK = int64_t(1) << 16;
+
+Partial summarize(const double* data, int64_t begin, int64_t end) {
+    Partial p;
+    // Welford, bloğun ilk geçerli değerine göre kaydırılmış veri üzerinde: büyük ofsetli
+    // sinyallerde (ör. 1e9 + gürültü) yürüyen ortalamanın yuvarlama hatası sapmaya karışmaz
+    double shift = 0.0;
+    for (int64_t i = begin; i < end; ++i) {
+        const double x = data[i];
+        if (std::isnan(x)) continue;   // NaN yok sayılır (np.nanmean gibi)
+        if (p.n == 0) shift = x;
+        p.n += 1;
+        const double y = x - shift;
+        const double d = y - p.mean;
+        p.mean += d / p.n;
+        p.m2 += d * (y - p.mean);
+        p.min = std::min(p.min, x);
+        p.max = std::max(p.max, x);
+    }
+    p.mean += shift;
+    return p;
+}
+
+// Chan et al. paralel birleştirme
+void merge(Partial& a, const Partial& b) {
+    if (b.n == 0) return;
+    if (a.n == 0) { a = b; return; }
+    const int64_t n = a.n + b.n;
+    const double d = b.mean - a.mean;
+    a.mean += d * (double(b.n) / double(n));
+    a.m2 += b.m2 + d * d * (double(a.n) * double(b.n) / double(n));
+    a.n = n;
+    a.min = std::min(a.min, b.min);
+    a.max = std::max(a.max, b.max);
+}
+
+}
 
 extern "C" {
 
-// Compute mean and std of an array (parallel with OpenMP)
-__declspec(dllexport) void compute_mean_std(const double* data, int length,
-                                            double* mean, double* stddev) {
+CORE_API void compute_segment_stats(const double* data, const int64_t* offsets, int64_t n_segments,
+                                    double* mean, double* stddev, double* min, double* max,
+                                    int64_t* count) {
+    if (!data || !offsets || !mean || !stddev || !min || !max || !count || n_segments <= 0) return;
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+
+    // Segment -> blok aralığı (boş segment de tek boş blok alır)
+    std::vector<int64_t> first_block(n_segments + 1, 0);
+    for (int64_t s = 0; s < n_segments; ++s) {
+        const int64_t len = offsets[s + 1] - offsets[s];
+        first_block[s + 1] = first_block[s] + std::max<int64_t>(1, (len + BLOCK - 1) / BLOCK);
+    }
+    const int64_t n_blocks = first_block[n_segments];
+    std::vector<Partial> parts(n_blocks);
+
+    // Bloklar düz indeks üzerinden paralel özetlenir: tek büyük segment de tüm iş parçacıklarına dağılır.
+    // first_block kesin artan olduğundan bloğun segmenti ikili aramayla bulunur. guided: az sayıda
+    // büyük blokta (tek dizi) her iş parçacığı blok alır, çok sayıda küçük blokta parçalar büyük kalır.
+    #pragma omp parallel for schedule(guided)
+    for (int64_t b = 0; b < n_blocks; ++b) {
+        const int64_t s = int64_t(std::upper_bound(first_block.begin(), first_block.end(), b)
+                                  - first_block.begin()) - 1;
+        const int64_t begin = offsets[s] + (b - first_block[s]) * BLOCK;
+        const int64_t end = std::min(begin + BLOCK, offsets[s + 1]);
+        parts[b] = summarize(data, begin, end);
+    }
+
+    // Segment başına blok özetleri sırayla birleştirilir (sonuç iş parçacığı sayısından bağımsız)
+    #pragma omp parallel for schedule(static)
+    for (int64_t s = 0; s < n_segments; ++s) {
+        Partial acc;
+        for (int64_t b = first_block[s]; b < first_block[s + 1]; ++b) merge(acc, parts[b]);
+        count[s] = acc.n;
+        if (acc.n == 0) {
+            mean[s] = stddev[s] = min[s] = max[s] = nan;
+        } else {
+            mean[s] = acc.mean;
+            stddev[s] = std::sqrt(acc.m2 / double(acc.n));
+            min[s] = acc.min;
+            max[s] = acc.max;
+        }
+    }
+}
+
+// Tek dizinin ortalaması ve std'si: segment çekirdeği üzerinden (sayısal olarak kararlı).
+// Eski davranış korunur: dizide NaN varsa sonuç NaN.
+CORE_API void compute_mean_std(const double* data, int length,
+                               double* mean, double* stddev) {
     if (length <= 0) {
         *mean = NAN;
         *stddev = NAN;
         return;
     }
 
-    double sum = 0.0;
-    double sq_sum = 0.0;
-
-    // OpenMP paralel for + reduction
-    #pragma omp parallel for reduction(+:sum, sq_sum)
-    for (int i = 0; i < length; i++) {
-        sum += data[i];
-        sq_sum += data[i] * data[i];
+    const int64_t offsets[2] = {0, int64_t(length)};
+    double mn, mx;
+    int64_t n;
+    compute_segment_stats(data, offsets, 1, mean, stddev, &mn, &mx, &n);
+    if (n != length) {
+        *mean = NAN;
+        *stddev = NAN;
     }
-
-    *mean = sum / length;
-    *stddev = std::sqrt((sq_sum / length) - (*mean * *mean));
 }
 
 }
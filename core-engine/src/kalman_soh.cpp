@@ -1,6 +1,8 @@
 #include "kalman_soh.h"
 #include <new>
 #include <cstring>
+#include <cmath>
+#include <limits>
 
 struct KF {
     double q;
@@ -59,4 +61,39 @@ KALMAN_API void kalman_smooth(double q, double r, double x0, double p0,
     kalman_destroy(h);
 }
 
+KALMAN_API void kalman_smooth_batch(double q, double r, double p0,
+                                    const double* z, const int64_t* offsets, int64_t n_series,
+                                    double* out) {
+    if (!z || !offsets || !out || n_series <= 0) return;
+    const double nan = std::numeric_limits<double>::quiet_NaN();
+
+    #pragma omp parallel for schedule(dynamic, 64)
+    for (int64_t s = 0; s < n_series; ++s) {
+        const int64_t begin = offsets[s];
+        const int64_t end = offsets[s + 1];
+
+        // Yığın üzerinde filtre: seri başına heap ayırma yok
+        KF kf;
+        kf.q = (q > 0.0 ? q : 1e-6);
+        kf.r = (r > 0.0 ? r : 1e-3);
+        kf.p = (p0 > 0.0 ? p0 : 1.0);
+        kf.x = nan;
+        bool started = false;
+
+        for (int64_t i = begin; i < end; ++i) {
+            const double zi = z[i];
+            if (!std::isfinite(zi)) {
+                if (started) kf.p += kf.q;
+                out[i] = started ? kf.x : nan;
+                continue;
+            }
+            if (!started) {
+                kf.x = zi;
+                started = true;
+            }
+            out[i] = kalman_update(reinterpret_cast<KalmanHandle>(&kf), zi);
+        }
+    }
+}
+
 }
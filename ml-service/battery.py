@@ -0,0 +1,142 @@
+"""
+battery.py
+Tüm giriş noktaları için tek komut: python battery.py [--config config.yaml] <alt komut> [argümanlar]
+
+  prepare-rpt    prepare_data_isu_ilcc   RPT JSON -> features.parquet
+  prepare-cycle  prepare_data_cycle      Cycle JSON -> features_cycle*.parquet
+  train          train_soh               SOH modelleri (GroupKFold CV, --export, --sweep)
+  rul            rul_linear              Doğrusal RUL tahmini / --backtest
+  export-lod     export_lod              BatteryVisualizer için LOD seri dosyaları
+  bench          bench                   Sentetik veriyle benchmark
+  pipeline       pipeline                config.yaml pipeline: DAG'ı
+  health         (yerleşik)              Config, yollar ve bağımlılık kontrolü (ağır import yok)
+
+- Bu modül sadece stdlib + yaml import eder; pandas/NumPy/scikit-learn seçilen alt komutun
+  modülü yüklenirken gelir. `battery.py --help` ve `health` milisaniyeler içinde döner.
+- Alt komut argümanları cli_args.py'den gelir (script ile aynı seçenekler); modül ancak argümanlar
+  ayrıştırıldıktan sonra, main çalışacağı zaman import edilir. `battery <komut> --help` de hızlıdır.
+- config.yaml bir kez okunur; alt komutun --config varsayılanı ve config'ten türeyen varsayılanlar
+  (ör. rul --input/--out/--threshold) buradan doldurulur. utils.load_config aynı dosyayı yeniden
+  ayrıştırmaz.
+- Config okuma ve modül import süresi stderr'e [INFO] satırı olarak yazılır (--quiet ile kapatılır).
+"""
+import argparse, importlib, importlib.util, sys, time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+# rul_linear.py depo kökünde
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+def _out(cfg, name):
+    return str(Path((cfg.get("paths") or {}).get("out_dir", "artifacts")) / name)
+
+# alt komut -> (modül, açıklama, profil adı, config'ten varsayılanlar)
+COMMANDS = {
+    "prepare-rpt": ("prepare_data_isu_ilcc", "RPT JSON -> features.parquet", "prepare_rpt", None),
+    "prepare-cycle": ("prepare_data_cycle", "Cycle JSON -> features_cycle*.parquet", "prepare_cycle", None),
+    "train": ("train_soh", "SOH modelleri: GroupKFold CV, --export, --sweep", "train_soh",
+              lambda cfg: {"input": _out(cfg, "features.parquet")}),
+    "rul": ("rul_linear", "Doğrusal RUL tahmini ve --backtest", "rul",
+            lambda cfg: {"input": _out(cfg, "features.parquet"), "out": _out(cfg, "rul_linear.parquet"),
+                         "threshold": float((cfg.get("soh") or {}).get("eol_threshold", 0.80))}),
+    "export-lod": ("export_lod", "BatteryVisualizer için seviyeli kapasite/SOH/RUL serileri", "export_lod",
+                   lambda cfg: {"input": _out(cfg, "features.parquet"), "out_dir": _out(cfg, "lod")}),
+    "bench": ("bench", "Sentetik veriyle benchmark", None, None),
+    "pipeline": ("pipeline", "config.yaml pipeline: bölümündeki aşamaları çalıştır", None, None),
+    "health": (None, "Config, yollar ve bağımlılık kontrolü (ağır import yok)", None, None),
+}
+
+# health: bulunup bulunmadığına bakılır, import edilmez
+DEPENDENCIES = ["numpy", "pandas", "pyarrow", "sklearn", "joblib", "yaml", "orjson", "simdjson", "ijson"]
+
+def _log(msg, quiet=False):
+    if not quiet:
+        print(msg, file=sys.stderr)
+
+def load_config_once(path):
+    """Config'i okur (yoksa None) ve süresini döndürür."""
+    t0 = time.perf_counter()
+    if not Path(path).exists():
+        return None, time.perf_counter() - t0
+    from utils import load_config
+    return load_config(path), time.perf_counter() - t0
+
+def health(config_path, cfg):
+    """Hızlı sağlık kontrolü; sorun varsa 1 döndürür."""
+    ok = True
+    print(f"[INFO] Python {sys.version.split()[0]} | {sys.executable}")
+    if cfg is None:
+        print(f"[WARN] Config bulunamadı: {config_path}")
+        return 1
+    print(f"[OK] Config: {config_path}")
+    paths = cfg.get("paths") or {}
+    for key in ("data_root", "out_dir"):
+        p = paths.get(key)
+        if p is None:
+            print(f"[WARN] paths.{key} tanımlı değil")
+            ok = False
+        elif Path(p).exists():
+            print(f"[OK] paths.{key}: {p}")
+        else:
+            print(f"[WARN] paths.{key} yok: {p}")
+            ok = ok and key == "out_dir"          # out_dir ilk çalıştırmada oluşturulur
+    out_dir = Path(paths.get("out_dir", "."))
+    for name in ("features.parquet", "features_cycle.parquet", "rul_linear.parquet", "models"):
+        state = "var" if (out_dir / name).exists() else "yok"
+        print(f"[INFO] artefakt {name}: {state}")
+    for mod in DEPENDENCIES:
+        found = importlib.util.find_spec(mod) is not None
+        print(f"[{'OK' if found else 'INFO'}] {mod}: {'kurulu' if found else 'yok'}")
+        if mod in ("numpy", "pandas", "pyarrow", "yaml") and not found:
+            ok = False
+    return 0 if ok else 1
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="battery", description="Battery pipeline komutları",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(f"  {name:<14} {desc}" for name, (_, desc, _, _) in COMMANDS.items()))
+    parser.add_argument("--config", default="config.yaml", help="Tüm alt komutların kullanacağı config")
+    parser.add_argument("--quiet", action="store_true", help="Config/import süre satırını yazma")
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command", help="Alt komut (aşağıda)")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Alt komutun argümanları")
+    return parser
+
+def run(argv=None):
+    top = build_parser().parse_args(argv)
+    modname, desc, profile_name, defaults = COMMANDS[top.command]
+    cfg, cfg_s = load_config_once(top.config)
+
+    if modname is None:
+        _log(f"[INFO] config={cfg_s * 1e3:.1f}ms", top.quiet)
+        return health(top.config, cfg)
+
+    import cli_args
+    sub = argparse.ArgumentParser(prog=f"battery {top.command}", description=desc)
+    cli_args.ADD_ARGS[modname](sub)
+    known = {a.dest for a in sub._actions}
+    if "config" in known:
+        sub.set_defaults(config=top.config)
+    if cfg is not None and defaults is not None:
+        sub.set_defaults(**{k: v for k, v in defaults(cfg).items() if k in known})
+    args = sub.parse_args(top.args)
+
+    # Ağır modül ancak argümanlar geçerliyse (--help değilse) yüklenir
+    t0 = time.perf_counter()
+    module = importlib.import_module(modname)
+    import_s = time.perf_counter() - t0
+    _log(f"[INFO] config={cfg_s * 1e3:.1f}ms | import {modname}={import_s * 1e3:.0f}ms", top.quiet)
+
+    if profile_name is not None:
+        import instrument
+        with instrument.profiled(args.profile, profile_name):
+            return module.main(args)
+    return module.main(args)
+
+def main(argv=None):
+    result = run(argv)
+    return result if isinstance(result, int) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
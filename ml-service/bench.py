@@ -0,0 +1,213 @@
+"""
+bench.py
+Sentetik ISU-ILCC verisiyle tekrarlanabilir pipeline benchmark'ı; sonuçlar commit'ler arası
+karşılaştırma için JSON olarak yazılır.
+
+Ölçülen durumlar (her ölçekte):
+  prepare_rpt     : prepare_data_isu_ilcc.main (dosya okuma + ayrıştırma + özellikler + parquet)
+  prepare_cycle   : prepare_data_cycle.main
+  rul_loop        : rul_linear.compute_rul_per_cell
+  rul_vectorized  : rul_linear.compute_rul_vectorized
+  cv_linreg/cv_rf : train_soh.evaluate_model (GroupKFold)
+
+- Veri synth_data.generate ile --data-dir/<ölçek> altına bir kez üretilir, sonraki çalıştırmalar yeniden kullanır.
+- Her durum --repeat kez koşar; min/medyan süre, throughput, tepe RSS ve instrument aşama dökümü kaydedilir.
+- --compare eski.json: aynı (ölçek, durum) çiftleri için medyan süre oranını yazdırır.
+"""
+import argparse, contextlib, io, json, os, platform, statistics, subprocess, sys, time
+from argparse import Namespace
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# rul_linear.py depo kökünde
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import instrument
+from cli_args import BENCH_CASES as CASES, add_bench_args as add_args
+import synth_data
+
+SCALES = {
+    "small":  {"groups": 2, "cells": 4,  "weeks": 20, "cycles": 10, "trace_len": 200},
+    "medium": {"groups": 4, "cells": 8,  "weeks": 40, "cycles": 20, "trace_len": 1000},
+    "large":  {"groups": 8, "cells": 16, "weeks": 60, "cycles": 30, "trace_len": 5000},
+}
+
+def _git_info():
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def environment():
+    import sklearn
+    import native
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "native": native.status(),
+    }
+
+def make_cases(meta, rf_trees=50, n_jobs=1):
+    """{durum: (hazırlık, çalıştır)}; hazırlık ölçülmez, çalıştır() işlenen öğe sayısını döndürür."""
+    import prepare_data_isu_ilcc
+    import prepare_data_cycle
+    from rul_linear import compute_rul_per_cell, compute_rul_vectorized
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from train_soh import FEATURE_COLS, TARGET_COL, evaluate_model
+
+    rpt_cfg, cycle_cfg = meta["configs"]["rpt"], meta["configs"]["cycle"]
+    features_path = Path(meta["out_dirs"]["rpt"]) / "features.parquet"
+    state = {}
+
+    def prep_rpt():
+        prepare_data_isu_ilcc.main(Namespace(config=rpt_cfg, limit=None))
+        return meta["rpt_files"]
+
+    def prep_cycle():
+        prepare_data_cycle.main(Namespace(config=cycle_cfg, limit=None))
+        return meta["cycle_files"]
+
+    def load_features():
+        if not features_path.exists():
+            prep_rpt()
+        state["df"] = pd.read_parquet(features_path)
+
+    def load_xy():
+        load_features()
+        df = state["df"].dropna(subset=[TARGET_COL])
+        state["xy"] = (df[FEATURE_COLS].fillna(0.0).values, df[TARGET_COL].values, df["group_id"].values)
+
+    def rul(fn):
+        def run():
+            res = fn(state["df"], k=4, threshold=0.80)
+            return len(res)
+        return run
+
+    def cv(model):
+        def run():
+            X, y, groups = state["xy"]
+            evaluate_model(model, X, y, groups, n_jobs=n_jobs)
+            return len(X)
+        return run
+
+    return {
+        "prepare_rpt": (None, prep_rpt),
+        "prepare_cycle": (None, prep_cycle),
+        "rul_loop": (load_features, rul(compute_rul_per_cell)),
+        "rul_vectorized": (load_features, rul(compute_rul_vectorized)),
+        "cv_linreg": (load_xy, cv(LinearRegression())),
+        "cv_rf": (load_xy, cv(RandomForestRegressor(n_estimators=rf_trees, random_state=42, n_jobs=n_jobs))),
+    }
+
+def run_case(name, setup, fn, repeat=3, quiet=True, input_bytes=None):
+    """Durumu repeat kez koşar; süre istatistikleri ve son koşunun aşama dökümünü döndürür."""
+    sink = io.StringIO() if quiet else None
+    with contextlib.redirect_stdout(sink) if quiet else contextlib.nullcontext():
+        if setup is not None:
+            setup()
+        times, items, prof = [], 0, None
+        for _ in range(repeat):
+            prof = instrument.enable(name)
+            t0 = time.perf_counter()
+            try:
+                items = fn()
+            finally:
+                times.append(time.perf_counter() - t0)
+                instrument.disable()
+    rep = prof.report()
+    med = statistics.median(times)
+    return {
+        "case": name,
+        "repeat": repeat,
+        "times_s": [round(t, 6) for t in times],
+        "min_s": round(min(times), 6),
+        "median_s": round(med, 6),
+        "items": items,
+        "items_per_s": round(items / med, 2) if med > 0 and items else None,
+        "mb_per_s": round(input_bytes / 1e6 / med, 2) if med > 0 and input_bytes else None,
+        "peak_rss_mb": rep["peak_rss_mb"],
+        "stages": {k: {"calls": v["calls"], "total_s": v["total_s"]} for k, v in rep["stages"].items()},
+    }
+
+def run_benchmarks(scales, cases, data_dir, repeat=3, rf_trees=50, n_jobs=1, seed=0, quiet=True):
+    results = []
+    for scale_name, params in scales.items():
+        meta = synth_data.generate(Path(data_dir) / scale_name, seed=seed, **params)
+        print(f"[INFO] Ölçek {scale_name}: RPT={meta['rpt_files']} ({meta['rpt_bytes'] / 1e6:.1f} MB), "
+              f"cycle={meta['cycle_files']} ({meta['cycle_bytes'] / 1e6:.1f} MB)")
+        input_bytes = {"prepare_rpt": meta["rpt_bytes"], "prepare_cycle": meta["cycle_bytes"]}
+        available = make_cases(meta, rf_trees=rf_trees, n_jobs=n_jobs)
+        for name in cases:
+            setup, fn = available[name]
+            r = run_case(name, setup, fn, repeat=repeat, quiet=quiet, input_bytes=input_bytes.get(name))
+            r["scale"] = scale_name
+            results.append(r)
+            rate = f" | {r['items_per_s']:.1f} öğe/s" if r["items_per_s"] else ""
+            print(f"  {name:<16} median={r['median_s']:.3f}s min={r['min_s']:.3f}s{rate}")
+    return results
+
+def compare(current, previous):
+    """(ölçek, durum) bazında medyan süre oranları: yeni / eski (<1 hızlanma)."""
+    old = {(r["scale"], r["case"]): r for r in previous["results"]}
+    rows = []
+    for r in current["results"]:
+        o = old.get((r["scale"], r["case"]))
+        if o is None:
+            continue
+        rows.append({"scale": r["scale"], "case": r["case"], "old_s": o["median_s"],
+                     "new_s": r["median_s"], "ratio": round(r["median_s"] / o["median_s"], 3)
+                     if o["median_s"] > 0 else None})
+    return pd.DataFrame(rows)
+
+def main(args):
+    scale_names = args.scales.split(",")
+    unknown = set(scale_names) - set(SCALES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen ölçek: {sorted(unknown)} (seçenekler: {sorted(SCALES)})")
+    cases = args.cases.split(",") if args.cases else list(CASES)
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise ValueError(f"Bilinmeyen durum: {sorted(unknown)} (seçenekler: {list(CASES)})")
+
+    scales = {name: SCALES[name] for name in scale_names}
+    results = run_benchmarks(scales, cases, args.data_dir, repeat=args.repeat, rf_trees=args.rf_trees,
+                             n_jobs=args.n_jobs, seed=args.seed, quiet=not args.verbose)
+    git = _git_info()
+    out = {
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": git,
+        "env": environment(),
+        "settings": {"repeat": args.repeat, "rf_trees": args.rf_trees, "n_jobs": args.n_jobs, "seed": args.seed},
+        "scales": scales,
+        "results": results,
+    }
+
+    out_path = Path(args.out) if args.out else (
+        Path(args.results_dir) / f"bench_{git['commit'] or 'nogit'}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(json.dumps(out, indent=2), encoding="utf-8")
+    print(f"[OK] Benchmark -> {out_path}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        cmp = compare(out, previous)
+        print(f"\n📊 Karşılaştırma ({previous['git'].get('commit')} -> {git['commit']}; oran < 1 = hızlanma)")
+        print(cmp.to_string(index=False) if len(cmp) else "  Ortak (ölçek, durum) yok")
+    return out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_args(parser)
+    main(parser.parse_args())
@@ -0,0 +1,237 @@
+"""
+Hücre başına zaman serileri için dizi tabanlı, sütunlu bellek içi depo.
+
+- Satırlar (group_id, cell_id, week_idx) sırasıyla bitişik tutulur; hücre i'nin satırları
+  [offsets[i], offsets[i+1]) aralığıdır (CSR tarzı ofset indeksi).
+- group_id / cell_id satır başına string olarak değil, sıralı sözlüğe (groups/cells) int32 kod
+  olarak hücre başına bir kez saklanır; string anahtarla groupby yapılmaz.
+- Değer kolonları bitişik dizilerdir (varsayılan float32, tamsayı hafta kolonu int32);
+  dtype=None kaynağın tipini korur. Kaynak zaten sıralıysa kolonlar kopyalanmadan alınır.
+- Hücre dilimi kopyasız görünümdür; segment indirgemeleri ufunc.reduceat ile tek çağrıdır.
+"""
+import numpy as np
+import pandas as pd
+
+KEY_COLS = ["group_id", "cell_id"]
+WEEK_COL = "week_idx"
+
+def _as_column(values, dtype, week=False):
+    values = np.asarray(values)
+    if dtype is None:
+        return values
+    if week and values.dtype.kind in "iu":
+        return values.astype(np.int32, copy=False)
+    return values.astype(dtype, copy=False)
+
+def _sorted_codes(values):
+    """Sıralı sözlük ve int32 kodlar (NaN/None anahtarlar sözlüğün sonunda kendi kodunu alır)."""
+    if hasattr(values, "dictionary_encode"):
+        # pyarrow dizisi: kodlama Arrow'da yapılır, sadece (küçük) sözlük sıralanır
+        arr = values.combine_chunks() if hasattr(values, "combine_chunks") else values
+        enc = arr.dictionary_encode()
+        dic = np.asarray(enc.dictionary.to_numpy(zero_copy_only=False), dtype=object)
+        order = np.argsort(dic, kind="stable")
+        rank = np.empty(len(dic), dtype=np.int64)
+        rank[order] = np.arange(len(dic))
+        idx = enc.indices.fill_null(-1).to_numpy()
+        codes = np.where(idx < 0, -1, rank[np.maximum(idx, 0)]) if len(dic) else idx.astype(np.int64)
+        uniques = dic[order]
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+        uniques = np.asarray(uniques, dtype=object)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(uniques), codes)
+        uniques = np.append(uniques, np.array([None], dtype=object))
+    return uniques, codes.astype(np.int32, copy=False)
+
+def _sort_order(key, week):
+    """(key, week) kararlı sıralama permütasyonu; tamsayı haftada tek argsort."""
+    if week.dtype.kind in "iu" and len(week):
+        lo, span = int(week.min()), int(week.max()) - int(week.min()) + 1
+        if (int(key.max()) + 1) * span < 2 ** 62:
+            return np.argsort(key * span + (week.astype(np.int64) - lo), kind="stable")
+    return np.lexsort((week, key))
+
+class CellSeriesStore:
+    """
+    groups, cells : sıralı anahtar sözlükleri (object dizileri)
+    cell_group    : hücre başına groups kodu (int32), cell_cell: hücre başına cells kodu (int32)
+    offsets       : hücre sınırları (int64, uzunluk = hücre sayısı + 1)
+    columns       : kolon adı -> satır dizisi
+    order         : kaynak satırlarını sıralı düzene getiren permütasyon (kaynak sıralıysa None)
+    """
+
+    def __init__(self, groups, cells, cell_group, cell_cell, offsets, columns, order=None):
+        self.groups = groups
+        self.cells = cells
+        self.cell_group = cell_group
+        self.cell_cell = cell_cell
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.columns = columns
+        self.order = order
+        self._row_cell = None
+        self._lookup = None
+
+    @classmethod
+    def from_arrays(cls, group_ids, cell_ids, columns, week_col=WEEK_COL, dtype=np.float32):
+        """Satır başına anahtar dizileri ve {kolon: dizi} eşlemesinden depo kurar."""
+        groups, g_code = _sorted_codes(group_ids)
+        cells, c_code = _sorted_codes(cell_ids)
+        n = len(g_code)
+        week = np.asarray(columns[week_col]) if week_col in columns else np.zeros(n)
+
+        # Zaten (group, cell, week) sıralıysa permütasyon uygulanmaz (kolonlar kopyasız kalır)
+        key = g_code.astype(np.int64) * max(len(cells), 1) + c_code
+        same = key[1:] == key[:-1]
+        with np.errstate(invalid="ignore"):
+            w_ok = (week[1:] >= week[:-1]) | np.isnan(week[1:].astype(float))
+        sorted_ = n < 2 or bool(np.all((key[1:] > key[:-1]) | (same & w_ok)))
+        order = None if sorted_ else _sort_order(key, week)
+        if order is not None:
+            key, g_code, c_code = key[order], g_code[order], c_code[order]
+
+        new_cell = np.ones(n, dtype=bool)
+        new_cell[1:] = key[1:] != key[:-1]
+        starts = np.flatnonzero(new_cell)
+        cols = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            if order is not None:
+                values = values[order]
+            cols[name] = _as_column(values, dtype, week=(name == week_col))
+        return cls(groups, cells, g_code[starts], c_code[starts], np.append(starts, n), cols, order)
+
+    @classmethod
+    def from_frame(cls, df, columns=None, week_col=WEEK_COL, dtype=np.float32):
+        """DataFrame'den (group_id, cell_id + columns; varsayılan: kalan tüm sayısal kolonlar)."""
+        if columns is None:
+            columns = [c for c in df.columns if c not in KEY_COLS and pd.api.types.is_numeric_dtype(df[c])]
+        cols = {c: df[c].to_numpy() for c in columns}
+        return cls.from_arrays(df["group_id"], df["cell_id"], cols,
+                               week_col=week_col, dtype=dtype)
+
+    @classmethod
+    def from_parquet(cls, path, columns=None, groups=None, cells=None, week_col=WEEK_COL, dtype=np.float32):
+        """
+        features.parquet ya da bölümlü veri setinden kurar; sadece istenen kolonlar/bölümler okunur.
+        Boşluksuz (null'suz) sayısal kolonlar Arrow belleğinden kopyasız alınır.
+        """
+        from feature_store import read_table
+        names = None if columns is None else KEY_COLS + [c for c in columns if c not in KEY_COLS]
+        table = read_table(path, groups=groups, cells=cells, columns=names).combine_chunks()
+        if columns is None:
+            columns = [c for c in table.column_names if c not in KEY_COLS]
+        cols = {}
+        for c in columns:
+            col = table.column(c)
+            cols[c] = (col.chunk(0) if col.num_chunks == 1 else col).to_numpy(zero_copy_only=False)
+        return cls.from_arrays(table.column("group_id"), table.column("cell_id"), cols,
+                               week_col=week_col, dtype=dtype)
+
+    # --- yapı ---
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def n_cells(self):
+        return len(self.offsets) - 1
+
+    @property
+    def starts(self):
+        return self.offsets[:-1]
+
+    @property
+    def ends(self):
+        return self.offsets[1:]
+
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+
+    def row_cell(self):
+        """Satır başına hücre indeksi."""
+        if self._row_cell is None:
+            self._row_cell = np.repeat(np.arange(self.n_cells), self.lengths)
+        return self._row_cell
+
+    def position(self):
+        """Satırın hücre içindeki sırası (0'dan başlar)."""
+        return np.arange(len(self)) - self.broadcast(self.starts)
+
+    def keys(self):
+        """Hücre başına (group_id, cell_id) dizileri."""
+        return self.groups[self.cell_group], self.cells[self.cell_cell]
+
+    def row_keys(self):
+        """Satır başına (group_id, cell_id) dizileri."""
+        g, c = self.keys()
+        return self.broadcast(g), self.broadcast(c)
+
+    def locate(self, group_id, cell_id):
+        """Hücre indeksi; yoksa KeyError."""
+        if self._lookup is None:
+            g, c = self.keys()
+            self._lookup = {(gi, ci): i for i, (gi, ci) in enumerate(zip(g, c))}
+        return self._lookup[(group_id, cell_id)]
+
+    def cell(self, i, name):
+        """i. hücrenin kolon dilimi (kopyasız görünüm)."""
+        return self.columns[name][self.offsets[i]:self.offsets[i + 1]]
+
+    # --- segment işlemleri ---
+    def _values(self, values):
+        return self.columns[values] if isinstance(values, str) else np.asarray(values)
+
+    def broadcast(self, per_cell):
+        """Hücre başına değeri hücrenin tüm satırlarına yayar."""
+        return np.repeat(np.asarray(per_cell), self.lengths)
+
+    def reduce(self, values, ufunc=np.add):
+        """Hücre başına ufunc.reduceat (ör. np.add, np.minimum, np.maximum)."""
+        return ufunc.reduceat(self._values(values), self.starts) if self.n_cells else np.empty(0)
+
+    def first_index(self, mask):
+        """Hücre başına mask'in ilk True olduğu satır; yoksa hücrenin bitişi (ends)."""
+        n = len(self)
+        first = np.minimum.reduceat(np.where(mask, np.arange(n), n), self.starts) if self.n_cells else np.empty(0, int)
+        return np.minimum(first, self.ends)
+
+    def first_valid(self, values):
+        """Hücre başına ilk NaN olmayan değer (pandas groupby.first gibi); hiç yoksa NaN."""
+        v = self._values(values)
+        if v.dtype.kind in "iub":
+            return v[self.starts]
+        idx = self.first_index(~np.isnan(v))
+        found = idx < self.ends
+        return np.where(found, v[np.minimum(idx, max(len(v) - 1, 0))], np.nan)
+
+    def shift(self, values, periods=1):
+        """Hücre içinde kaydırma (pandas groupby.shift gibi); hücre dışına taşan yerler NaN."""
+        v = self._values(values).astype(float)
+        out = np.full(len(v), np.nan)
+        pos, n_cell = self.position(), self.broadcast(self.lengths)
+        if periods >= 0:
+            ok = pos >= periods
+            out[ok] = v[np.flatnonzero(ok) - periods]
+        else:
+            ok = pos < n_cell + periods
+            out[ok] = v[np.flatnonzero(ok) - periods]
+        return out
+
+    def diff(self, values):
+        """Hücre içinde ardışık fark (pandas groupby.diff gibi); hücrenin ilk satırı NaN."""
+        return self._values(values) - self.shift(values, 1)
+
+    def take(self, values):
+        """Kaynak sırasındaki diziyi deponun satır sırasına getirir."""
+        values = np.asarray(values)
+        return values if self.order is None else values[self.order]
+
+def as_cell_store(data, columns, dtype=np.float64):
+    """CellSeriesStore'u olduğu gibi, DataFrame'i verilen kolonlarla depoya çevirerek döndürür."""
+    if isinstance(data, CellSeriesStore):
+        return data
+    return CellSeriesStore.from_frame(data, columns=columns, dtype=dtype)
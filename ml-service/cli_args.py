@@ -0,0 +1,138 @@
+"""
+cli_args.py
+Script'lerin komut satırı seçenekleri. Sadece argparse + instrument (stdlib) kullanır; böylece
+`battery <komut> --help` ve argüman ayrıştırma pandas/NumPy/scikit-learn yüklemeden çalışır.
+
+- Her script kendi add_args'ını buradan alır (python <script>.py ile aynı seçenekler).
+- battery.py ADD_ARGS ile alt komut parser'ını kurar; ağır modül ancak main çağrılırken import edilir.
+- Seçimlerde kullanılan adlar (RUL motorları, LOD yöntemleri, bench ölçekleri) burada tutulur;
+  ilgili modüllerdeki tablolarla eşleştiği tests/test_battery_cli.py'de kontrol edilir.
+"""
+import instrument
+
+RUL_ENGINE_NAMES = ("loop", "vectorized")
+LOD_METHODS = ("lttb", "minmax")
+LOD_DEFAULT_LEVELS = (0, 1024, 256, 64)
+BENCH_SCALES = ("small", "medium", "large")
+BENCH_CASES = ("prepare_rpt", "prepare_cycle", "rul_loop", "rul_vectorized", "cv_linreg", "cv_rf")
+
+def add_prepare_rpt_args(parser):
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--limit", type=int, default=None, help="İşlenecek dosya sayısını sınırla")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Dosya ayrıştırma için process sayısı (1 = seri)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Manifest ile sadece yeni/değişen dosyaları ayrıştır")
+    parser.add_argument("--stream", action="store_true",
+                        help="Büyük dosyaları ijson ile akışla özetle (sabit bellek)")
+    parser.add_argument("--plan-sample", type=int, default=0,
+                        help="Anahtar yolu planını öğrenmek için örnek dosya sayısı (0 = kapalı)")
+    parser.add_argument("--kalman", action="store_true",
+                        help="SOH serilerini core-engine Kalman filtresiyle süzüp SOH_kf kolonu ekle")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="out_dir/features/ altına group_id bölümlü veri seti de yaz (cell_id, week_idx sıralı)")
+    parser.add_argument("--join-cycles", action="store_true",
+                        help="out_dir/features_cycle_weekly.parquet'ten DoD ve C-rate'leri as-of join ile ekle")
+    instrument.add_profile_arg(parser, "prepare_rpt")
+    return parser
+
+def add_prepare_cycle_args(parser):
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--limit", type=int, default=None, help="İşlenecek dosya sayısını sınırla")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Manifest ile sadece yeni/değişen dosyaları ayrıştır")
+    parser.add_argument("--stream", action="store_true",
+                        help="Büyük dosyaları ijson ile akışla özetle (sabit bellek)")
+    parser.add_argument("--plan-sample", type=int, default=0,
+                        help="Anahtar yolu planını öğrenmek için örnek dosya sayısı (0 = kapalı)")
+    parser.add_argument("--build-store", action="store_true",
+                        help="Ham V/I/kapasite dizilerini out_dir/signal_store'a yaz ve özellikleri oradan üret")
+    parser.add_argument("--from-store", action="store_true",
+                        help="Özellikleri mevcut signal_store'dan üret (JSON okunmaz)")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="out_dir/features_cycle/ altına group_id bölümlü veri seti de yaz")
+    instrument.add_profile_arg(parser, "prepare_cycle")
+    return parser
+
+def add_train_args(parser):
+    parser.add_argument("--input", default="artifacts/features.parquet",
+                        help="Path to features.parquet or the group_id-partitioned features/ directory")
+    parser.add_argument("--groups", default=None, help="Only these group_ids (comma-separated)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="CV için CPU bütçesi (fold ve ağaç paralelliği arasında bölünür; -1 = tüm çekirdekler)")
+    parser.add_argument("--export", action="store_true",
+                        help="Fit final models on all rows and write versioned artifacts to out_dir/models")
+    parser.add_argument("--sweep", action="store_true",
+                        help="config.yaml'daki sweep: bölümüyle hiperparametre taraması yap")
+    parser.add_argument("--config", default="config.yaml", help="out_dir/sweep için config (--export, --sweep)")
+    parser.add_argument("--out-dir", default=None, help="out_dir'i config yerine doğrudan ver")
+    instrument.add_profile_arg(parser, "train_soh")
+    return parser
+
+def add_rul_args(parser):
+    parser.add_argument("--input", default="../artifacts/features.parquet", help="features.parquet path")
+    parser.add_argument("--out",   default="../artifacts/rul_linear.parquet", help="output parquet path")
+    parser.add_argument("--k", type=int, default=4, help="last K SOH points for linear fit")
+    parser.add_argument("--threshold", type=float, default=0.80, help="EOL SOH threshold")
+    parser.add_argument("--engine", choices=sorted(RUL_ENGINE_NAMES), default="vectorized",
+                        help="loop: hücre başına polyfit, vectorized: tüm çerçeve tek geçişte")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64",
+                        help="SOH dizilerinin bellek tipi (float32: yarı bellek, sonuçlar ~1e-7 göreli farklı)")
+    parser.add_argument("--backtest", action="store_true",
+                        help="Her geçmiş haftayı origin alarak geri test; rul_backtest.parquet + MAE-ufuk eğrisi yazar")
+    parser.add_argument("--k-list", default=None, help="Geri test için K listesi (örn. 3,4,6; yoksa --k)")
+    parser.add_argument("--threshold-list", default=None, help="Geri test için eşik listesi (örn. 0.8,0.85; yoksa --threshold)")
+    parser.add_argument("--horizon-bin", type=int, default=4, help="MAE-ufuk eğrisi kova genişliği (hafta)")
+    parser.add_argument("--groups", default=None, help="Sadece bu group_id'ler (virgülle ayrılmış)")
+    parser.add_argument("--cells", default=None, help="Sadece bu cell_id'ler (virgülle ayrılmış)")
+    instrument.add_profile_arg(parser, "rul")
+    return parser
+
+def add_export_lod_args(parser):
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--input", default=None, help="features.parquet ya da bölümlü features/ (varsayılan: out_dir altında)")
+    parser.add_argument("--out-dir", default=None, help="Çıktı dizini (varsayılan: out_dir/lod)")
+    parser.add_argument("--levels", default=",".join(map(str, LOD_DEFAULT_LEVELS)),
+                        help="Seviye başına hedef nokta sayısı (0 = tam çözünürlük)")
+    parser.add_argument("--method", choices=sorted(LOD_METHODS), default="lttb")
+    parser.add_argument("--k", type=int, default=4, help="RUL serisi için son K nokta")
+    parser.add_argument("--threshold", type=float, default=None, help="EOL eşiği (varsayılan: soh.eol_threshold)")
+    parser.add_argument("--groups", default=None, help="Sadece bu group_id'ler (virgülle ayrılmış)")
+    instrument.add_profile_arg(parser, "export_lod")
+    return parser
+
+def add_bench_args(parser):
+    parser.add_argument("--scales", default="small,medium", help=f"Virgülle ayrılmış: {','.join(BENCH_SCALES)}")
+    parser.add_argument("--cases", default=None, help=f"Virgülle ayrılmış alt küme (varsayılan: hepsi) {','.join(BENCH_CASES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", default="../artifacts/bench_data", help="Sentetik veri önbelleği")
+    parser.add_argument("--results-dir", default="../artifacts/bench")
+    parser.add_argument("--out", default=None, help="Sonuç JSON yolu (varsayılan: results-dir/bench_<commit>_<zaman>.json)")
+    parser.add_argument("--compare", default=None, help="Önceki sonuç JSON'u ile karşılaştır")
+    parser.add_argument("--rf-trees", type=int, default=50)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="Pipeline çıktısını bastırma")
+    return parser
+
+def add_pipeline_args(parser):
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--stages", default=None,
+                        help="Sadece bu aşamalar ve üst bağımlılıkları (virgülle ayrılmış)")
+    parser.add_argument("--force", default=None,
+                        help="Önbelleğe bakmadan yeniden koşacak aşamalar (virgülle; 'all' = hepsi)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Eşzamanlı aşama sayısı (varsayılan: pipeline.workers)")
+    parser.add_argument("--dry-run", action="store_true", help="Koşmadan hangi aşamaların bayat olduğunu göster")
+    return parser
+
+# modül adı -> add_args
+ADD_ARGS = {
+    "prepare_data_isu_ilcc": add_prepare_rpt_args,
+    "prepare_data_cycle": add_prepare_cycle_args,
+    "train_soh": add_train_args,
+    "rul_linear": add_rul_args,
+    "export_lod": add_export_lod_args,
+    "bench": add_bench_args,
+    "pipeline": add_pipeline_args,
+}
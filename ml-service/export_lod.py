@@ -0,0 +1,233 @@
+"""
+export_lod.py
+BatteryVisualizer için hücre serilerinin (kapasite, SOH, RUL) ayrıntı düzeyli (level-of-detail) ikili dışa aktarımı.
+
+Çıktı (out_dir/lod):
+  index.json   -> sürüm, seri adları, seviye hedefleri, yöntem; grup başına dosya adı ve hücre listesi
+  <grup>.lod   -> grubun tüm hücreleri için seviye piramitleri
+
+<grup>.lod düzeni (little-endian):
+  başlık   : "BLOD", u16 sürüm, u16 seri sayısı, u16 seviye sayısı, u16 yöntem (0=lttb, 1=minmax), u32 hücre sayısı
+  seviyeler: seviye sayısı x u32 hedef nokta sayısı (0 = tam çözünürlük)
+  dizin    : hücre x seri x seviye adet (u64 bayt ofseti, u32 nokta sayısı, u32 boş)
+  veri     : her blok nokta sayısı x (f32 hafta, f32 değer)
+
+- Seviye 0 tam seridir; sonraki seviyeler tam seriden hedef nokta sayısına LTTB ya da min-max ile
+  indirgenir. Hedef seri uzunluğundan büyükse bir önceki blok yeniden kullanılır (dizin aynı ofseti gösterir).
+- Görüntüleyici dizini okuyup sadece görünen hücrelerin, ekran genişliğine uyan seviyesini okur.
+- RUL serisi: her haftada rolling-origin tahmini (rul_linear.backtest_rul, tek K ve eşik).
+- Kapasite serisi features.parquet'teki rpt_capacity_Ah kolonundan gelir (eski çıktılarda yoksa boş yazılır).
+"""
+import argparse, json, os, struct, sys
+from pathlib import Path
+import numpy as np
+
+# rul_linear.py depo kökünde
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import instrument
+from cli_args import LOD_DEFAULT_LEVELS as DEFAULT_LEVELS, add_export_lod_args as add_args
+from cell_store import CellSeriesStore
+from feature_store import schema_names
+from utils import load_config
+
+MAGIC = b"BLOD"
+LOD_VERSION = 1
+LOD_SERIES = ("capacity", "soh", "rul")
+METHODS = {"lttb": 0, "minmax": 1}
+HEADER = struct.Struct("<4sHHHHI")
+DIR_DTYPE = np.dtype([("offset", "<u8"), ("count", "<u4"), ("pad", "<u4")])
+POINT_DTYPE = np.dtype("<f4")
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: seçilen noktaların indeksleri (ilk ve son nokta dahil).
+    n_out >= len(x) ise tüm indeksler döner.
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 1)])
+    every = (n - 2) / (n_out - 2)
+    bounds = (np.arange(n_out - 1) * every).astype(np.int64) + 1      # kova i: [bounds[i], bounds[i+1])
+    bounds[-1] = n - 1
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        nlo, nhi = (hi, bounds[i + 2]) if i + 2 < len(bounds) else (n - 1, n)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+def minmax(x, y, n_out):
+    """Kova başına en küçük ve en büyük nokta (+ ilk/son); tepe/çukurlar kaybolmaz."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(1, (n_out - 2) // 2)
+    bounds = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    picks = [0, n - 1]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        if hi > lo:
+            seg = y[lo:hi]
+            picks += [lo + int(np.argmin(seg)), lo + int(np.argmax(seg))]
+    return np.unique(picks)
+
+def pyramid(x, y, levels, method="lttb"):
+    """Seviye başına seçilen indeksler; tam çözünürlük (hedef 0 ya da seri kısa) None."""
+    pick = lttb if method == "lttb" else minmax
+    return [None if t == 0 or t >= len(x) else pick(x, y, t) for t in levels]
+
+def write_group(path, cells, levels, method="lttb"):
+    """
+    cells: hücre başına {seri: (x, y)} (eksik seri boş yazılır). Dosyayı atomik yazar, bayt sayısını döndürür.
+    """
+    n_cells, n_series, n_levels = len(cells), len(LOD_SERIES), len(levels)
+    directory = np.zeros((n_cells, n_series, n_levels), dtype=DIR_DTYPE)
+    offset = HEADER.size + 4 * n_levels + directory.nbytes
+    blocks = []
+    for ci, series in enumerate(cells):
+        for si, name in enumerate(LOD_SERIES):
+            x, y = series.get(name, (np.empty(0), np.empty(0)))
+            prev = None
+            for li, idx in enumerate(pyramid(x, y, levels, method)):
+                # Önceki seviyeyle aynı nokta kümesi: blok yeniden kullanılır
+                if li and (idx is prev or (idx is not None and prev is not None and np.array_equal(idx, prev))):
+                    directory[ci, si, li] = directory[ci, si, li - 1]
+                    continue
+                pts = np.empty((len(x) if idx is None else len(idx), 2), dtype=POINT_DTYPE)
+                pts[:, 0], pts[:, 1] = (x, y) if idx is None else (x[idx], y[idx])
+                directory[ci, si, li] = (offset, len(pts), 0)
+                blocks.append(pts.tobytes())
+                offset += pts.nbytes
+                prev = idx
+
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, LOD_VERSION, n_series, n_levels, METHODS[method], n_cells))
+        fh.write(np.asarray(levels, dtype="<u4").tobytes())
+        fh.write(directory.tobytes())
+        for b in blocks:
+            fh.write(b)
+    os.replace(tmp, path)
+    return offset
+
+class LodFile:
+    """<grup>.lod okuyucu (test ve Python araçları için; C# tarafı Models/LodReader.cs)."""
+
+    def __init__(self, path):
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, n_series, n_levels, method, n_cells = HEADER.unpack(bytes(self.data[:HEADER.size]))
+        if magic != MAGIC or version != LOD_VERSION:
+            raise ValueError(f"Geçersiz LOD dosyası: {path}")
+        pos = HEADER.size
+        self.levels = np.frombuffer(self.data, dtype="<u4", count=n_levels, offset=pos).tolist()
+        pos += 4 * n_levels
+        self.method = {v: k for k, v in METHODS.items()}[method]
+        self.directory = np.frombuffer(self.data, dtype=DIR_DTYPE, count=n_cells * n_series * n_levels,
+                                       offset=pos).reshape(n_cells, n_series, n_levels)
+
+    def series(self, cell, name, level=0):
+        """(hafta, değer) float32 görünümleri."""
+        e = self.directory[cell, LOD_SERIES.index(name), level]
+        pts = np.frombuffer(self.data, dtype=POINT_DTYPE, count=2 * int(e["count"]), offset=int(e["offset"]))
+        pts = pts.reshape(-1, 2)
+        return pts[:, 0], pts[:, 1]
+
+def _finite(x, y):
+    ok = np.isfinite(x) & np.isfinite(y)
+    return x[ok], y[ok]
+
+def _rul_series(store, k, threshold):
+    """Hücre indeksi -> (origin haftası, RUL tahmini) (backtest tablosu hücre bazında bitişik)."""
+    from rul_linear import backtest_rul
+    bt = backtest_rul(store, ks=(k,), thresholds=(threshold,))
+    if bt.empty:
+        return {}
+    g, c = bt["group_id"].to_numpy(), bt["cell_id"].to_numpy()
+    new = np.ones(len(bt), dtype=bool)
+    new[1:] = (g[1:] != g[:-1]) | (c[1:] != c[:-1])
+    starts = np.flatnonzero(new)
+    ends = np.append(starts[1:], len(bt))
+    x = bt["origin_week_idx"].to_numpy(float)
+    y = bt["RUL_pred_weeks"].to_numpy(float)
+    return {store.locate(g[s], c[s]): _finite(x[s:e], y[s:e]) for s, e in zip(starts, ends)}
+
+def export_lod(input_path, out_dir, levels=DEFAULT_LEVELS, method="lttb", k=4, threshold=0.80, groups=None):
+    """Tüm grupları out_dir altına yazar; index sözlüğünü döndürür."""
+    if method not in METHODS:
+        raise ValueError(f"Bilinmeyen yöntem: {method} ({', '.join(METHODS)})")
+    levels = [int(t) for t in levels]
+    with instrument.stage("parquet_read", items=1):
+        columns = ["week_idx", "SOH", "rpt_capacity_Ah"]
+        if "rpt_capacity_Ah" not in schema_names(input_path):
+            print("[WARN] rpt_capacity_Ah yok (eski features.parquet); kapasite serisi boş yazılacak.")
+            columns.remove("rpt_capacity_Ah")
+        store = CellSeriesStore.from_parquet(input_path, columns=columns, groups=groups, dtype=np.float64)
+    if len(store) == 0:
+        raise ValueError(f"{input_path} içinde satır yok (groups={groups})")
+
+    with instrument.stage("rul_backtest", items=store.n_cells):
+        rul = _rul_series(store, k, threshold)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    cell_groups, cell_ids = store.keys()
+    index = {"version": LOD_VERSION, "format": "BLOD", "series": list(LOD_SERIES), "levels": levels,
+             "method": method, "k": k, "threshold": threshold, "source": str(input_path), "groups": {}}
+
+    # Hücreler group_id sırasıyla bitişik: grup başına [ilk, son) hücre aralığı
+    code = store.cell_group
+    bounds = np.flatnonzero(np.r_[True, code[1:] != code[:-1], True])
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        group = str(cell_groups[lo])
+        cells = []
+        for i in range(lo, hi):
+            weeks = store.cell(i, "week_idx").astype(float)
+            series = {"soh": _finite(weeks, store.cell(i, "SOH"))}
+            if "rpt_capacity_Ah" in store.columns:
+                series["capacity"] = _finite(weeks, store.cell(i, "rpt_capacity_Ah"))
+            if i in rul:
+                series["rul"] = rul[i]
+            cells.append(series)
+        fname = f"{group}.lod"
+        with instrument.stage("lod_write", items=hi - lo) as st:
+            nbytes = write_group(out_dir / fname, cells, levels, method)
+            st.add(nbytes=nbytes)
+        weeks = store["week_idx"][store.offsets[lo]:store.offsets[hi]]
+        index["groups"][group] = {"file": fname, "cells": [str(c) for c in cell_ids[lo:hi]], "bytes": nbytes,
+                                  "week_range": [float(np.nanmin(weeks)), float(np.nanmax(weeks))]}
+
+    tmp = out_dir / "index.json.tmp"
+    tmp.write_text(json.dumps(index, indent=1), encoding="utf-8")
+    os.replace(tmp, out_dir / "index.json")
+    return index
+
+def main(args):
+    cfg = load_config(args.config) if Path(args.config).exists() else {}
+    out_root = Path((cfg.get("paths") or {}).get("out_dir", "artifacts"))
+    input_path = Path(args.input) if args.input else out_root / "features.parquet"
+    out_dir = Path(args.out_dir) if args.out_dir else out_root / "lod"
+    threshold = args.threshold if args.threshold is not None else float((cfg.get("soh") or {}).get("eol_threshold", 0.80))
+    levels = [int(x) for x in args.levels.split(",")]
+    groups = args.groups.split(",") if args.groups else None
+
+    index = export_lod(input_path, out_dir, levels=levels, method=args.method, k=args.k,
+                       threshold=threshold, groups=groups)
+    n_cells = sum(len(g["cells"]) for g in index["groups"].values())
+    total = sum(g["bytes"] for g in index["groups"].values())
+    print(f"[OK] LOD → {out_dir} | gruplar={len(index['groups'])}, hücreler={n_cells}, "
+          f"seviyeler={levels}, boyut={total / 1e6:.2f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_args(parser)
+    args = parser.parse_args()
+    with instrument.profiled(args.profile, "export_lod"):
+        main(args)
@@ -0,0 +1,149 @@
+"""
+JSON dosyaları için "extraction plan" (anahtar yolu planı).
+- Bir örnek dosya kümesi üzerinde özyinelemeli tarama ile kapasite/voltaj/akım
+  dizilerinin bulunduğu anahtar yolları öğrenilir (liste indeksleri joker olur).
+- Her yol, örnekte ulaştığı değerlerin kaba türüyle (dict/liste/dizi/skaler) saklanır.
+- Sonraki dosyalarda ağaç dolaşılmaz: öğrenilen yollar doğrudan çözülür ve değer türleri
+  kontrol edilir; değerler belge sırasıyla (konumlarıyla) döner. Bir yol çözülemezse ya da
+  tür değişmişse (miss) çağıran taraf özyinelemeli taramaya döner.
+- Öğrenilmemiş bir konumdaki ek eşleşmeler görülmez; plan örnek dosyalarla aynı düzendeki
+  veri setleri içindir (--plan-sample).
+"""
+
+WILDCARD = None   # JSON anahtarları hiçbir zaman None olamaz: "listenin tüm elemanları"
+
+def _kind(v):
+    """Yol kontrolünün baktığı kaba değer türü (boşluk eşleşme kuralına bırakılır)."""
+    if isinstance(v, dict):
+        return "d"
+    if isinstance(v, list):
+        return "l"
+    if hasattr(v, "__len__") and not isinstance(v, str):
+        return "a"
+    return "s"
+
+def sample_files(files, n):
+    """Planı öğrenmek için dosya listesine eşit aralıklarla yayılmış en fazla n dosya."""
+    if n <= 0 or not files:
+        return []
+    step = max(1, len(files) // n)
+    return list(files[::step][:n])
+
+def discover_paths(obj, slots):
+    """
+    slots: {ad: (eşleşme(k, v), max_depth)} -> {ad: [yol, ...]}
+    Yollar belge sırasıyla, tekrarsız döner; max_depth None ise derinlik sınırı yok.
+    """
+    found = {name: {} for name in slots}
+
+    def walk(x, path, depth):
+        if isinstance(x, dict):
+            for k, v in x.items():
+                for name, (match, max_depth) in slots.items():
+                    if (max_depth is None or depth <= max_depth) and match(k, v):
+                        found[name].setdefault(path + (k,), None)
+                if isinstance(v, (dict, list)):
+                    walk(v, path + (k,), depth + 1)
+        elif isinstance(x, list):
+            for it in x:
+                if isinstance(it, (dict, list)):
+                    walk(it, path + (WILDCARD,), depth + 1)
+
+    walk(obj, (), 0)
+    return {name: list(paths) for name, paths in found.items()}
+
+def _key_position(d, key):
+    for i, k in enumerate(d):
+        if k == key:
+            return i
+
+def resolve_path(obj, path, match=None, positions=True):
+    """
+    Yolu takip ederek ulaşılan (konum, değer) çiftleri (joker tüm liste elemanlarına açılır).
+    Konum her seviyedeki dict anahtar sırası / liste indeksidir; konumlar sıralanınca belge sırası
+    (üst düğümdeki eşleşme alt düğümdekilerden önce) elde edilir. match verilirse son anahtarda uygulanır.
+    positions=False ise konumlar hesaplanmaz (boş demet); tek yolun çiftleri zaten belge sırasındadır.
+    """
+    cur = [((), obj)]
+    last = len(path) - 1
+    for depth, tok in enumerate(path):
+        nxt = []
+        for pos, x in cur:
+            if tok is WILDCARD:
+                if isinstance(x, list):
+                    nxt.extend((pos + (i,), it) for i, it in enumerate(x))
+            elif isinstance(x, dict) and tok in x:
+                v = x[tok]
+                if depth == last and match is not None and not match(tok, v):
+                    continue
+                nxt.append(((pos + (_key_position(x, tok),)) if positions else pos, v))
+        cur = nxt
+        if not cur:
+            break
+    return cur
+
+class ExtractionPlan:
+    """
+    Öğrenilen yol kümeleri ({slot: [(yol, türler), ...]}) ve isabet (hit/miss) sayaçları.
+    Sadece yollar saklandığından nesne process pool'a gönderilebilir.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.layouts = []
+        self.hits = 0
+        self.misses = 0
+
+    def learn(self, obj):
+        if not isinstance(obj, dict):
+            return
+        layout = {}
+        for name, plist in discover_paths(obj, self.slots).items():
+            match = self.slots[name][0]
+            layout[name] = [(p, frozenset(_kind(v) for _, v in resolve_path(obj, p, match))) for p in plist]
+        if layout not in self.layouts:
+            self.layouts.append(layout)
+
+    def _resolve(self, obj, layout, positions):
+        out = {}
+        for name, plist in layout.items():
+            match = self.slots[name][0]
+            # Tek yolun çiftleri zaten belge sırasında: konum sadece birleştirme/istek için gerekir
+            need_pos = positions or len(plist) > 1
+            pairs = []
+            for p, kinds in plist:
+                got = resolve_path(obj, p, match, need_pos)
+                if not got:
+                    return None
+                for _, v in got:
+                    if _kind(v) not in kinds:
+                        return None
+                pairs.extend(got)
+            if len(plist) > 1:
+                pairs.sort(key=lambda pv: pv[0])
+            out[name] = pairs if positions else [v for _, v in pairs]
+        return out
+
+    def lookup(self, obj, positions=False):
+        """
+        {slot: [değer, ...]} döndürür (belge sırasıyla; positions=True ise (konum, değer) çiftleri).
+        Öğrenilen yol kümelerinin hiçbiri bu dosyada eksiksiz ve aynı türlerle çözülmüyorsa None (miss).
+        """
+        if not isinstance(obj, dict):
+            return None
+        for layout in self.layouts:
+            out = self._resolve(obj, layout, positions)
+            if out is not None:
+                return out
+        return None
+
+    def record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return f"layouts={len(self.layouts)} hit={self.hits} miss={self.misses} (%{rate:.1f})"
@@ -0,0 +1,216 @@
+"""
+Özellik tabloları için group_id'ye göre Hive bölümlü parquet veri seti.
+
+Dizin yapısı:
+  <root>/_common_metadata             -> tam şema (kolon sırası, group_id dahil)
+  <root>/group_id=G1/part-0.parquet   -> G1 satırları, sort_cols sırasıyla (group_id kolonu dizinde)
+
+- Satır grupları hücre sınırlarında kesilir ve her biri cell_id min/max istatistiği taşır;
+  cell filtresi dosya içinde ilgisiz satır gruplarını atlar.
+- read_features hem tek dosyayı hem veri setini okur; group/cell filtreleri ve kolon seçimi
+  pyarrow'a aktarılır, yalnızca ilgili bölüm ve satır grupları diskten okunur
+  (read_table aynı okumayı pandas'a çevirmeden pyarrow.Table olarak döndürür).
+- iter_batches aynı filtre/kolon aktarımıyla RecordBatch akışı verir (out-of-core eğitim).
+- groups verilerek sadece değişen bölümler yeniden yazılabilir (artımlı güncelleme).
+- asof_join: iki anahtarlı tabloyu sıralı bileşik anahtar + np.searchsorted ile geriye dönük
+  (as-of) birleştirir; pandas merge'ün ara kartezyen/hash tablosu kurulmaz.
+"""
+import os, shutil
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+PARTITION_COL = "group_id"
+ROW_GROUP_ROWS = 8192
+COMMON_METADATA = "_common_metadata"
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    # Açık şema: "1" gibi grup adları tamsayıya çıkarılmasın
+    return ds.partitioning(pa.schema([(PARTITION_COL, pa.string())]), flavor="hive")
+
+def _cell_aligned_bounds(cells, target_rows):
+    """Sıralı cell_id dizisini, hücre bölünmeden ~target_rows'luk [lo, hi) parçalara ayırır."""
+    n = len(cells)
+    if n == 0:
+        return []
+    change = [0] + [i for i in range(1, n) if cells[i] != cells[i - 1]] + [n]
+    bounds, lo = [], 0
+    for start in change[1:]:
+        if start - lo >= target_rows or start == n:
+            bounds.append((lo, start))
+            lo = start
+    return bounds
+
+def _write_partition(part, path, sort_cols, row_group_rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    part = part.sort_values(list(sort_cols), kind="stable").drop(columns=PARTITION_COL)
+    table = pa.Table.from_pandas(part, preserve_index=False)
+    if "cell_id" in part.columns:
+        bounds = _cell_aligned_bounds(part["cell_id"].tolist(), row_group_rows)
+    else:
+        bounds = [(lo, min(lo + row_group_rows, len(part))) for lo in range(0, len(part), row_group_rows)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with pq.ParquetWriter(tmp, table.schema) as writer:
+        for lo, hi in bounds:
+            writer.write_table(table.slice(lo, hi - lo), row_group_size=hi - lo)
+    os.replace(tmp, path)
+
+def write_partitioned(df, root, sort_cols=("cell_id", "week_idx"), groups=None, row_group_rows=ROW_GROUP_ROWS):
+    """
+    df'yi root altına group_id bölümlü yazar.
+    groups=None: tüm bölümler yazılır, df'de olmayan eski bölümler silinir.
+    groups verilirse sadece o bölümler yeniden yazılır (df'de satırı kalmayanlar silinir).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    parts = dict(tuple(df.groupby(PARTITION_COL, sort=True)))
+    existing = {p.name.split("=", 1)[1]: p for p in root.glob(f"{PARTITION_COL}=*") if p.is_dir()}
+
+    targets = set(parts) | set(existing) if groups is None else set(groups)
+    for g in sorted(targets):
+        part_dir = root / f"{PARTITION_COL}={g}"
+        if g in parts:
+            _write_partition(parts[g], part_dir / "part-0.parquet", sort_cols, row_group_rows)
+        elif part_dir.exists():
+            shutil.rmtree(part_dir)
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    pq.write_metadata(schema, root / COMMON_METADATA)
+    return root
+
+def schema_names(path):
+    """Tek dosyanın ya da bölümlü veri setinin (_common_metadata) kolon adları; veri okunmaz."""
+    import pyarrow.parquet as pq
+    path = Path(path)
+    return pq.read_schema(path / COMMON_METADATA if path.is_dir() else path).names
+
+def read_table(path, groups=None, cells=None, columns=None):
+    """
+    read_features'ın pyarrow.Table döndüren hali (pandas'a çevirmeden; CellSeriesStore kopyasız okur).
+    Bölümlü veri setinde satırlar dizin (group_id) sırasıyla gelir.
+    """
+    import pyarrow.parquet as pq
+    path = Path(path)
+    filters = []
+    if groups is not None:
+        filters.append((PARTITION_COL, "in", list(groups)))
+    if cells is not None:
+        filters.append(("cell_id", "in", list(cells)))
+
+    if not path.is_dir():
+        return pq.read_table(path, columns=columns, filters=filters or None)
+
+    names = schema_names(path)
+    if columns is not None:
+        missing = set(columns) - set(names)
+        if missing:
+            raise ValueError(f"{path} içinde olmayan kolonlar: {sorted(missing)}")
+        names = list(columns)
+    return pq.read_table(path, columns=names, filters=filters or None, partitioning=_partitioning()).select(names)
+
+def _dataset(path):
+    import pyarrow.dataset as ds
+    path = Path(path)
+    if path.is_dir():
+        # _common_metadata "_" önekli olduğundan veri dosyası sayılmaz
+        return ds.dataset(path, format="parquet", partitioning=_partitioning())
+    return ds.dataset(path, format="parquet")
+
+def _dataset_filter(groups=None, cells=None):
+    import pyarrow.dataset as ds
+    expr = None
+    for col, values in ((PARTITION_COL, groups), ("cell_id", cells)):
+        if values is not None:
+            cond = ds.field(col).isin(list(values))
+            expr = cond if expr is None else expr & cond
+    return expr
+
+def iter_batches(path, batch_size=65536, groups=None, cells=None, columns=None):
+    """
+    Tek dosyayı ya da bölümlü veri setini pyarrow.RecordBatch'ler halinde okur (tüm tablo bellekte olmaz).
+    Filtreler ve kolon seçimi read_table'daki gibi aktarılır; bölümlü veri setinde satırlar dizin sırasıyla gelir.
+    """
+    dataset = _dataset(path)
+    if columns is not None:
+        missing = set(columns) - set(dataset.schema.names)
+        if missing:
+            raise ValueError(f"{path} içinde olmayan kolonlar: {sorted(missing)}")
+    yield from dataset.to_batches(columns=columns, filter=_dataset_filter(groups, cells),
+                                  batch_size=batch_size)
+
+def count_rows(path, groups=None, cells=None):
+    """iter_batches'in vereceği toplam satır sayısı (filtresiz tek dosyada sadece metadata okunur)."""
+    return _dataset(path).count_rows(filter=_dataset_filter(groups, cells))
+
+def read_features(path, groups=None, cells=None, columns=None):
+    """
+    Tek parquet dosyasını ya da write_partitioned veri setini okur.
+    groups/cells: group_id / cell_id listesi (None = filtre yok); columns: okunacak kolonlar.
+    Dönen çerçevenin kolon sırası ve group_id tipi tek dosya okumasıyla aynıdır.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        filters = []
+        if groups is not None:
+            filters.append((PARTITION_COL, "in", list(groups)))
+        if cells is not None:
+            filters.append(("cell_id", "in", list(cells)))
+        return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+    table = read_table(path, groups=groups, cells=cells, columns=columns)
+    df = table.to_pandas()
+    if PARTITION_COL in df.columns:
+        # Bölümler dizin sırasıyla gelir; tek dosyadaki gibi group_id sırasına getirilir
+        df[PARTITION_COL] = df[PARTITION_COL].astype(str)
+        df = df.sort_values(PARTITION_COL, kind="stable").reset_index(drop=True)
+    return df
+
+def asof_join(left, right, by, on, columns, tolerance=None, matched_col=None):
+    """
+    left'in her satırına, aynı `by` anahtarına sahip ve right[on] <= left[on] olan en son
+    right satırının `columns` kolonlarını ekler (varsa üzerine yazar); eşleşme yoksa NaN.
+    tolerance: left[on] - right[on] için üst sınır. Aynı (by, on) için birden çok right satırı
+    varsa sonuncusu kullanılır. matched_col verilirse eşleşen right[on] değeri de eklenir.
+
+    by anahtarları iki tabloda birlikte kodlanır, on değerleri yoğun sıraya çevrilir ve
+    kod * n_sıra + sıra bileşik int64 anahtarı üzerinde tek bir searchsorted yapılır:
+    O((n + m) log m) zaman, O(n + m) bellek; left satır sırası korunur.
+    """
+    out = left.copy()
+    right = right[right[on].notna()]
+    new_cols = list(columns) + ([matched_col] if matched_col is not None else [])
+    if len(right) == 0:
+        for col in new_cols:
+            out[col] = np.nan
+        return out
+
+    n_left = len(left)
+    keys = pd.concat([left[by], right[by]], ignore_index=True)
+    codes = keys.groupby(by, sort=False, dropna=False).ngroup().to_numpy(np.int64)
+    l_code, r_code = codes[:n_left], codes[n_left:]
+
+    l_on = left[on].to_numpy(dtype=float)
+    r_on = right[on].to_numpy(dtype=float)
+    uniq, rank = np.unique(np.concatenate([l_on, r_on]), return_inverse=True)
+    rank = rank.astype(np.int64).ravel()
+    l_key = l_code * len(uniq) + rank[:n_left]
+    r_key = r_code * len(uniq) + rank[n_left:]
+
+    order = np.argsort(r_key, kind="stable")
+    pos = np.searchsorted(r_key[order], l_key, side="right") - 1
+    src = order[np.maximum(pos, 0)]
+    ok = (pos >= 0) & ~np.isnan(l_on) & (r_code[src] == l_code)
+    if tolerance is not None:
+        ok &= (l_on - r_on[src]) <= tolerance
+
+    for col in columns:
+        out[col] = np.where(ok, right[col].to_numpy(dtype=float)[src], np.nan)
+    if matched_col is not None:
+        out[matched_col] = np.where(ok, r_on[src], np.nan)
+    return out
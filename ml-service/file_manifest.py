@@ -0,0 +1,80 @@
+"""
+Artımlı (incremental) özellik üretimi için dosya manifest'i.
+- Her JSON dosyası path ile anahtarlanır; size, mtime ve içerik hash'i saklanır.
+- Dosyadan çıkarılan satır (kapasite, avgV_chg, ...) da manifest'te tutulur,
+  böylece tekrar çalıştırmada yalnızca yeni/değişen dosyalar ayrıştırılır.
+"""
+import hashlib, json, os
+from pathlib import Path
+
+def file_digest(path, chunk_size=1 << 20):
+    """Dosya içeriğinin blake2b hash'i (büyük dosyalar parça parça okunur)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class FileManifest:
+    """
+    path -> {"size", "mtime_ns", "digest", "row"} eşlemesi.
+    schema değişirse (ör. çıkarım kodu güncellendiğinde) eski kayıtlar yok sayılır.
+    """
+
+    def __init__(self, path, schema):
+        self.path = Path(path)
+        self.schema = schema
+        self.entries = {}
+        self.meta = {}
+        self._pending = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                print(f"[WARN] Manifest okunamadı, sıfırdan oluşturulacak: {self.path}")
+                data = {}
+            if data.get("schema") == schema:
+                self.entries = data.get("entries", {})
+                self.meta = data.get("meta", {})
+
+    def lookup(self, f):
+        """
+        (hit, row) döndürür. size+mtime aynıysa hash hesaplanmaz; sadece mtime
+        değişmişse içerik hash'i karşılaştırılır (touch edilen dosyalar yeniden ayrıştırılmaz).
+        """
+        key = str(f)
+        st = os.stat(f)
+        e = self.entries.get(key)
+        if e is not None and e["size"] == st.st_size and e["mtime_ns"] == st.st_mtime_ns:
+            return True, e["row"]
+
+        digest = file_digest(f)
+        if e is not None and e["size"] == st.st_size and e["digest"] == digest:
+            e["mtime_ns"] = st.st_mtime_ns
+            return True, e["row"]
+
+        self._pending[key] = (st.st_size, st.st_mtime_ns, digest)
+        return False, None
+
+    def update(self, f, row):
+        key = str(f)
+        if key in self._pending:
+            size, mtime_ns, digest = self._pending.pop(key)
+        else:
+            st = os.stat(f)
+            size, mtime_ns, digest = st.st_size, st.st_mtime_ns, file_digest(f)
+        self.entries[key] = {"size": size, "mtime_ns": mtime_ns, "digest": digest, "row": row}
+
+    def prune(self, keep_paths):
+        """Artık listede olmayan dosyaların kayıtlarını siler; silinenleri {path: row} olarak döndürür."""
+        keep = {str(p) for p in keep_paths}
+        removed = {k: e["row"] for k, e in self.entries.items() if k not in keep}
+        for k in removed:
+            del self.entries[k]
+        return removed
+
+    def save(self):
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        data = {"schema": self.schema, "meta": self.meta, "entries": self.entries}
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.path)
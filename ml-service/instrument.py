@@ -0,0 +1,279 @@
+"""
+Pipeline için hafif ölçüm katmanı: aşama zamanlayıcıları, sayaçlar ve tepe RSS örneklemesi.
+
+Kullanım:
+    with instrument.profiled("profile_prepare_rpt.json", "prepare_rpt"):
+        main(args)
+
+    with instrument.stage("json_decode", items=1, nbytes=len(raw)):
+        ...
+    instrument.count("files_failed")
+
+- Profil etkin değilken stage() paylaşılan boş bir bağlam döndürür (dosya başına ~1 µs).
+- Aşamalar iç içe olabilir; her aşamanın süresi kendi içindekileri de kapsar.
+- Süreç havuzundaki işçilerde aşamalar collect() ile toplanır, sonuçla birlikte döndürülür ve
+  ana süreçte merge() ile (record()/count() üzerinden) profile eklenir.
+- Çıktı tek bir JSON: aşama başına çağrı, toplam/ortalama/maks süre, öğe/s ve MB/s,
+  sayaçlar ve tepe RSS.
+"""
+import json, os, sys, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+_profiler = None
+
+def _rss_bytes():
+    """Anlık RSS; /proc yoksa psutil, o da yoksa None."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+def _max_rss_bytes():
+    """İşletim sisteminin tuttuğu süreç ömrü boyunca tepe RSS (varsa)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class _Stage:
+    __slots__ = ("prof", "name", "items", "nbytes", "t0")
+
+    def __init__(self, prof, name, items, nbytes):
+        self.prof, self.name, self.items, self.nbytes = prof, name, items, nbytes
+
+    def add(self, items=0, nbytes=0):
+        self.items += items
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.record(self.name, time.perf_counter() - self.t0, self.items, self.nbytes)
+        return False
+
+class _NullStage:
+    __slots__ = ()
+
+    def add(self, items=0, nbytes=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Collector:
+    """İşçi süreçte aşama/sayaç kayıtlarını biriktirir (RSS örneklemez); export() pickle edilebilir."""
+
+    def __init__(self):
+        self.stages = []
+        self.counters = {}
+
+    def record(self, name, seconds, items=0, nbytes=0):
+        self.stages.append((name, seconds, items, nbytes))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def export(self):
+        return {"stages": self.stages, "counters": self.counters}
+
+class Profiler:
+    """Bir çalıştırmanın aşama/sayaç kayıtları; arka planda RSS örnekler."""
+
+    def __init__(self, name, sample_interval=0.05):
+        self.name = name
+        self.started_utc = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._peak_rss = _rss_bytes() or 0
+        self._stop = threading.Event()
+        self._sampler = None
+        if sample_interval and _rss_bytes() is not None:
+            self._sampler = threading.Thread(target=self._sample, args=(sample_interval,), daemon=True)
+            self._sampler.start()
+
+    def _sample(self, interval):
+        while not self._stop.wait(interval):
+            rss = _rss_bytes()
+            if rss and rss > self._peak_rss:
+                self._peak_rss = rss
+
+    def record(self, name, seconds, items=0, nbytes=0):
+        with self._lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "items": 0, "bytes": 0}
+            s["calls"] += 1
+            s["total_s"] += seconds
+            s["max_s"] = max(s["max_s"], seconds)
+            s["items"] += items
+            s["bytes"] += nbytes
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=1.0)
+
+    def report(self):
+        wall = time.perf_counter() - self.t0
+        rss_now = _rss_bytes() or 0
+        peak = max(self._peak_rss, rss_now, _max_rss_bytes() or 0)
+        stages = {}
+        for name, s in self.stages.items():
+            t = s["total_s"]
+            stages[name] = {
+                "calls": s["calls"],
+                "total_s": round(t, 6),
+                "mean_ms": round(1000.0 * t / s["calls"], 4),
+                "max_ms": round(1000.0 * s["max_s"], 4),
+                "share_of_wall": round(t / wall, 4) if wall > 0 else None,
+                "items": s["items"],
+                "bytes": s["bytes"],
+                "items_per_s": round(s["items"] / t, 2) if t > 0 and s["items"] else None,
+                "mb_per_s": round(s["bytes"] / 1e6 / t, 2) if t > 0 and s["bytes"] else None,
+            }
+        return {
+            "run": self.name,
+            "started_utc": self.started_utc,
+            "wall_s": round(wall, 6),
+            "pid": os.getpid(),
+            "argv": sys.argv,
+            "peak_rss_mb": round(peak / 1e6, 1),
+            "end_rss_mb": round(rss_now / 1e6, 1),
+            "stages": stages,
+            "counters": dict(self.counters),
+        }
+
+    def print_summary(self, rep=None):
+        rep = rep or self.report()
+        print(f"\n[PROFILE] {rep['run']} | wall={rep['wall_s']:.2f}s | peak RSS={rep['peak_rss_mb']:.0f} MB")
+        for name, s in sorted(rep["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            extra = ""
+            if s["items_per_s"]:
+                extra += f" | {s['items_per_s']:.1f} öğe/s"
+            if s["mb_per_s"]:
+                extra += f" | {s['mb_per_s']:.1f} MB/s"
+            print(f"  {name:<22} {s['total_s']:9.3f}s  x{s['calls']:<7} (%{100 * (s['share_of_wall'] or 0):.1f}){extra}")
+        for name, n in sorted(rep["counters"].items()):
+            print(f"  # {name:<20} {n}")
+
+# --- modül seviyesi API (etkin profil yoksa hepsi no-op) ---
+
+def enable(name, sample_interval=0.05):
+    global _profiler
+    _profiler = Profiler(name, sample_interval)
+    return _profiler
+
+def disable():
+    global _profiler
+    prof, _profiler = _profiler, None
+    if prof is not None:
+        prof.stop()
+    return prof
+
+def enabled():
+    return _profiler is not None
+
+def stage(name, items=0, nbytes=0):
+    prof = _profiler
+    if prof is None:
+        return _NULL_STAGE
+    return _Stage(prof, name, items, nbytes)
+
+def record(name, seconds, items=0, nbytes=0):
+    if _profiler is not None:
+        _profiler.record(name, seconds, items, nbytes)
+
+def count(name, n=1):
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+class collect:
+    """
+    İşçi görevinde kullanılır: blok içindeki stage()/count() kayıtlarını toplar (forkla kopyalanan
+    ebeveyn profili yerine). Çıkışta önceki durum geri yüklenir; kayıtlar export() ile alınır.
+    """
+
+    def __init__(self):
+        self.collector = _Collector()
+        self._prev = None
+
+    def __enter__(self):
+        global _profiler
+        self._prev, _profiler = _profiler, self.collector
+        return self.collector
+
+    def __exit__(self, *exc):
+        global _profiler
+        _profiler = self._prev
+        return False
+
+def merge(exported):
+    """collect() ile işçide toplanan kayıtları etkin profile ekler."""
+    if not exported:
+        return
+    for name, seconds, items, nbytes in exported["stages"]:
+        record(name, seconds, items, nbytes)
+    for name, n in exported["counters"].items():
+        count(name, n)
+
+class profiled:
+    """
+    path verilirse (None değilse) çalıştırmayı profiller; çıkışta özeti yazdırır ve JSON'u kaydeder.
+    Hata durumunda da rapor yazılır (exception yeniden fırlatılır).
+    """
+
+    def __init__(self, path, name):
+        self.path = path
+        self.name = name
+        self.prof = None
+
+    def __enter__(self):
+        if self.path:
+            self.prof = enable(self.name)
+        return self.prof
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.prof is None:
+            return False
+        disable()
+        rep = self.prof.report()
+        if exc_type is not None:
+            rep["error"] = f"{exc_type.__name__}: {exc}"
+        self.prof.print_summary(rep)
+        out = Path(self.path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(out.suffix + ".tmp")
+        tmp.write_text(json.dumps(rep, indent=2), encoding="utf-8")
+        os.replace(tmp, out)
+        print(f"[OK] profil -> {out}")
+        return False
+
+def add_profile_arg(parser, name):
+    """--profile [yol]: yol verilmezse profile_<name>.json."""
+    parser.add_argument("--profile", nargs="?", const=f"profile_{name}.json", default=None,
+                        help="Aşama sürelerini, sayaçları ve tepe RSS'i JSON olarak yaz")
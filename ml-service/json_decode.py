@@ -0,0 +1,120 @@
+"""
+RPT/cycle JSON dosyaları için çözme (decode) katmanı.
+- Dosya bir kez bayt olarak okunur; BOM (UTF-8/16/32) ve çift kodlanmış JSON (kök bir string)
+  baytlar/ilk sonuç üzerinden sezilir, dosya yeniden okunmaz.
+- Hızlı backend kuruluysa kullanılır: orjson > simdjson (pysimdjson) > stdlib json.
+  BATTERY_JSON_BACKEND=orjson|simdjson|json ile zorlanabilir.
+- Hızlı backend'in reddettiği dosyalar (NaN/Infinity literalleri, 64 bitten büyük tamsayılar)
+  stdlib json ile, geçersiz UTF-8 içerenler latin-1 olarak yeniden çözülür (eski davranışla aynı).
+- arrays=True: dict değeri olan, en az min_array_len elemanlı düz sayısal listeler float64
+  ndarray'e çevrilir; tarayıcılar bu dizileri eleman eleman dolaşmadan doğrudan ortalar.
+"""
+import codecs, json, os
+import numpy as np
+import instrument
+
+try:
+    import orjson
+except ImportError:  # opsiyonel bağımlılık
+    orjson = None
+try:
+    import simdjson
+except ImportError:  # opsiyonel bağımlılık
+    simdjson = None
+
+MIN_ARRAY_LEN = 16
+
+# Tarayıcıların "dizi" kabul ettiği tipler (arrays=True ile listeler ndarray olabilir)
+ARRAY_TYPES = (list, np.ndarray)
+
+# UTF-32 LE BOM'u UTF-16 LE BOM'uyla başladığından önce denenir
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, None),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+_BACKENDS = {}
+if orjson is not None:
+    _BACKENDS["orjson"] = orjson.loads
+if simdjson is not None:
+    _BACKENDS["simdjson"] = simdjson.loads
+_BACKENDS["json"] = json.loads
+
+def available_backends():
+    return list(_BACKENDS)
+
+def backend():
+    """Kullanılacak backend adı (ortam değişkeni geçersizse en hızlı kurulu olan)."""
+    name = os.environ.get("BATTERY_JSON_BACKEND")
+    return name if name in _BACKENDS else next(iter(_BACKENDS))
+
+def _strip_bom(raw):
+    """BOM'u atar; UTF-8 (ya da BOM'suz) ise bayt, UTF-16/32 ise çözülmüş str döndürür."""
+    for bom, codec in _BOMS:
+        if raw.startswith(bom):
+            body = raw[len(bom):]
+            return body if codec is None else body.decode(codec)
+    return raw
+
+def _loads(data, loads):
+    try:
+        return loads(data)
+    except ValueError:
+        if loads is json.loads:
+            raise
+    # Hızlı backend'in desteklemediği ama stdlib'in kabul ettiği girdiler (NaN, büyük tamsayı)
+    return json.loads(data)
+
+def to_arrays(obj, min_len=MIN_ARRAY_LEN):
+    """
+    dict değeri olan düz sayısal listeleri (yerinde) float64 ndarray'e çevirir.
+    Liste içindeki listelere dokunulmaz: iç içe listelerin eleman semantiği tarayıcılarda aynı kalır.
+    """
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if isinstance(v, list):
+                if len(v) >= min_len and isinstance(v[0], (int, float)):
+                    try:
+                        arr = np.array(v)
+                    except ValueError:          # sayıyla başlayıp iç içe liste içeren (düzensiz) dizi
+                        arr = None
+                    if arr is not None and arr.ndim == 1 and arr.dtype.kind in "fib":
+                        obj[k] = arr.astype(np.float64, copy=False)
+                        continue
+                to_arrays(v, min_len)
+            elif isinstance(v, dict):
+                to_arrays(v, min_len)
+    elif isinstance(obj, list):
+        for it in obj:
+            if isinstance(it, (dict, list)):
+                to_arrays(it, min_len)
+    return obj
+
+def decode_bytes(raw, arrays=False, min_array_len=MIN_ARRAY_LEN):
+    """Bayt içeriğini çözer; çözülemezse ValueError."""
+    loads = _BACKENDS[backend()]
+    data = _strip_bom(raw)
+    try:
+        obj = _loads(data, loads)
+    except ValueError:
+        if not isinstance(data, bytes):
+            raise
+        obj = json.loads(data.decode("latin-1"))
+    if isinstance(obj, str):
+        # Çift kodlanmış JSON: dış katman zaten çözüldü, içerik bir kez daha çözülür
+        obj = _loads(obj, loads)
+    if arrays:
+        to_arrays(obj, min_array_len)
+    return obj
+
+def read_json(path, arrays=False, min_array_len=MIN_ARRAY_LEN):
+    """Dosyayı tek seferde okuyup çözer; okunamazsa OSError, çözülemezse ValueError."""
+    with instrument.stage("file_read") as st:
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        st.add(items=1, nbytes=len(raw))
+    with instrument.stage("json_decode", nbytes=len(raw)):
+        return decode_bytes(raw, arrays=arrays, min_array_len=min_array_len)
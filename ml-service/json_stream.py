@@ -0,0 +1,248 @@
+"""
+Büyük RPT/cycle JSON dosyaları için akış (streaming) tabanlı özet çıkarımı.
+- ijson olay akışı (start_map, map_key, number, ...) üzerinden tek geçişte çalışır.
+- Sadece ilgilenilen anahtarların (CAP_KEYS, QV_charge/QV_discharge, V_charge, ...)
+  altındaki diziler işlenir; sayılar anında toplam/sayaç olarak indirgenir.
+- Ham metin, tam nesne ağacı ve uzatılmış Python listeleri hiç bellekte tutulmaz.
+Bellekteki tarayıcılarla (scan_for_capacity, scan_for_voltage, scan_cycle) aynı
+eşleşme kurallarını uygular.
+"""
+import re
+import numpy as np
+
+try:
+    import ijson
+except ImportError:  # opsiyonel bağımlılık
+    ijson = None
+
+_NUMERIC_STR = re.compile(r"^\d+(\.\d+)?$")
+_FIRST_NUMERIC = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+
+CAP_LIST_MAX_DEPTH = 3     # extract_capacity_from_list(max_depth=3)
+CAP_SCAN_MAX_DEPTH = 10    # scan_for_capacity(max_depth=10)
+
+class StreamFallback(Exception):
+    """Dosya akışla özetlenemiyor (ör. çift kodlanmış JSON string); bellekteki yola dönülmeli."""
+
+def available():
+    return ijson is not None
+
+class _Acc:
+    """Bir dizinin altındaki sayıların koşan toplamı/sayacı."""
+    __slots__ = ("kind", "total", "count", "n_items", "on_close")
+
+    def __init__(self, kind, on_close=None):
+        self.kind = kind          # "cap": extract_capacity_from_list, "mean": np.nanmean
+        self.total = 0.0
+        self.count = 0
+        self.n_items = 0          # kök dizinin doğrudan eleman sayısı
+        self.on_close = on_close
+
+    def add(self, v):
+        if isinstance(v, str):
+            if self.kind == "cap" and _NUMERIC_STR.match(v):
+                self.total += float(v)
+                self.count += 1
+            return
+        if v is None:
+            return
+        v = float(v)
+        if np.isfinite(v):
+            self.total += v
+            self.count += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+class _Frame:
+    __slots__ = ("is_map", "depth", "key", "collectors", "owned", "chg", "dchg")
+
+    def __init__(self, is_map, depth, collectors=()):
+        self.is_map = is_map
+        self.depth = depth
+        self.key = None
+        self.collectors = collectors   # [(acc, derinlik)] bu çerçevedeki skalerlere uygulanır
+        self.owned = []                # bu çerçeve kapanınca tamamlanacak akümülatörler
+        self.chg = np.nan
+        self.dchg = np.nan
+
+def _child_collectors(frame):
+    """Akümülatörler sadece dizi zinciri boyunca yayılır (flatten/nanmean dict'lere girmez)."""
+    out = []
+    for acc, d in frame.collectors:
+        if acc.kind == "cap" and d + 1 > CAP_LIST_MAX_DEPTH:
+            continue
+        out.append((acc, d + 1))
+    return out
+
+def _count_item(list_frame):
+    """Kök dizinin doğrudan eleman sayısı (scan_for_voltage'daki boş liste kontrolü için)."""
+    for acc in list_frame.owned:
+        acc.n_items += 1
+
+def _first_numeric(v):
+    if isinstance(v, bool) or isinstance(v, (int, float)):
+        v = float(v)
+        return v if np.isfinite(v) else np.nan
+    if isinstance(v, str):
+        m = _FIRST_NUMERIC.search(v)
+        if m:
+            return float(m.group(0))
+    return np.nan
+
+def _events(path):
+    if ijson is None:
+        raise StreamFallback("ijson kurulu değil")
+    with open(path, "rb") as fh:
+        yield from ijson.parse(fh, use_float=True)
+
+def stream_rpt_summary(path, cap_keys):
+    """
+    RPT dosyasından (kapasite, avgV_chg, avgV_dchg) değerlerini akışla çıkarır.
+    pick_capacity + scan_for_voltage (kök dict) veya extract_capacity_from_list (kök liste) ile eşdeğer.
+    """
+    cap_keys = set(cap_keys)
+    cap_values = []       # her eşleşmeden bir değer (pick_capacity ortalaması için)
+    stack = []
+    root = None
+    top_acc = None
+
+    def begin_value(frame, value, is_container, is_map):
+        """Bir değer (skaler ya da konteyner) başlıyor; eşleşmeleri belirle."""
+        key = frame.key if (frame is not None and frame.is_map) else None
+        actions = []
+        if key is not None:
+            if key in cap_keys and frame.depth <= CAP_SCAN_MAX_DEPTH:
+                if not is_container:
+                    if isinstance(value, (bool, int, float)):
+                        cap_values.append(float(value))
+                    else:
+                        c = _first_numeric(value)
+                        if np.isfinite(c):
+                            cap_values.append(c)
+                elif not is_map:
+                    actions.append(("cap", None))
+            if is_container and not is_map:
+                if "QV_discharge" in key:
+                    actions.append(("mean", "dchg"))
+                if "QV_charge" in key:
+                    actions.append(("mean", "chg"))
+        return actions
+
+    def push(is_map, actions):
+        parent = stack[-1] if stack else None
+        depth = parent.depth + 1 if parent is not None else 0
+        collectors = _child_collectors(parent) if (parent is not None and not is_map and not parent.is_map) else []
+        frame = _Frame(is_map, depth, collectors)
+        if parent is not None and not parent.is_map:
+            _count_item(parent)
+        for kind, target in actions:
+            acc = _Acc(kind, on_close=target)
+            frame.collectors = [(acc, 1)] + frame.collectors
+            frame.owned.append(acc)
+        stack.append(frame)
+        return frame
+
+    for prefix, event, value in _events(path):
+        if event == "map_key":
+            stack[-1].key = value
+            continue
+
+        if event in ("start_map", "start_array"):
+            is_map = event == "start_map"
+            parent = stack[-1] if stack else None
+            if parent is None and not is_map:
+                # Kök liste: extract_capacity_from_list(j)
+                top_acc = _Acc("cap")
+                frame = _Frame(False, 0, [(top_acc, 1)])
+                stack.append(frame)
+                continue
+            actions = begin_value(parent, None, True, is_map) if parent is not None else []
+            frame = push(is_map, actions)
+            if root is None:
+                root = frame
+            continue
+
+        if event in ("end_map", "end_array"):
+            frame = stack.pop()
+            parent = stack[-1] if stack else None
+            for acc in frame.owned:
+                if acc.kind == "cap":
+                    c = acc.mean()
+                    if np.isfinite(c):
+                        cap_values.append(c)
+                elif parent is not None and acc.n_items:
+                    # scan_for_voltage: eşleşen anahtar değeri doğrudan atanır (NaN olsa bile)
+                    setattr(parent, acc.on_close, acc.mean())
+            if parent is not None:
+                # Alt yapıdan gelen sonlu değerler üstteki değerleri ezer
+                if np.isfinite(frame.chg):
+                    parent.chg = frame.chg
+                if np.isfinite(frame.dchg):
+                    parent.dchg = frame.dchg
+            continue
+
+        # Skaler değer
+        if not stack:
+            if event == "string":
+                raise StreamFallback("kök değer string (çift kodlanmış JSON)")
+            return np.nan, np.nan, np.nan
+        frame = stack[-1]
+        if frame.is_map:
+            begin_value(frame, value, False, False)
+        else:
+            _count_item(frame)
+            for acc, _ in frame.collectors:
+                acc.add(value)
+
+    if top_acc is not None:
+        return top_acc.mean(), np.nan, np.nan
+    if root is None:
+        return np.nan, np.nan, np.nan
+    cap = float(np.mean(cap_values)) if cap_values else np.nan
+    return cap, root.chg, root.dchg
+
+def stream_cycle_sums(path, keys):
+    """
+    Cycle dosyasında, adında keys[i] geçen anahtarların dizi değerlerinin
+    (toplam, sayı) çiftlerini döndürür; scan_cycle + _safe_mean ile eşdeğer ortalamalar verir.
+    """
+    accs = [_Acc("mean") for _ in keys]
+    stack = []
+    saw_container = False
+
+    for prefix, event, value in _events(path):
+        if event == "map_key":
+            stack[-1].key = value
+            continue
+
+        if event in ("start_map", "start_array"):
+            saw_container = True
+            is_map = event == "start_map"
+            parent = stack[-1] if stack else None
+            collectors = []
+            if parent is not None:
+                if parent.is_map:
+                    if not is_map:
+                        collectors = [(accs[i], 1) for i, k in enumerate(keys) if k in parent.key]
+                else:
+                    collectors = _child_collectors(parent)
+            stack.append(_Frame(is_map, len(stack), collectors))
+            continue
+
+        if event in ("end_map", "end_array"):
+            stack.pop()
+            continue
+
+        if not stack:
+            if event == "string":
+                raise StreamFallback("kök değer string (çift kodlanmış JSON)")
+            continue
+        frame = stack[-1]
+        if not frame.is_map:
+            for acc, _ in frame.collectors:
+                acc.add(value)
+
+    if not saw_container:
+        return [(0.0, 0)] * len(keys)
+    return [(acc.total, acc.count) for acc in accs]
@@ -0,0 +1,193 @@
+"""
+Eğitilmiş SOH modelleri için sürümlü artefakt (kaydet / yükle).
+
+Dizin yapısı: <out_dir>/models/<ad>/v0001/
+  - manifest.json : sürüm, model sınıfı, feature_cols, eğitim verisi parmak izi, metrikler
+  - model.joblib  : sıkıştırılmamış joblib dökümü (tam sklearn nesnesi)
+  - forest/*.npy  : (sadece ağaç toplulukları) tüm ağaçların düğüm dizileri uç uca eklenmiş halde
+<out_dir>/models/<ad>/latest dosyası en son sürümün adını tutar.
+
+Neden forest/*.npy: sklearn Tree.__setstate__ düğüm dizilerini kendi belleğine kopyalar, bu yüzden
+joblib.load(mmap_mode="r") RandomForest için paylaşılan bellek sağlamaz. Düz diziler np.load ile
+memmap açılır; aynı artefaktı yükleyen tüm süreçler ormanın tek kopyasını (page cache) paylaşır.
+"""
+import json, os, shutil
+from datetime import datetime, timezone
+from hashlib import blake2b
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+ARTIFACT_VERSION = 1
+FOREST_ARRAYS = ("left", "right", "feature", "threshold", "value", "missing_left", "roots")
+
+class DataFingerprint:
+    """Parça parça beslenebilen içerik parmak izi; parçaların birleşimi tek seferlik hash ile aynıdır."""
+
+    def __init__(self, cols):
+        self.cols = list(cols)
+        self._h = blake2b(digest_size=16)
+        self._h.update(json.dumps(self.cols).encode("utf-8"))
+        self.n_rows = 0
+
+    def update(self, df):
+        self._h.update(pd.util.hash_pandas_object(df[self.cols], index=False).to_numpy().tobytes())
+        self.n_rows += len(df)
+
+    def result(self):
+        return {"blake2b": self._h.hexdigest(), "n_rows": int(self.n_rows)}
+
+def data_fingerprint(df, cols):
+    """Eğitim verisinin içerik parmak izi (satır sırasına duyarlı)."""
+    fp = DataFingerprint(cols)
+    fp.update(df)
+    return fp.result()
+
+def flatten_forest(model):
+    """
+    Ağaç topluluğunu uç uca eklenmiş düğüm dizilerine çevirir. Yapraklar kendine döner
+    (threshold=+inf), böylece tahminde maskesiz, sabit max_depth adımlık gezinme yapılır.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    if any(t.n_outputs != 1 for t in trees):
+        raise ValueError("Sadece tek çıktılı regresyon ormanları destekleniyor")
+    sizes = np.array([t.node_count for t in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+    left, right, feature, threshold, value, missing_left = [], [], [], [], [], []
+    for t, base in zip(trees, roots):
+        idx = np.arange(t.node_count, dtype=np.int64) + base
+        leaf = t.children_left == -1
+        left.append(np.where(leaf, idx, t.children_left + base))
+        right.append(np.where(leaf, idx, t.children_right + base))
+        feature.append(np.where(leaf, 0, t.feature).astype(np.int32))
+        threshold.append(np.where(leaf, np.inf, t.threshold))
+        value.append(t.value[:, 0, 0].astype(np.float64))
+        ml = getattr(t, "missing_go_to_left", None)
+        missing_left.append(np.zeros(t.node_count, bool) if ml is None else np.asarray(ml, bool))
+
+    arrays = {
+        "left": np.concatenate(left), "right": np.concatenate(right),
+        "feature": np.concatenate(feature), "threshold": np.concatenate(threshold),
+        "value": np.concatenate(value), "missing_left": np.concatenate(missing_left),
+        "roots": roots,
+    }
+    max_depth = int(max(t.max_depth for t in trees))
+    return arrays, max_depth
+
+class FlatForestRegressor:
+    """
+    flatten_forest dizileri üzerinde RandomForestRegressor.predict karşılığı.
+    Diziler memmap olabilir; tüm örnekler x tüm ağaçlar aynı anda bir seviye ilerler.
+    """
+
+    def __init__(self, arrays, max_depth, n_features):
+        for name in FOREST_ARRAYS:
+            setattr(self, name, arrays[name])
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    def predict(self, X):
+        # sklearn ağaçları özellikleri float32'ye çevirip float64 eşikle karşılaştırır
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X {self.n_features_in_} sütunlu olmalı, gelen: {X.shape}")
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes].mean(axis=1)
+
+def _next_version(model_dir):
+    existing = [int(p.name[1:]) for p in model_dir.glob("v[0-9]*") if p.name[1:].isdigit()]
+    return f"v{max(existing, default=0) + 1:04d}"
+
+def save_artifact(out_dir, name, model, feature_cols, fingerprint, metrics=None, params=None):
+    """Modeli <out_dir>/models/<name>/vNNNN altına yazar ve latest'i günceller; sürüm dizinini döndürür."""
+    import joblib
+    model_dir = Path(out_dir) / "models" / name
+    model_dir.mkdir(parents=True, exist_ok=True)
+    version = _next_version(model_dir)
+    tmp = model_dir / f".{version}.tmp"
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir()
+
+    # Sıkıştırma yok: joblib ancak sıkıştırılmamış dizileri memmap edebilir
+    joblib.dump(model, tmp / "model.joblib", compress=0)
+    fmt = "joblib"
+    max_depth = None
+    if hasattr(model, "estimators_") and hasattr(model.estimators_[0], "tree_"):
+        arrays, max_depth = flatten_forest(model)
+        (tmp / "forest").mkdir()
+        for k, v in arrays.items():
+            np.save(tmp / "forest" / f"{k}.npy", v)
+        fmt = "flat_forest"
+
+    manifest = {
+        "artifact_version": ARTIFACT_VERSION,
+        "name": name,
+        "version": version,
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model_class": type(model).__name__,
+        "format": fmt,
+        "max_depth": max_depth,
+        "feature_cols": list(feature_cols),
+        "data_fingerprint": fingerprint,
+        "metrics": metrics,
+        "params": params if params is not None else _json_params(model),
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    final = model_dir / version
+    os.replace(tmp, final)
+
+    latest_tmp = model_dir / "latest.tmp"
+    latest_tmp.write_text(version, encoding="utf-8")
+    os.replace(latest_tmp, model_dir / "latest")
+    return final
+
+def _json_params(model):
+    if not hasattr(model, "get_params"):
+        return None
+    return {k: v for k, v in model.get_params().items()
+            if isinstance(v, (int, float, str, bool, type(None)))}
+
+def resolve_artifact(path):
+    """Sürüm dizini, model dizini (latest) veya manifest.json yolundan sürüm dizinini bulur."""
+    path = Path(path)
+    if path.name == "manifest.json":
+        return path.parent
+    if (path / "manifest.json").exists():
+        return path
+    if (path / "latest").exists():
+        return path / (path / "latest").read_text(encoding="utf-8").strip()
+    raise FileNotFoundError(f"Model artefaktı bulunamadı: {path}")
+
+def is_artifact(path):
+    path = Path(path)
+    return path.name == "manifest.json" or (path.is_dir() and
+                                            ((path / "manifest.json").exists() or (path / "latest").exists()))
+
+def load_artifact(path, mmap_mode="r"):
+    """
+    (model, manifest) döndürür. mmap_mode verildiğinde ağaç toplulukları FlatForestRegressor
+    olarak memmap'li dizilerden açılır; diğer modeller joblib.load(mmap_mode=...) ile yüklenir.
+    """
+    import joblib
+    root = resolve_artifact(path)
+    manifest = json.loads((root / "manifest.json").read_text(encoding="utf-8"))
+    if manifest.get("artifact_version") != ARTIFACT_VERSION:
+        raise ValueError(f"Desteklenmeyen artefakt sürümü: {manifest.get('artifact_version')}")
+
+    if manifest["format"] == "flat_forest" and mmap_mode is not None:
+        arrays = {k: np.load(root / "forest" / f"{k}.npy", mmap_mode=mmap_mode) for k in FOREST_ARRAYS}
+        model = FlatForestRegressor(arrays, manifest["max_depth"], len(manifest["feature_cols"]))
+    else:
+        model = joblib.load(root / "model.joblib", mmap_mode=mmap_mode)
+    return model, manifest
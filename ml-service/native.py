@@ -0,0 +1,233 @@
+"""
+core-engine C++ kütüphanelerine ctypes bağlantısı.
+- Kütüphaneler platforma göre adlandırılır (core_engine.dll / libcore_engine.so / .dylib) ve
+  core-engine/build altında (veya BATTERY_CORE_LIB_DIR ile verilen klasörde) aranır.
+- Her kütüphane ilk kullanımda bir kez yüklenir; fonksiyon imzaları burada tanımlanır.
+- NumPy dizileri kopyalanmadan işaretçi olarak geçirilir (float64/int64 ve C-contiguous ise).
+- Kütüphane bulunamazsa aynı sonucu veren NumPy uygulamasına dönülür.
+"""
+import ctypes, os, sys
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+
+CORE_BUILD_DIR = Path(__file__).resolve().parents[1] / "core-engine" / "build"
+INT32_MAX = 2**31 - 1
+
+_c_double_p = ctypes.POINTER(ctypes.c_double)
+_c_int64_p = ctypes.POINTER(ctypes.c_int64)
+
+def library_filename(name):
+    if sys.platform.startswith("win"):
+        return f"{name}.dll"
+    if sys.platform == "darwin":
+        return f"lib{name}.dylib"
+    return f"lib{name}.so"
+
+def library_path(name):
+    """Kütüphane dosyasını arar; bulunamazsa None."""
+    fname = library_filename(name)
+    dirs = [os.environ.get("BATTERY_CORE_LIB_DIR"), CORE_BUILD_DIR, CORE_BUILD_DIR / "Release"]
+    for d in dirs:
+        if d and (Path(d) / fname).exists():
+            return Path(d) / fname
+    return None
+
+def _declare(lib, name, argtypes, restype=None):
+    fn = getattr(lib, name)
+    fn.argtypes = argtypes
+    fn.restype = restype
+
+@lru_cache(maxsize=None)
+def load_library(name):
+    """Kütüphaneyi bir kez yükler ve imzalarını tanımlar; yoksa/yüklenemezse None."""
+    path = library_path(name)
+    if path is None:
+        return None
+    try:
+        lib = ctypes.CDLL(str(path))
+    except OSError as e:
+        print(f"[WARN] {path} yüklenemedi: {e}")
+        return None
+
+    if name == "core_engine":
+        _declare(lib, "compute_mean_std", [_c_double_p, ctypes.c_int, _c_double_p, _c_double_p])
+        _declare(lib, "compute_segment_stats", [_c_double_p, _c_int64_p, ctypes.c_int64] +
+                 [_c_double_p] * 4 + [_c_int64_p])
+    elif name == "kalman_soh":
+        _declare(lib, "kalman_create", [ctypes.c_double] * 4, ctypes.c_void_p)
+        _declare(lib, "kalman_destroy", [ctypes.c_void_p])
+        _declare(lib, "kalman_update", [ctypes.c_void_p, ctypes.c_double], ctypes.c_double)
+        _declare(lib, "kalman_batch", [ctypes.c_void_p, _c_double_p, ctypes.c_int, _c_double_p])
+        _declare(lib, "kalman_smooth", [ctypes.c_double] * 4 + [_c_double_p, ctypes.c_int, _c_double_p])
+        _declare(lib, "kalman_smooth_batch", [ctypes.c_double] * 3 +
+                 [_c_double_p, _c_int64_p, ctypes.c_int64, _c_double_p])
+    return lib
+
+def status():
+    """Hangi native kütüphanelerin yüklenebildiği (sağlık kontrolü için)."""
+    return {name: str(library_path(name)) if load_library(name) is not None else None
+            for name in ("core_engine", "kalman_soh")}
+
+def _as_f64(a):
+    """Zaten float64 ve C-contiguous ise kopyasız döner."""
+    return np.ascontiguousarray(a, dtype=np.float64)
+
+def _ptr(a, ptype=_c_double_p):
+    return a.ctypes.data_as(ptype)
+
+# --- mean / std ---------------------------------------------------------------
+
+def _mean_std_numpy(data):
+    if len(data) == 0:
+        return np.nan, np.nan
+    return float(np.mean(data)), float(np.std(data))
+
+def compute_mean_std(data):
+    """Dizinin ortalaması ve (popülasyon) standart sapması."""
+    data = _as_f64(data).ravel()
+    lib = load_library("core_engine")
+    if lib is None:
+        return _mean_std_numpy(data)
+    if len(data) > INT32_MAX:
+        # int uzunluklu eski imza yetmez: 64 bit segment çekirdeği (tek segment)
+        mean, std, _, _, count = segment_stats(data, [0, len(data)])
+        if count[0] != len(data):
+            return np.nan, np.nan
+        return float(mean[0]), float(std[0])
+    mean, std = ctypes.c_double(), ctypes.c_double()
+    lib.compute_mean_std(_ptr(data), len(data), ctypes.byref(mean), ctypes.byref(std))
+    return mean.value, std.value
+
+def _segment_stats_numpy(values, offsets):
+    n = len(offsets) - 1
+    mean, std, vmin, vmax = (np.full(n, np.nan) for _ in range(4))
+    count = np.zeros(n, dtype=np.int64)
+    lens = np.diff(offsets)
+    nz = np.flatnonzero(lens > 0)
+    if len(nz) == 0:
+        return mean, std, vmin, vmax, count
+    # Boş segmentler çıkarıldığında kalan başlangıçlar yine bitişik aralıklar tanımlar
+    seg = values[offsets[nz[0]]:offsets[nz[-1] + 1]]
+    starts = offsets[nz] - offsets[nz[0]]
+    finite = ~np.isnan(seg)
+    cnt = np.add.reduceat(finite.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = np.add.reduceat(np.where(finite, seg, 0.0), starts) / cnt
+        dev = np.where(finite, seg - np.repeat(m, lens[nz]), 0.0)
+        s = np.sqrt(np.add.reduceat(dev * dev, starts) / cnt)
+    lo = np.minimum.reduceat(np.where(finite, seg, np.inf), starts)
+    hi = np.maximum.reduceat(np.where(finite, seg, -np.inf), starts)
+    ok = cnt > 0
+    count[nz] = cnt
+    mean[nz[ok]], std[nz[ok]], vmin[nz[ok]], vmax[nz[ok]] = m[ok], s[ok], lo[ok], hi[ok]
+    return mean, std, vmin, vmax, count
+
+def segment_stats(values, offsets):
+    """
+    offsets ile ayrılmış segmentlerin NaN yok sayan istatistikleri, tek native geçişte.
+    values: float64 dizi (memmap olabilir), offsets: artan int64 dizi (uzunluk = segment sayısı + 1).
+    Dönüş: (mean, std, min, max, count) dizileri; std popülasyon std'sidir, boş segment -> NaN.
+    """
+    values = _as_f64(values).ravel()
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    n = len(offsets) - 1
+    if n <= 0:
+        return tuple(np.empty(0) for _ in range(4)) + (np.empty(0, dtype=np.int64),)
+    if offsets[0] < 0 or offsets[-1] > len(values) or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets artan olmalı ve values sınırları içinde kalmalı")
+
+    lib = load_library("core_engine")
+    if lib is None:
+        return _segment_stats_numpy(values, offsets)
+
+    mean, std, vmin, vmax = (np.empty(n) for _ in range(4))
+    count = np.empty(n, dtype=np.int64)
+    lib.compute_segment_stats(_ptr(values), _ptr(offsets, _c_int64_p), n,
+                              _ptr(mean), _ptr(std), _ptr(vmin), _ptr(vmax), _ptr(count, _c_int64_p))
+    return mean, std, vmin, vmax, count
+
+# --- Kalman -------------------------------------------------------------------
+
+def _kalman_smooth_batch_numpy(z, offsets, q, r, p0):
+    """kalman_smooth_batch'in NumPy karşılığı: tüm seriler zaman adımında birlikte ilerler."""
+    q = q if q > 0.0 else 1e-6
+    r = r if r > 0.0 else 1e-3
+    p0 = p0 if p0 > 0.0 else 1.0
+    starts = offsets[:-1]
+    lens = np.diff(offsets)
+    n_series = len(lens)
+    out = np.full(len(z), np.nan)
+    x = np.full(n_series, np.nan)
+    p = np.full(n_series, p0)
+    started = np.zeros(n_series, dtype=bool)
+
+    for t in range(int(lens.max()) if n_series else 0):
+        act = np.flatnonzero(lens > t)
+        idx = starts[act] + t
+        zi = z[idx]
+        ok = np.isfinite(zi)
+
+        # İlk sonlu gözlem filtreyi başlatır
+        init = ok & ~started[act]
+        x[act[init]] = zi[init]
+        started[act[init]] = True
+
+        upd = act[ok]
+        p_prior = p[upd] + q
+        k = p_prior / (p_prior + r)
+        x[upd] = x[upd] + k * (zi[ok] - x[upd])
+        p[upd] = (1.0 - k) * p_prior
+
+        # Eksik gözlem: sadece tahmin adımı
+        miss = act[~ok & started[act]]
+        p[miss] += q
+        out[idx] = np.where(started[act], x[act], np.nan)
+    return out
+
+def _kalman_smooth_numpy(z, q, r, x0, p0):
+    """kalman_smooth'un (tek seri, verilen x0 ile) NumPy/Python karşılığı."""
+    q = q if q > 0.0 else 1e-6
+    r = r if r > 0.0 else 1e-3
+    p = p0 if p0 > 0.0 else 1.0
+    x = x0
+    out = np.empty(len(z))
+    for i, zi in enumerate(z):
+        p_prior = p + q
+        k = p_prior / (p_prior + r)
+        x = x + k * (zi - x)
+        p = (1.0 - k) * p_prior
+        out[i] = x
+    return out
+
+def kalman_smooth(z, q=1e-5, r=1e-3, x0=1.0, p0=1.0):
+    """Tek bir seriyi kalman_smooth ile süzer."""
+    z = _as_f64(z).ravel()
+    lib = load_library("kalman_soh")
+    if lib is None or len(z) > INT32_MAX:
+        return _kalman_smooth_numpy(z, q, r, x0, p0)
+    out = np.empty_like(z)
+    if len(z):
+        lib.kalman_smooth(q, r, x0, p0, _ptr(z), len(z), _ptr(out))
+    return out
+
+def kalman_smooth_batch(z, offsets, q=1e-5, r=1e-3, p0=1.0):
+    """
+    Düz bir SOH dizisini, offsets ile ayrılmış her hücre serisi için Kalman filtresinden geçirir.
+    z: float64 dizi, offsets: int64 dizi (uzunluk = seri sayısı + 1). Tek native çağrı.
+    """
+    z = _as_f64(z)
+    offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    n_series = len(offsets) - 1
+    if n_series <= 0:
+        return np.empty(0)
+    if offsets[0] != 0 or offsets[-1] != len(z) or np.any(np.diff(offsets) < 0):
+        raise ValueError("offsets 0 ile başlamalı, artan olmalı ve len(z) ile bitmeli")
+
+    lib = load_library("kalman_soh")
+    if lib is None:
+        return _kalman_smooth_batch_numpy(z, offsets, q, r, p0)
+
+    out = np.empty_like(z)
+    lib.kalman_smooth_batch(q, r, p0, _ptr(z), _ptr(offsets, _c_int64_p), n_series, _ptr(out))
+    return out
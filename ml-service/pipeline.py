@@ -0,0 +1,301 @@
+"""
+pipeline.py
+config.yaml'daki pipeline: bölümünden prepare -> train -> RUL zincirini DAG olarak çalıştırır.
+
+- Her aşama (stage) bir script + argümanlar + bildirilen inputs/outputs/params'tır.
+  Argüman ve yollarda {config}, {paths.out_dir}, {soh.eol_threshold} gibi yer tutucular
+  config değerleriyle doldurulur; göreli yollar config dosyasının dizinine göredir.
+- Bağımlılıklar yollardan çıkarılır: bir aşamanın input'u başka bir aşamanın output'u
+  (ya da onun altında) ise o aşamadan sonra koşar; ek sıra için after: listesi verilebilir.
+- Aşama anahtarı = hash(script + yerel import ettiği modüllerin kodu, genişletilmiş argümanlar,
+  params ile seçilen config değerleri, input içerikleri). Anahtar önbellekteki ile aynıysa ve
+  tüm output'lar duruyorsa aşama atlanır.
+- İçerik hash'leri out_dir/pipeline_cache.json'da (size, mtime) ile saklanır; değişmeyen dosya
+  yeniden okunmaz (file_manifest.FileManifest.lookup ile aynı yaklaşım).
+- Bağımsız aşamalar (ör. RPT ve cycle hazırlığı) --workers kadar eşzamanlı alt süreçte koşar;
+  her aşamanın çıktısı out_dir/logs/<aşama>.log'a yazılır.
+"""
+import argparse, ast, hashlib, json, os, re, subprocess, sys, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from file_manifest import file_digest
+from utils import ensure_dir, load_config
+from cli_args import add_pipeline_args as add_args
+
+CACHE_SCHEMA = "pipeline-v1"
+_PLACEHOLDER = re.compile(r"\{([\w.]+)\}")
+
+def config_value(cfg, dotted):
+    """'soh.eol_threshold' gibi noktalı anahtarı config'te çözer; yoksa KeyError."""
+    val = cfg
+    for part in dotted.split("."):
+        if not isinstance(val, dict) or part not in val:
+            raise KeyError(dotted)
+        val = val[part]
+    return val
+
+def expand(text, cfg, extra):
+    """{anahtar} yer tutucularını extra ya da config değerleriyle doldurur."""
+    def repl(m):
+        key = m.group(1)
+        return str(extra[key]) if key in extra else str(config_value(cfg, key))
+    return _PLACEHOLDER.sub(repl, str(text))
+
+def _hash(obj):
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True, default=str).encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+def code_files(script, search_dirs):
+    """
+    script ve onun (geçişli olarak) import ettiği yerel modüller (search_dirs içindeki .py dosyaları).
+    Kurulu paketler hash'e girmez; sadece depodaki kod değişince aşama bayatlar.
+    """
+    seen, todo = {}, [Path(script).resolve()]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen[path] = True
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"))
+        except SyntaxError:
+            continue
+        names = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names.update(a.name.split(".")[0] for a in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names.add(node.module.split(".")[0])
+        for name in names:
+            for d in [path.parent, *search_dirs]:
+                cand = Path(d) / f"{name}.py"
+                if cand.exists():
+                    todo.append(cand.resolve())
+                    break
+    return sorted(seen)
+
+class DigestCache:
+    """path -> {size, mtime_ns, digest}; size+mtime aynıysa dosya yeniden hash'lenmez."""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def file(self, path):
+        key = str(path)
+        st = os.stat(path)
+        e = self.entries.get(key)
+        if e is not None and e["size"] == st.st_size and e["mtime_ns"] == st.st_mtime_ns:
+            return e["digest"]
+        digest = file_digest(path)
+        self.entries[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+        return digest
+
+    def path(self, path):
+        """Dosya ya da dizinin içerik özeti (dizinde göreli yol + dosya hash'leri); yoksa None."""
+        path = Path(path)
+        if path.is_file():
+            return self.file(path)
+        if not path.is_dir():
+            return None
+        files = sorted(p for p in path.rglob("*") if p.is_file())
+        return _hash([(p.relative_to(path).as_posix(), self.file(p)) for p in files])
+
+class Stage:
+    def __init__(self, name, spec, cfg, root, extra):
+        self.name = name
+        exp = lambda v: expand(v, cfg, extra)
+        resolve = lambda p: (root / exp(p)).resolve()
+        if "script" not in spec:
+            raise ValueError(f"pipeline.stages.{name}: script eksik")
+        self.script = resolve(spec["script"])
+        self.args = [exp(a) for a in spec.get("args", [])]
+        self.inputs = [resolve(p) for p in spec.get("inputs", [])]
+        self.outputs = [resolve(p) for p in spec.get("outputs", [])]
+        self.params = {k: config_value(cfg, k) for k in spec.get("params", [])}
+        self.after = set(spec.get("after", []))
+        self.deps = set()
+
+    def command(self):
+        return [sys.executable, str(self.script), *self.args]
+
+    def key(self, digests, search_dirs):
+        code = [(str(p), digests.file(p)) for p in code_files(self.script, search_dirs)]
+        inputs = [(str(p), digests.path(p)) for p in self.inputs]
+        return _hash({"code": code, "args": self.args, "params": self.params, "inputs": inputs})
+
+def _under(path, parent):
+    return path == parent or parent in path.parents
+
+def load_stages(cfg, config_path):
+    """pipeline.stages'ten Stage'leri kurar ve bağımlılıkları çıkarır."""
+    spec = (cfg.get("pipeline") or {}).get("stages")
+    if not spec:
+        raise ValueError(f"{config_path} içinde pipeline.stages yok")
+    root = Path(config_path).resolve().parent
+    extra = {"config": Path(config_path).resolve()}
+    stages = {name: Stage(name, s or {}, cfg, root, extra) for name, s in spec.items()}
+    for st in stages.values():
+        unknown = st.after - set(stages)
+        if unknown:
+            raise ValueError(f"pipeline.stages.{st.name}.after: bilinmeyen aşama {sorted(unknown)}")
+        st.deps = set(st.after)
+        for other in stages.values():
+            if other is not st and any(_under(i, o) for i in st.inputs for o in other.outputs):
+                st.deps.add(other.name)
+    topo_order(stages)
+    return stages
+
+def topo_order(stages):
+    """Kahn sıralaması; döngü varsa ValueError."""
+    indeg = {n: len(s.deps) for n, s in stages.items()}
+    ready = [n for n, d in indeg.items() if d == 0]
+    order = []
+    while ready:
+        n = ready.pop(0)
+        order.append(n)
+        for m, s in stages.items():
+            if n in s.deps:
+                indeg[m] -= 1
+                if indeg[m] == 0:
+                    ready.append(m)
+    if len(order) != len(stages):
+        raise ValueError(f"pipeline döngüsel bağımlılık içeriyor: {sorted(set(stages) - set(order))}")
+    return order
+
+def select(stages, targets):
+    """Hedef aşamalar ve tüm üst (upstream) bağımlılıkları."""
+    if not targets:
+        return set(stages)
+    unknown = set(targets) - set(stages)
+    if unknown:
+        raise ValueError(f"Bilinmeyen aşama(lar): {sorted(unknown)}")
+    keep, todo = set(), list(targets)
+    while todo:
+        n = todo.pop()
+        if n not in keep:
+            keep.add(n)
+            todo.extend(stages[n].deps)
+    return keep
+
+def _load_cache(path):
+    if path.exists():
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if data.get("schema") == CACHE_SCHEMA:
+                return data
+        except Exception:
+            print(f"[WARN] Pipeline önbelleği okunamadı, sıfırdan oluşturulacak: {path}")
+    return {"schema": CACHE_SCHEMA, "files": {}, "stages": {}}
+
+def _save_cache(path, cache, digests):
+    cache["files"] = digests.entries
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+def _run_stage(stage, log_path, cwd):
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        log.write("$ " + " ".join(stage.command()) + "\n")
+        log.flush()
+        rc = subprocess.run(stage.command(), cwd=cwd, stdout=log, stderr=subprocess.STDOUT).returncode
+    return rc, time.perf_counter() - t0
+
+def _tail(path, n=20):
+    lines = Path(path).read_text(encoding="utf-8", errors="replace").splitlines()
+    return "\n".join("    " + l for l in lines[-n:])
+
+def run_pipeline(config_path, targets=None, force=(), workers=None, dry_run=False):
+    """
+    Aşamaları bağımlılık sırasıyla koşar; {aşama: "cached" | "ran" | "failed" | "blocked" | "stale"} döndürür.
+    force: anahtarı ne olursa olsun yeniden koşacak aşamalar ("all" = hepsi).
+    dry_run: hiçbir şey koşmaz; bağımlılığı güncel aşamalar için güncel/bayat durumunu raporlar.
+    """
+    cfg = load_config(config_path)
+    pcfg = cfg.get("pipeline") or {}
+    stages = load_stages(cfg, config_path)
+    wanted = select(stages, targets)
+    root = Path(config_path).resolve().parent
+    out_dir = (root / cfg["paths"]["out_dir"]).resolve()
+    cache_path = out_dir / pcfg.get("cache_file", "pipeline_cache.json")
+    log_dir = out_dir / "logs"
+    if not dry_run:
+        ensure_dir(log_dir)
+    cache = _load_cache(cache_path)
+    digests = DigestCache(cache.get("files"))
+    search_dirs = [root, root / "ml-service"]
+    workers = workers or int(pcfg.get("workers", 2))
+    force = set(stages) if "all" in set(force) else set(force)
+
+    status, pending, running = {}, [n for n in topo_order(stages) if n in wanted], {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while pending or running:
+            for name in list(pending):
+                st = stages[name]
+                dep_states = [status.get(d) for d in st.deps if d in wanted]
+                if any(s in ("failed", "blocked") for s in dep_states):
+                    status[name] = "blocked"
+                    pending.remove(name)
+                    print(f"[WARN] {name}: üst aşama başarısız, atlandı")
+                    continue
+                if any(s not in ("cached", "ran") for s in dep_states):
+                    if dry_run and all(s is not None for s in dep_states):
+                        status[name] = "stale"          # üst aşama koşacak; anahtar şimdi bilinemez
+                        pending.remove(name)
+                        print(f"[INFO] {name}: üst aşama güncel değil → koşacak")
+                    continue
+                if len(running) >= workers and not dry_run:
+                    break
+                pending.remove(name)
+                key = st.key(digests, search_dirs)
+                prev = cache["stages"].get(name, {})
+                fresh = prev.get("key") == key and all(p.exists() for p in st.outputs)
+                if fresh and name not in force:
+                    status[name] = "cached"
+                    print(f"[OK] {name}: güncel (önbellek), atlandı")
+                    continue
+                if dry_run:
+                    status[name] = "stale"
+                    print(f"[INFO] {name}: koşacak ({'zorlandı' if fresh else 'girdi/kod/parametre değişti'})")
+                    continue
+                print(f"[INFO] {name}: başlıyor → {' '.join(st.command()[1:])}")
+                running[pool.submit(_run_stage, st, log_dir / f"{name}.log", root)] = (name, key)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, key = running.pop(fut)
+                st = stages[name]
+                rc, secs = fut.result()
+                missing = [str(p) for p in st.outputs if not p.exists()]
+                if rc != 0 or missing:
+                    status[name] = "failed"
+                    why = f"çıkış kodu {rc}" if rc != 0 else f"eksik output: {missing}"
+                    print(f"[WARN] {name}: başarısız ({why}), log → {log_dir / f'{name}.log'}")
+                    print(_tail(log_dir / f"{name}.log"))
+                    cache["stages"].pop(name, None)
+                else:
+                    status[name] = "ran"
+                    cache["stages"][name] = {"key": key, "seconds": round(secs, 3),
+                                             "finished": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                    print(f"[OK] {name}: tamamlandı ({secs:.1f}s)")
+                _save_cache(cache_path, cache, digests)
+
+    if not dry_run:
+        _save_cache(cache_path, cache, digests)
+    return status
+
+def main(args):
+    targets = args.stages.split(",") if args.stages else None
+    force = args.force.split(",") if args.force else ()
+    status = run_pipeline(args.config, targets=targets, force=force, workers=args.workers, dry_run=args.dry_run)
+    counts = {s: sum(v == s for v in status.values()) for s in sorted(set(status.values()))}
+    print("[INFO] Pipeline özeti: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    if any(v in ("failed", "blocked") for v in status.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_args(parser)
+    main(parser.parse_args())
@@ -1,11 +1,34 @@
 """
 ISU-ILCC cycle JSON'lardan DoD, C-rate ve voltaj özelliklerini çıkarır.
 """
-import argparse, json, re
+import argparse, re
+from functools import partial
 from pathlib import Path
 import numpy as np
 import pandas as pd
 from utils import load_config, ensure_dir
+from file_manifest import FileManifest
+from extraction_plan import ExtractionPlan, sample_files
+from prepare_data_isu_ilcc import CYCLE_WEEK_COLS, infer_ids_from_path
+from signal_store import SignalStore, SignalStoreWriter
+import json_stream
+import native
+from json_decode import ARRAY_TYPES, read_json
+from feature_store import write_partitioned
+import instrument
+from cli_args import add_prepare_cycle_args as add_args
+
+# Çıkarım mantığı değişirse artır: eski manifest kayıtları geçersiz sayılır
+CYCLE_MANIFEST_SCHEMA = "cycle-v5"
+
+# scan_cycle'ın döndürdüğü sırayla, anahtar adında aranan alt metinler
+CYCLE_KEYS = ("capacity_charge", "capacity_discharge", "V_charge", "V_discharge", "I_charge", "I_discharge")
+
+def _key_has_list(sub, k, v):
+    return sub in k and isinstance(v, ARRAY_TYPES)
+
+# Extraction plan slotları: scan_cycle ile aynı alt metin eşleşmesi (derinlik sınırı yok)
+CYCLE_PLAN_SLOTS = {sub: (partial(_key_has_list, sub), None) for sub in CYCLE_KEYS}
 
 def _safe_mean(x):
     return float(np.nanmean(x)) if len(x) > 0 else np.nan
@@ -20,35 +43,200 @@ def _extract_first_numeric(x):
             return float(m.group(0))
     return np.nan
 
-def scan_cycle(obj):
-    """Cycle JSON içinden kapasite, voltaj ve akım çıkarır."""
-    cap_chg, cap_dchg, avgV_chg, avgV_dchg, avgI_chg, avgI_dchg = [], [], [], [], [], []
+def _join_chunks(chunks):
+    """Eşleşen dizi parçalarını birleştirir: hepsi liste ise düz liste, ndarray varsa float64 dizi."""
+    if any(isinstance(c, np.ndarray) for c in chunks):
+        return np.concatenate([np.asarray(c, dtype=np.float64) for c in chunks])
+    return [x for c in chunks for x in c]
+
+def _scan_cycle_chunks(obj, parts):
     if isinstance(obj, dict):
         for k, v in obj.items():
-            if "capacity_charge" in k and isinstance(v, list):
-                cap_chg.extend(v)
-            if "capacity_discharge" in k and isinstance(v, list):
-                cap_dchg.extend(v)
-            if "V_charge" in k and isinstance(v, list):
-                avgV_chg.extend(v)
-            if "V_discharge" in k and isinstance(v, list):
-                avgV_dchg.extend(v)
-            if "I_charge" in k and isinstance(v, list):
-                avgI_chg.extend(v)
-            if "I_discharge" in k and isinstance(v, list):
-                avgI_dchg.extend(v)
+            if isinstance(v, ARRAY_TYPES):
+                for i, sub in enumerate(CYCLE_KEYS):
+                    if sub in k:
+                        parts[i].append(v)
+            # ndarray ve skalerlerin altında anahtar olmaz; sadece kaplar dolaşılır
             if isinstance(v, (dict, list)):
-                c2 = scan_cycle(v)
-                for i, arr in enumerate(c2):
-                    if isinstance(arr, list):
-                        [cap_chg, cap_dchg, avgV_chg, avgV_dchg, avgI_chg, avgI_dchg][i].extend(arr)
+                _scan_cycle_chunks(v, parts)
     elif isinstance(obj, list):
         for it in obj:
-            c2 = scan_cycle(it)
-            for i, arr in enumerate(c2):
-                if isinstance(arr, list):
-                    [cap_chg, cap_dchg, avgV_chg, avgV_dchg, avgI_chg, avgI_dchg][i].extend(arr)
-    return cap_chg, cap_dchg, avgV_chg, avgV_dchg, avgI_chg, avgI_dchg
+            if isinstance(it, (dict, list)):
+                _scan_cycle_chunks(it, parts)
+
+def scan_cycle(obj):
+    """
+    Cycle JSON içinden kapasite, voltaj ve akım çıkarır (CYCLE_KEYS sırasıyla, belge sırasında).
+    Girdide ndarray'e çevrilmiş diziler varsa ilgili çıktı float64 ndarray olur.
+    """
+    parts = [[] for _ in CYCLE_KEYS]
+    _scan_cycle_chunks(obj, parts)
+    return tuple(_join_chunks(p) for p in parts)
+
+def cycle_means(j, plan=None):
+    """
+    CYCLE_KEYS sırasıyla dizi ortalamaları. plan verilirse önce doğrudan yol takibi
+    denenir; düzen bilinmiyorsa/yol çözülemezse scan_cycle'a dönülür (miss).
+    """
+    if plan is not None and isinstance(j, dict):
+        found = plan.lookup(j)
+        plan.record(found is not None)
+        if found is not None:
+            return [_safe_mean(_join_chunks([v for v in found[sub] if isinstance(v, ARRAY_TYPES)]))
+                    for sub in CYCLE_KEYS]
+    return [_safe_mean(x) for x in scan_cycle(j)]
+
+def parse_cycle_file(f: Path, stream=False, plan=None):
+    """
+    Tek bir cycle dosyasının özellik satırını döndürür; okunamazsa None.
+    stream=True ise diziler ijson ile akışla toplam/sayaca indirgenir (bellek dosya boyutundan bağımsız).
+    """
+    means = None
+    if stream and json_stream.available():
+        try:
+            with instrument.stage("stream_parse", items=1, nbytes=f.stat().st_size):
+                sums = json_stream.stream_cycle_sums(f, CYCLE_KEYS)
+            means = [total / count if count else np.nan for total, count in sums]
+        except Exception:
+            means = None
+
+    if means is None:
+        try:
+            j = read_json(f, arrays=True)
+        except Exception as e:
+            print(f"[WARN] {f.name} okunamadı: {e}")
+            instrument.count("files_failed")
+            return None
+        with instrument.stage("scan", items=1):
+            means = cycle_means(j, plan)
+
+    g, c = infer_ids_from_path(f)
+    return cycle_row(f.name, means, g, c)
+
+def cycle_row(name, means, group_id, cell_id, cycle=None):
+    """CYCLE_KEYS sırasındaki ortalamalardan cycle özellik satırını üretir."""
+    cap_chg_val, cap_dchg_val, Vc, Vd, Ic, Id = means
+
+    dod = cap_dchg_val / cap_chg_val if cap_chg_val and np.isfinite(cap_chg_val) else np.nan
+    cr_chg = abs(Ic) / cap_chg_val if cap_chg_val and np.isfinite(cap_chg_val) else np.nan
+    cr_dchg = abs(Id) / cap_dchg_val if cap_dchg_val and np.isfinite(cap_dchg_val) else np.nan
+
+    return {
+        "group_id": group_id,
+        "cell_id": cell_id,
+        "cycle": cycle,
+        "file": name,
+        "capacity_charge_Ah": cap_chg_val,
+        "capacity_discharge_Ah": cap_dchg_val,
+        "DoD": dod,
+        "avgV_chg": Vc,
+        "avgV_dchg": Vd,
+        "C_rate_chg": cr_chg,
+        "C_rate_dchg": cr_dchg
+    }
+
+def infer_cycle_from_path(path: Path):
+    """Dosya adından cycle numarası (cycle_0012, cyc12, ..._12); bulunamazsa None."""
+    m = re.search(r"cyc(?:le)?[_\-]?(\d+)", path.stem, re.IGNORECASE)
+    if not m:
+        m = re.search(r"(\d+)$", path.stem)
+    return int(m.group(1)) if m else None
+
+def cycle_keys(files):
+    """
+    Her dosya için (group_id, cell_id, cycle). Numarası adından çıkarılamayan dosyalara
+    hücre içindeki dosya sırası (1'den) verilir.
+    """
+    keys = []
+    counters = {}
+    for f in files:
+        g, c = infer_ids_from_path(f)
+        counters[(g, c)] = counters.get((g, c), 0) + 1
+        cyc = infer_cycle_from_path(f)
+        keys.append((g, c, cyc if cyc is not None else counters[(g, c)]))
+    return keys
+
+def aggregate_cycle_weeks(df, cycles_per_week=1):
+    """
+    Cycle satırlarını RPT hafta pencerelerine indirger: week_idx = ceil(cycle / cycles_per_week).
+    (group_id, cell_id, week_idx) başına cycle sayısı ve DoD / C-rate ortalamaları; anahtara göre sıralı.
+    """
+    cols = ["group_id", "cell_id", "week_idx", "n_cycles"] + CYCLE_WEEK_COLS
+    if df.empty:
+        return pd.DataFrame(columns=cols)
+    week = np.ceil(df["cycle"].to_numpy(dtype=float) / cycles_per_week).astype(np.int64)
+    out = (df.assign(week_idx=week)
+             .groupby(["group_id", "cell_id", "week_idx"], sort=True)
+             .agg(n_cycles=("cycle", "size"), **{c: (c, "mean") for c in CYCLE_WEEK_COLS})
+             .reset_index())
+    return out[cols]
+
+def build_signal_store(files, store_dir):
+    """
+    Dönüşüm aşaması: cycle JSON'larındaki ham V/I/kapasite dizilerini sinyal deposuna yazar.
+    Cycle'lar (group_id, cell_id, cycle) sırasıyla yazılır (anahtarlar cycle_keys ile).
+    """
+    keyed = [(g, c, cyc, order, f) for order, (f, (g, c, cyc)) in enumerate(zip(files, cycle_keys(files)))]
+    keyed.sort(key=lambda t: t[:4])
+
+    n_ok = 0
+    with SignalStoreWriter(store_dir, CYCLE_KEYS) as writer:
+        for g, c, cyc, order, f in keyed:
+            try:
+                j = read_json(f, arrays=True)
+            except Exception as e:
+                print(f"[WARN] {f.name} okunamadı: {e}")
+                instrument.count("files_failed")
+                continue
+            with instrument.stage("scan", items=1):
+                arrays = dict(zip(CYCLE_KEYS, scan_cycle(j)))
+            writer.append({"group_id": g, "cell_id": c, "cycle": cyc,
+                           "file": f.name, "file_order": order}, arrays)
+            n_ok += 1
+    print(f"[OK] signal store -> {store_dir} | cycles={n_ok}")
+
+def features_from_store(store):
+    """
+    Cycle özelliklerini JSON yerine sinyal deposundan hesaplar.
+    Her kanal memmap üzerinden kopyasız okunur; tüm cycle'ların ortalamaları tek bir
+    segment çağrısıyla (native.segment_stats, yoksa NumPy) alınır.
+    """
+    idx = store.index
+    means = {}
+    for ch in CYCLE_KEYS:
+        values = store.channel(ch)
+        with instrument.stage("segment_stats", items=len(values), nbytes=values.nbytes):
+            means[ch] = native.segment_stats(values, store.offsets(ch))[0]
+
+    rows = [cycle_row(name, [means[ch][i] for ch in CYCLE_KEYS], g, c, int(cyc))
+            for i, (name, g, c, cyc) in enumerate(zip(idx["file"], idx["group_id"], idx["cell_id"], idx["cycle"]))]
+    df = pd.DataFrame(rows)
+    # Çıktı sırası JSON yolundaki gibi (sıralı dosya listesi)
+    return df.iloc[np.argsort(idx["file_order"].to_numpy(), kind="stable")].reset_index(drop=True)
+
+def write_features(df, out_path, partitioned=False, sort_cols=("cell_id", "cycle")):
+    with instrument.stage("parquet_write", items=len(df)) as st:
+        df.to_parquet(out_path, index=False)
+        st.add(nbytes=out_path.stat().st_size)
+    if partitioned:
+        ds_root = out_path.with_suffix("")
+        with instrument.stage("partition_write", items=len(df)):
+            write_partitioned(df, ds_root, sort_cols=sort_cols)
+        print(f"[OK] {ds_root.name}/ (group_id bölümlü) -> {ds_root}")
+
+def write_outputs(df, out_dir, cfg, partitioned=False, label=""):
+    """features_cycle.parquet ve hafta penceresi özetini (features_cycle_weekly.parquet) yazar."""
+    out_path = out_dir / "features_cycle.parquet"
+    write_features(df, out_path, partitioned)
+    print(f"[OK] features_cycle.parquet{label} -> {out_path} | rows={len(df)}")
+
+    cycles_per_week = int((cfg.get("cycle") or {}).get("cycles_per_week", 1))
+    with instrument.stage("week_aggregate", items=len(df)):
+        weekly = aggregate_cycle_weeks(df, cycles_per_week)
+    weekly_path = out_dir / "features_cycle_weekly.parquet"
+    write_features(weekly, weekly_path, partitioned, sort_cols=("cell_id", "week_idx"))
+    print(f"[OK] features_cycle_weekly.parquet -> {weekly_path} | rows={len(weekly)} "
+          f"(cycles_per_week={cycles_per_week})")
 
 def main(args):
     cfg = load_config(args.config)
@@ -61,43 +249,71 @@ def main(args):
     if args.limit:
         files = files[:args.limit]
 
+    # Sinyal deposu modu: JSON'a dönmeden özellikleri memmap'lenmiş ham dizilerden üret
+    store_dir = out_dir / "signal_store"
+    if getattr(args, "build_store", False):
+        build_signal_store(files, store_dir)
+    if getattr(args, "build_store", False) or getattr(args, "from_store", False):
+        with instrument.stage("features", items=len(files)):
+            df = features_from_store(SignalStore(store_dir))
+        write_outputs(df, out_dir, cfg, getattr(args, "partitioned", False), label=" (signal store)")
+        return
+
+    manifest = None
+    if getattr(args, "incremental", False):
+        manifest = FileManifest(out_dir / "manifest_cycle.json", schema=CYCLE_MANIFEST_SCHEMA)
+
+    stream = getattr(args, "stream", False)
+    if stream and not json_stream.available():
+        print("[WARN] --stream için ijson kurulu değil; dosyalar bellekte ayrıştırılacak.")
+
+    # Extraction plan: örnek dosyalardan anahtar yolları ayrıştırmadan önce öğrenilir
+    plan = None
+    plan_sample = getattr(args, "plan_sample", 0)
+    if plan_sample and not stream:
+        plan = ExtractionPlan(CYCLE_PLAN_SLOTS)
+        for f in sample_files(files, plan_sample):
+            try:
+                plan.learn(read_json(f, arrays=True))
+            except Exception:
+                continue
+
+    # Cycle numarası yedeği dosya sırasına bağlı olduğundan önbelleğe alınmaz, her çalıştırmada atanır
+    cycle_of = {f: key[2] for f, key in zip(files, cycle_keys(files))}
     rows = []
-    for f in files:
-        try:
-            raw = f.read_text(encoding="utf-8")
-            j = json.loads(raw)
-            if isinstance(j, str):
-                j = json.loads(j)
-        except Exception as e:
-            print(f"[WARN] {f.name} okunamadı: {e}")
-            continue
-
-        cap_chg, cap_dchg, Vc, Vd, Ic, Id = scan_cycle(j)
-        cap_chg_val = _safe_mean(cap_chg)
-        cap_dchg_val = _safe_mean(cap_dchg)
-
-        dod = cap_dchg_val / cap_chg_val if cap_chg_val and np.isfinite(cap_chg_val) else np.nan
-        cr_chg = abs(_safe_mean(Ic)) / cap_chg_val if cap_chg_val and np.isfinite(cap_chg_val) else np.nan
-        cr_dchg = abs(_safe_mean(Id)) / cap_dchg_val if cap_dchg_val and np.isfinite(cap_dchg_val) else np.nan
-
-        rows.append({
-            "file": f.name,
-            "capacity_charge_Ah": cap_chg_val,
-            "capacity_discharge_Ah": cap_dchg_val,
-            "DoD": dod,
-            "avgV_chg": _safe_mean(Vc),
-            "avgV_dchg": _safe_mean(Vd),
-            "C_rate_chg": cr_chg,
-            "C_rate_dchg": cr_dchg
-        })
+    n_cached = 0
+    with instrument.stage("parse_files") as st:
+        for f in files:
+            if manifest is not None:
+                hit, row = manifest.lookup(f)
+                if hit:
+                    n_cached += 1
+                    if row is not None:
+                        rows.append({**row, "cycle": cycle_of[f]})
+                    continue
 
-    df = pd.DataFrame(rows)
-    out_path = out_dir / "features_cycle.parquet"
-    df.to_parquet(out_path, index=False)
-    print(f"[OK] features_cycle.parquet -> {out_path} | rows={len(df)}")
+            row = parse_cycle_file(f, stream=stream, plan=plan)
+            st.add(items=1)
+            if manifest is not None:
+                manifest.update(f, row)
+            if row is not None:
+                rows.append({**row, "cycle": cycle_of[f]})
+    instrument.count("files_total", len(files))
+    instrument.count("files_cached", n_cached)
+
+    if manifest is not None:
+        removed = manifest.prune(files)
+        manifest.save()
+        print(f"[INFO] Manifest: önbellek={n_cached}, ayrıştırılan={len(files) - n_cached}, silinen={len(removed)}")
+
+    if plan is not None:
+        print(f"[INFO] Extraction plan: {plan.report()}")
+
+    write_outputs(pd.DataFrame(rows), out_dir, cfg, getattr(args, "partitioned", False))
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--config", default="config.yaml")
-    parser.add_argument("--limit", type=int, default=None, help="İşlenecek dosya sayısını sınırla")
-    main(parser.parse_args())
+    add_args(parser)
+    args = parser.parse_args()
+    with instrument.profiled(args.profile, "prepare_cycle"):
+        main(args)
@@ -5,11 +5,23 @@ ISU-ILCC RPT_json'tan SOH zaman serisi ve genişletilmiş özellikler üretir.
 - Hedef: SOH_next
 - Ek Özellikler: Ortalama voltajlar, DoD, C-rate, capacity fade
 """
-import argparse, json, re
+import argparse, re
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
 from pathlib import Path
 import numpy as np
 import pandas as pd
 from utils import load_config, ensure_dir
+from file_manifest import FileManifest
+from extraction_plan import ExtractionPlan, sample_files
+import json_stream
+import native
+from json_decode import ARRAY_TYPES, read_json
+from feature_store import asof_join, read_features, write_partitioned
+from cell_store import CellSeriesStore
+import instrument
+from cli_args import add_prepare_rpt_args as add_args
 
 # Kapasite için aday key’ler
 CAP_KEYS  = [
@@ -19,6 +31,14 @@ CAP_KEYS  = [
 ]
 WEEK_KEYS = ["week_idx","week","weekIndex","Week","rpt_index"]
 
+# prepare_data_cycle'ın hafta penceresi ortalamasını aldığı ve --join-cycles ile eklenen kolonlar
+CYCLE_WEEK_COLS = ["DoD", "C_rate_chg", "C_rate_dchg"]
+
+# Çıkarım mantığı değişirse artır: eski manifest kayıtları geçersiz sayılır
+RPT_MANIFEST_SCHEMA = "rpt-v3"
+# features.parquet kolon seti değişirse artır: eski çıktı artımlı güncellemede yeniden kullanılmaz
+FEATURES_SCHEMA = "features-v2"
+
 def _extract_first_numeric(x):
     if isinstance(x,(int,float)) and np.isfinite(x):
         return float(x)
@@ -29,6 +49,9 @@ def _extract_first_numeric(x):
 
 def extract_capacity_from_list(data, max_depth=3, depth=0):
     """Liste içindeki (iç içe de olabilir) tüm sayıları çıkarır ve ortalamasını alır."""
+    if isinstance(data, np.ndarray):
+        finite = data[np.isfinite(data)]
+        return float(finite.mean()) if finite.size else np.nan
     values = []
 
     def flatten(x, depth):
@@ -62,7 +85,7 @@ def scan_for_capacity(obj, max_depth=10, depth=0):
             if k in CAP_KEYS:
                 if isinstance(v, (int, float)):
                     values.append(float(v))
-                elif isinstance(v, list):
+                elif isinstance(v, ARRAY_TYPES):
                     c = extract_capacity_from_list(v)
                     if np.isfinite(c):
                         values.append(c)
@@ -70,11 +93,14 @@ def scan_for_capacity(obj, max_depth=10, depth=0):
                     c = _extract_first_numeric(v)
                     if np.isfinite(c):
                         values.append(c)
-            values.extend(scan_for_capacity(v, max_depth=max_depth, depth=depth+1))
+            if isinstance(v, (dict, list)):
+                values.extend(scan_for_capacity(v, max_depth=max_depth, depth=depth+1))
 
     elif isinstance(obj, list):
+        # Skaler elemanlarda eşleşecek anahtar yok; sadece kaplar dolaşılır
         for it in obj:
-            values.extend(scan_for_capacity(it, max_depth=max_depth, depth=depth+1))
+            if isinstance(it, (dict, list)):
+                values.extend(scan_for_capacity(it, max_depth=max_depth, depth=depth+1))
 
     return values
 
@@ -84,10 +110,10 @@ def scan_for_voltage(obj):
     if isinstance(obj, dict):
         for k, v in obj.items():
             if "QV_discharge" in k:
-                if isinstance(v, list) and v:
+                if isinstance(v, ARRAY_TYPES) and len(v):
                     avg_dchg = float(np.nanmean(v))
             if "QV_charge" in k:
-                if isinstance(v, list) and v:
+                if isinstance(v, ARRAY_TYPES) and len(v):
                     avg_chg = float(np.nanmean(v))
             if isinstance(v, (dict, list)):
                 sub_chg, sub_dchg = scan_for_voltage(v)
@@ -95,6 +121,8 @@ def scan_for_voltage(obj):
                 if np.isfinite(sub_dchg): avg_dchg = sub_dchg
     elif isinstance(obj, list):
         for it in obj:
+            if not isinstance(it, (dict, list)):
+                continue
             sub_chg, sub_dchg = scan_for_voltage(it)
             if np.isfinite(sub_chg): avg_chg = sub_chg
             if np.isfinite(sub_dchg): avg_dchg = sub_dchg
@@ -128,6 +156,248 @@ def local_slope_last_k(weeks, soh, k=3):
     a, b = np.polyfit(w, y, 1)
     return float(a)
 
+def load_rpt_json(f: Path):
+    """
+    JSON dosyasını json_decode ile okur (BOM, çift kodlanmış string ve latin-1 toleranslı);
+    uzun sayısal diziler ndarray olarak döner. Okunamazsa None.
+    """
+    try:
+        return read_json(f, arrays=True)
+    except Exception:
+        return None
+
+def _is_cap_key(k, v):
+    return k in CAP_KEYS
+
+def _is_qv_charge(k, v):
+    return "QV_charge" in k and isinstance(v, ARRAY_TYPES) and len(v) > 0
+
+def _is_qv_discharge(k, v):
+    return "QV_discharge" in k and isinstance(v, ARRAY_TYPES) and len(v) > 0
+
+# Extraction plan slotları: scan_for_capacity (derinlik 10) ve scan_for_voltage ile aynı eşleşme kuralları
+RPT_PLAN_SLOTS = {
+    "cap":  (_is_cap_key, 10),
+    "chg":  (_is_qv_charge, None),
+    "dchg": (_is_qv_discharge, None),
+}
+
+def _voltage_in_scan_order(matches, depth=0):
+    """
+    scan_for_voltage'ın atama kuralı, plan eşleşmeleri (konum, dizi) üzerinde: düğümdeki doğrudan
+    eşleşme her zaman yazar (NaN dahil), alt düğümün sonucu sadece sonluysa; belge sırasında son yazan kalır.
+    """
+    out = np.nan
+    for _, grp in groupby(matches, key=lambda m: m[0][depth]):
+        grp = list(grp)
+        for pos, v in grp:
+            if len(pos) == depth + 1:
+                out = float(np.nanmean(v))
+        deeper = [m for m in grp if len(m[0]) > depth + 1]
+        if deeper:
+            sub = _voltage_in_scan_order(deeper, depth + 1)
+            if np.isfinite(sub):
+                out = sub
+    return out
+
+def summarize_plan_values(found):
+    """Plan ile (konumlarıyla) bulunan değerlerden (kapasite, avgV_chg, avgV_dchg) üretir."""
+    vals = []
+    for _, v in found["cap"]:
+        if isinstance(v, (int, float)):
+            vals.append(float(v))
+            continue
+        c = extract_capacity_from_list(v) if isinstance(v, ARRAY_TYPES) else _extract_first_numeric(v)
+        if np.isfinite(c):
+            vals.append(c)
+    cap = float(np.nanmean(vals)) if vals else np.nan
+    return cap, _voltage_in_scan_order(found["chg"]), _voltage_in_scan_order(found["dchg"])
+
+def summarize_rpt_json(j, plan=None):
+    """
+    Yüklenmiş JSON'dan (kapasite, avgV_chg, avgV_dchg) çıkarır.
+    plan verilirse önce doğrudan yol takibi denenir, olmazsa özyinelemeli taramaya dönülür.
+    (sonuç, plan_durumu) döner; plan_durumu "hit", "miss" ya da None (plan kullanılmadı).
+    """
+    with instrument.stage("scan", items=1):
+        if isinstance(j, dict):
+            if plan is not None:
+                found = plan.lookup(j, positions=True)
+                if found is not None:
+                    return summarize_plan_values(found), "hit"
+            cap = pick_capacity(j)
+            avg_chg, avg_dchg = scan_for_voltage(j)
+            return (cap, avg_chg, avg_dchg), ("miss" if plan is not None else None)
+        if isinstance(j, list):
+            return (extract_capacity_from_list(j), np.nan, np.nan), None
+        return (np.nan, np.nan, np.nan), None
+
+def _parse_rpt_task(f: Path, stream=False, plan=None):
+    if stream and json_stream.available():
+        try:
+            with instrument.stage("stream_parse", items=1):
+                return json_stream.stream_rpt_summary(f, CAP_KEYS), None
+        except Exception:
+            pass
+
+    j = load_rpt_json(f)
+    if j is None:
+        return None, None
+    return summarize_rpt_json(j, plan)
+
+def parse_rpt_file(f: Path, stream=False, plan=None):
+    """
+    Tek bir RPT dosyasından (kapasite, avgV_chg, avgV_dchg) çıkarır.
+    Process pool içinde de çalışabilmesi için modül seviyesinde tutulur.
+    stream=True ise dosya ijson ile akışla özetlenir (bellek dosya boyutundan bağımsız);
+    akışla okunamayan dosyalar (çift kodlanmış, latin-1, bozuk) için bellekteki yola dönülür.
+    Dosya okunamazsa None döner.
+    """
+    return _parse_rpt_task(f, stream=stream, plan=plan)[0]
+
+def _parse_rpt_pooled(f: Path, stream=False, plan=None, profile=False):
+    """Process pool görevi: ayrıştırma sonucu + (profil açıksa) işçideki aşama kayıtları."""
+    if not profile:
+        return _parse_rpt_task(f, stream=stream, plan=plan), None
+    with instrument.collect() as col:
+        out = _parse_rpt_task(f, stream=stream, plan=plan)
+    return out, col.export()
+
+def iter_parsed_files(files, workers=1, stream=False, plan=None):
+    """
+    (dosya, parse sonucu, plan_durumu) üçlülerini dosya sırasıyla üretir.
+    workers > 1 ise ayrıştırma bir process pool'a dağıtılır; Executor.map sırayı
+    koruduğu için week_idx ataması seri çalışmayla birebir aynı kalır.
+    İşçilerdeki file_read / json_decode / scan aşamaları profil açıksa ana sürece eklenir.
+    """
+    parse = partial(_parse_rpt_task, stream=stream, plan=plan)
+    if workers and workers > 1 and len(files) > 1:
+        chunksize = max(1, min(64, len(files) // (workers * 8)))
+        pooled = partial(_parse_rpt_pooled, stream=stream, plan=plan, profile=instrument.enabled())
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for f, ((res, status), records) in zip(files, ex.map(pooled, files, chunksize=chunksize)):
+                instrument.merge(records)
+                yield f, res, status
+    else:
+        for f in files:
+            res, status = parse(f)
+            yield f, res, status
+
+def nominal_capacity(df, store=None):
+    """C-rate için nominal kapasite: hücrelerin ilk kapasitesinin (satır ağırlıklı) ortalaması."""
+    store = store or CellSeriesStore.from_frame(df, columns=["week_idx", "rpt_capacity_Ah"], dtype=None)
+    return pd.Series(store.broadcast(store.first_valid("rpt_capacity_Ah"))).mean()
+
+def rolling_slope_last_k(x, y, pos, k, rows=None):
+    """
+    Her satır için, aynı hücredeki son k noktanın (satır dahil) en küçük kareler eğimi.
+    pos: satırın hücre içindeki sırası (0'dan başlar). Penceresi dolmayan satırlar NaN.
+    rows verilirse sadece o satırlar hesaplanır ve len(rows) uzunluğunda dizi döner
+    (iş ve bellek O(len(rows)·k)).
+    k küçük olduğundan pencere k kaydırma ile toplanır (kapalı form, polyfit çağrısı yok).
+    """
+    x = np.asarray(x, float)
+    y = np.asarray(y, float)
+    pos = np.asarray(pos)
+    rows = np.arange(len(x)) if rows is None else np.asarray(rows, dtype=np.int64)
+    slope = np.full(len(rows), np.nan)
+    sel = np.flatnonzero(pos[rows] >= k - 1)
+    if k < 2 or len(sel) == 0:
+        return slope
+
+    win = rows[sel, None] - np.arange(k)[None, :]   # (satır, k) pencere indeksleri
+    xw, yw = x[win], y[win]
+    xc = xw - xw.mean(axis=1, keepdims=True)
+    yc = yw - yw.mean(axis=1, keepdims=True)
+    sxx = (xc * xc).sum(axis=1)
+    sxy = (xc * yc).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope[sel] = sxy / sxx
+    return slope
+
+def build_features(df, k, nominal_cap=None, kalman=None):
+    """
+    Ham RPT satırlarından (group_id, cell_id, week_idx, kapasite, voltaj) özellik tablosunu üretir.
+    kalman=(q, r) verilirse tüm hücrelerin SOH serileri tek native çağrıda süzülüp SOH_kf eklenir.
+    """
+    # Hücreler CSR ofsetli bitişik segmentler; string anahtarla groupby yapılmaz
+    store = CellSeriesStore.from_frame(df, columns=["week_idx", "rpt_capacity_Ah"], dtype=None)
+    if store.order is not None:
+        df = df.iloc[store.order]
+    df = df.reset_index(drop=True)
+    cap = store["rpt_capacity_Ah"]
+
+    # SOH ve SOH_next
+    first_cap = store.broadcast(store.first_valid(cap))
+    soh = pd.Series(cap / first_cap)
+    soh_next = store.shift(soh.to_numpy(), -1)
+
+    # Capacity fade per cycle
+    cap_fade = store.diff(cap)
+
+    # Basit C-rate hesaplama (varsayımsal)
+    if nominal_cap is None:
+        nominal_cap = pd.Series(first_cap).mean()
+    c_rate = df["rpt_capacity_Ah"] / nominal_cap if np.isfinite(nominal_cap) else np.nan
+
+    # Hücre başına son k noktanın eğimi, hücrenin tüm satırlarına yayılır
+    pos = store.position()
+    n_points = store.broadcast(store.lengths)
+    last_slope = store.broadcast(rolling_slope_last_k(store["week_idx"], soh, pos, k, rows=store.ends - 1))
+
+    out = pd.DataFrame({
+        "group_id": df["group_id"],
+        "cell_id": df["cell_id"],
+        "week_idx": df["week_idx"],
+        "SOH": soh,
+        "current_SOH": soh,
+        "weeks_since_start": df["week_idx"] - store.broadcast(store.first_valid("week_idx")),
+        "local_slope_k": last_slope,
+        "n_points_cell": n_points,
+        "SOH_next": soh_next,
+        "avgV_chg": df["avgV_chg"],
+        "avgV_dchg": df["avgV_dchg"],
+        "deltaV_hyst": df["deltaV_hyst"],
+        "cap_fade": cap_fade,
+        # Basit DoD (Discharge / Charge)
+        "DoD": np.nan,  # Placeholder
+        "C_rate": c_rate,
+        # Ham RPT kapasitesi (export_lod kapasite serisi; SOH'tan geri hesaplanamaz)
+        "rpt_capacity_Ah": df["rpt_capacity_Ah"],
+    })
+
+    if kalman is not None:
+        q, r = kalman
+        out["SOH_kf"] = native.kalman_smooth_batch(soh.to_numpy(), store.offsets, q=q, r=r)
+    return out
+
+def join_cycle_features(features, weekly, tolerance=None):
+    """
+    Her SOH satırına aynı hücrenin week_idx'e kadarki en son cycle hafta özetini ekler
+    (as-of, searchsorted): DoD yer tutucusu gerçek değerle dolar, C_rate_chg/C_rate_dchg eklenir,
+    cycle_week_idx eşleşen cycle haftasını gösterir. tolerance: en fazla kaç hafta geriye bakılır.
+    """
+    return asof_join(features, weekly, by=["group_id", "cell_id"], on="week_idx",
+                     columns=CYCLE_WEEK_COLS, tolerance=tolerance, matched_col="cycle_week_idx")
+
+def update_features(prev, df, affected, k, nominal_cap, prev_nominal_cap, kalman=None):
+    """
+    Önceki features tablosunda yalnızca etkilenen hücreleri yeniden hesaplar.
+    Diğer hücrelerin satırları aynen korunur; nominal kapasite değiştiyse sadece C_rate ölçeklenir.
+    """
+    aff = pd.MultiIndex.from_tuples(sorted(affected), names=["group_id","cell_id"])
+    prev_keys = pd.MultiIndex.from_frame(prev[["group_id","cell_id"]])
+    keep = prev[~prev_keys.isin(aff)].copy()
+    if nominal_cap != prev_nominal_cap:
+        keep["C_rate"] = keep["C_rate"] * (prev_nominal_cap / nominal_cap)
+
+    df_keys = pd.MultiIndex.from_frame(df[["group_id","cell_id"]])
+    parts = [keep]
+    if len(aff):
+        parts.append(build_features(df[df_keys.isin(aff)], k, nominal_cap, kalman=kalman))
+    out = pd.concat(parts, ignore_index=True)
+    return out.sort_values(["group_id","cell_id","week_idx"]).reset_index(drop=True)
+
 def main(args):
     cfg = load_config(args.config)
     data_root = Path(cfg["paths"]["data_root"])
@@ -138,31 +408,64 @@ def main(args):
     if args.limit:
         files = files[:args.limit]
 
+    # Artımlı mod: manifest'te değişmemiş görünen dosyalar yeniden ayrıştırılmaz
+    manifest = None
+    if getattr(args, "incremental", False):
+        manifest = FileManifest(out_dir / "manifest_rpt.json", schema=RPT_MANIFEST_SCHEMA)
+
+    parsed = {}
+    todo = files
+    removed = {}
+    if manifest is not None:
+        todo = []
+        for f in files:
+            hit, row = manifest.lookup(f)
+            if hit:
+                parsed[f] = tuple(row) if row is not None else None
+            else:
+                todo.append(f)
+        removed = manifest.prune(files)
+        print(f"[INFO] Manifest: önbellek={len(files) - len(todo)}, ayrıştırılacak={len(todo)}, silinen={len(removed)}")
+
+    stream = getattr(args, "stream", False)
+    if stream and not json_stream.available():
+        print("[WARN] --stream için ijson kurulu değil; dosyalar bellekte ayrıştırılacak.")
+
+    # Extraction plan: örnek dosyalardan anahtar yolları öğrenilir, kalanlar doğrudan okunur
+    plan = None
+    plan_sample = getattr(args, "plan_sample", 0)
+    if plan_sample and not stream:
+        plan = ExtractionPlan(RPT_PLAN_SLOTS)
+        for f in sample_files(todo, plan_sample):
+            j = load_rpt_json(f)
+            if j is not None:
+                plan.learn(j)
+
+    # parse_files toplam süreyi/throughput'u verir; alt aşamalar (işçilerde de) ayrıca kaydedilir
+    nbytes = sum(f.stat().st_size for f in todo) if instrument.enabled() else 0
+    with instrument.stage("parse_files", items=len(todo), nbytes=nbytes):
+        for f, res, status in iter_parsed_files(todo, workers=getattr(args, "workers", 1), stream=stream, plan=plan):
+            parsed[f] = res
+            if status is not None:
+                plan.record(status == "hit")
+            if manifest is not None:
+                manifest.update(f, list(res) if res is not None else None)
+    instrument.count("files_total", len(files))
+    instrument.count("files_parsed", len(todo))
+
+    if plan is not None:
+        print(f"[INFO] Extraction plan: {plan.report()}")
+
     rows = []
     cell_counters = {}
 
     for f in files:
-        try:
-            raw_text = f.read_text(encoding="utf-8")
-            j = json.loads(raw_text)
-            if isinstance(j, str):
-                j = json.loads(j)
-        except Exception:
-            try:
-                j = json.loads(f.read_text(encoding="latin-1"))
-            except Exception:
-                print(f"[WARN] Dosya okunamadı: {f}")
-                continue
-
-        cap = np.nan
-        avg_chg, avg_dchg = np.nan, np.nan
-
-        if isinstance(j, dict):
-            cap = pick_capacity(j)
-            avg_chg, avg_dchg = scan_for_voltage(j)
-        elif isinstance(j, list):
-            cap = extract_capacity_from_list(j)
+        if parsed[f] is None:
+            print(f"[WARN] Dosya okunamadı: {f}")
+            instrument.count("files_failed")
+            continue
 
+        cap, avg_chg, avg_dchg = parsed[f]
         if not np.isfinite(cap):
             print(f"[DEBUG] İşlenen dosya: {f.name} -> Kapasite bulunamadı!")
             continue
@@ -188,54 +491,82 @@ def main(args):
     if df.empty:
         raise RuntimeError("RPT_json içinden kapasite/hafta çıkarılamadı.")
 
-    # SOH ve SOH_next
-    df = df.sort_values(["group_id","cell_id","week_idx"])
-    df["first_cap"] = df.groupby(["group_id","cell_id"])["rpt_capacity_Ah"].transform("first")
-    df["SOH"] = df["rpt_capacity_Ah"] / df["first_cap"]
-    df["SOH_next"] = df.groupby(["group_id","cell_id"])["SOH"].shift(-1)
-
-    # Capacity fade per cycle
-    df["cap_fade"] = df.groupby(["group_id","cell_id"])["rpt_capacity_Ah"].diff()
-
-    # Basit DoD (Discharge / Charge)
-    df["DoD"] = np.nan  # Placeholder
-
-    # Basit C-rate hesaplama (varsayımsal)
-    nominal_cap = df["first_cap"].mean()
-    df["C_rate"] = df["rpt_capacity_Ah"] / nominal_cap if np.isfinite(nominal_cap) else np.nan
-
-    # Basit özellikler
-    feats = []
     k = max(3, int(cfg["soh"]["min_points_for_trend"]))
-    for (g,c), grp in df.groupby(["group_id","cell_id"]):
-        weeks = grp["week_idx"].tolist()
-        sohs  = grp["SOH"].tolist()
-        slope = local_slope_last_k(weeks, sohs, k=k)
-        for _, r in grp.iterrows():
-            feats.append({
-                "group_id": g,
-                "cell_id": c,
-                "week_idx": r["week_idx"],
-                "SOH": r["SOH"],
-                "current_SOH": r["SOH"],
-                "weeks_since_start": r["week_idx"] - grp["week_idx"].iloc[0],
-                "local_slope_k": slope,
-                "n_points_cell": len(grp),
-                "SOH_next": r["SOH_next"],
-                "avgV_chg": r["avgV_chg"],
-                "avgV_dchg": r["avgV_dchg"],
-                "deltaV_hyst": r["deltaV_hyst"],
-                "cap_fade": r["cap_fade"],
-                "DoD": r["DoD"],
-                "C_rate": r["C_rate"],
-            })
-
-    out = pd.DataFrame(feats)
-    out.to_parquet(out_dir / "features.parquet", index=False)
-    print(f"[OK] features.parquet -> {out_dir/'features.parquet'} | rows={len(out)}")
+    kalman = None
+    if getattr(args, "kalman", False):
+        kalman = (float(cfg["soh"].get("kalman_q", 1e-5)), float(cfg["soh"].get("kalman_r", 1e-3)))
+    nominal_cap = nominal_capacity(df)
+    out_path = out_dir / "features.parquet"
+
+    # Önceki çıktı bu manifest ile üretildiyse sadece etkilenen hücreler yeniden hesaplanır
+    meta = manifest.meta if manifest is not None else {}
+    reusable = (
+        manifest is not None and out_path.exists()
+        and meta.get("k") == k
+        and meta.get("kalman") == (list(kalman) if kalman else None)
+        and meta.get("features_mtime_ns") == out_path.stat().st_mtime_ns
+        and meta.get("features_schema") == FEATURES_SCHEMA
+        and np.isfinite(meta.get("nominal_cap", np.nan))
+        and bool(meta.get("join_cycles")) == getattr(args, "join_cycles", False)
+    )
+    affected = None
+    with instrument.stage("features", items=len(df)):
+        if reusable:
+            affected = {infer_ids_from_path(f) for f in todo}
+            affected |= {infer_ids_from_path(Path(p)) for p in removed}
+            out = update_features(pd.read_parquet(out_path), df, affected, k, nominal_cap, meta["nominal_cap"],
+                                  kalman=kalman)
+            print(f"[INFO] Artımlı güncelleme: yeniden hesaplanan hücre sayısı={len(affected)}")
+        else:
+            out = build_features(df, k, nominal_cap, kalman=kalman)
+
+    join_cycles = getattr(args, "join_cycles", False)
+    if join_cycles:
+        weekly_path = out_dir / "features_cycle_weekly.parquet"
+        if not weekly_path.exists():
+            raise FileNotFoundError(f"{weekly_path} yok; önce prepare_data_cycle.py çalıştırılmalı")
+        tolerance = (cfg.get("cycle") or {}).get("asof_tolerance_weeks")
+        with instrument.stage("cycle_join", items=len(out)):
+            out = join_cycle_features(out, read_features(weekly_path), tolerance)
+        print(f"[INFO] Cycle özellikleri eklendi: eşleşen satır={int(out['cycle_week_idx'].notna().sum())}/{len(out)}")
+
+    with instrument.stage("parquet_write", items=len(out)) as st:
+        out.to_parquet(out_path, index=False)
+        st.add(nbytes=out_path.stat().st_size)
+    print(f"[OK] features.parquet -> {out_path} | rows={len(out)}")
+
+    partitioned = getattr(args, "partitioned", False)
+    if partitioned:
+        ds_root = out_dir / "features"
+        # Artımlı modda sadece hücresi değişen grupların bölümleri yeniden yazılır
+        # (nominal kapasite değiştiyse tüm satırların C_rate'i değiştiğinden hepsi)
+        # (cycle özellikleri tüm hücreler için yeniden eklendiğinden --join-cycles ile de hepsi)
+        groups = None
+        if (reusable and meta.get("partitioned") and ds_root.exists() and nominal_cap == meta["nominal_cap"]
+                and not join_cycles):
+            groups = {g for g, _ in affected}
+        with instrument.stage("partition_write", items=len(out)):
+            write_partitioned(out, ds_root, sort_cols=("cell_id", "week_idx"), groups=groups)
+        n_parts = "tümü" if groups is None else len(groups)
+        print(f"[OK] features/ (group_id bölümlü) -> {ds_root} | yazılan bölüm={n_parts}")
+
+    if manifest is not None:
+        manifest.meta = {
+            "k": k,
+            "kalman": list(kalman) if kalman else None,
+            "nominal_cap": float(nominal_cap),
+            "features_mtime_ns": out_path.stat().st_mtime_ns,
+            "features_schema": FEATURES_SCHEMA,
+            "partitioned": partitioned,
+            "join_cycles": join_cycles,
+            # Son çalıştırmada yeniden hesaplanan hücreler (None = tam yeniden üretim)
+            "recomputed_cells": None if affected is None else [list(key) for key in sorted(affected)],
+        }
+        manifest.save()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--config", default="config.yaml")
-    parser.add_argument("--limit", type=int, default=None, help="İşlenecek dosya sayısını sınırla")
-    main(parser.parse_args())
+    add_args(parser)
+    args = parser.parse_args()
+    with instrument.profiled(args.profile, "prepare_rpt"):
+        main(args)
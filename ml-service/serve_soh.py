@@ -0,0 +1,427 @@
+"""
+serve_soh.py
+Hücre başına çevrimiçi SOH_next / RUL tahmin servisi (yerel HTTP, sadece stdlib).
+
+- Model (--model: train_soh --export artefaktı ya da joblib dosyası) başlangıçta bir kez yüklenir
+  ve sıcak tutulur. Artefaktlardaki RandomForest memmap ile açılır; aynı artefaktı kullanan
+  birden fazla servis süreci ormanın tek kopyasını paylaşır.
+- Her (group_id, cell_id) için bellekte kayan durum tutulur: son K SOH noktası,
+  eğim için yürüyen toplamlar (Σx, Σy, Σxx, Σxy) ve Kalman durumu (x, p).
+  Yeni bir RPT ölçümü O(1) güncellemedir; hiçbir istek geçmişi yeniden taramaz.
+- /predict istekleri bir mikro-batch kuyruğunda toplanır: pencere (--batch-window-ms)
+  veya --max-batch dolunca tüm hücreler tek model.predict çağrısıyla tahmin edilir.
+- /stats uç noktası başına p50/p99 gecikmeyi ve batch boyutlarını raporlar.
+
+Uç noktalar:
+  POST /observe  {"observations": [{"group_id", "cell_id", "week_idx", "capacity_Ah" | "SOH",
+                                    "avgV_chg"?, "avgV_dchg"?}, ...]}
+  POST /predict  {"cells": [{"group_id", "cell_id"}, ...]}
+  GET  /stats, GET /health
+"""
+
+import argparse, json, queue, threading, time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from utils import load_config
+from model_artifact import is_artifact, load_artifact
+from train_soh import FEATURE_COLS
+
+class WindowSums:
+    """Son k (x, y) noktası için yürüyen toplamlar; eğim/kesişim kapalı formda O(1)."""
+
+    __slots__ = ("k", "points", "sx", "sy", "sxx", "sxy")
+
+    def __init__(self, k):
+        self.k = k
+        self.points = deque()
+        self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+    def push(self, x, y):
+        self.points.append((x, y))
+        self.sx += x; self.sy += y; self.sxx += x * x; self.sxy += x * y
+        if len(self.points) > self.k:
+            ox, oy = self.points.popleft()
+            if np.isfinite(ox) and np.isfinite(oy):
+                self.sx -= ox; self.sy -= oy; self.sxx -= ox * ox; self.sxy -= ox * oy
+            else:
+                # NaN çıkarılarak geri alınamaz: pencere küçük, toplamları yeniden kur
+                xs = np.array([p[0] for p in self.points]); ys = np.array([p[1] for p in self.points])
+                self.sx, self.sy = xs.sum(), ys.sum()
+                self.sxx, self.sxy = (xs * xs).sum(), (xs * ys).sum()
+
+    def fit(self, min_points=2):
+        """(eğim, kesişim); min_points'ten az nokta ya da dejenere pencere -> (NaN, NaN)."""
+        n = len(self.points)
+        if n < max(2, min_points):
+            return np.nan, np.nan
+        den = n * self.sxx - self.sx * self.sx
+        if den <= 0.0:
+            return np.nan, np.nan
+        a = (n * self.sxy - self.sx * self.sy) / den
+        return a, (self.sy - a * self.sx) / n
+
+class CellState:
+    """Bir hücrenin çevrimiçi durumu (prepare_data_isu_ilcc.build_features'ın son satırı)."""
+
+    __slots__ = ("first_cap", "first_week", "week", "soh", "n_points", "avgV_chg", "avgV_dchg",
+                 "slope_win", "rul_win", "kf_x", "kf_p", "eol_week")
+
+    def __init__(self, k, rul_k):
+        self.first_cap = None
+        self.first_week = None
+        self.week = np.nan
+        self.soh = np.nan
+        self.n_points = 0
+        self.avgV_chg = np.nan
+        self.avgV_dchg = np.nan
+        self.slope_win = WindowSums(k)
+        self.rul_win = WindowSums(rul_k)
+        self.kf_x = np.nan
+        self.kf_p = None
+        self.eol_week = None
+
+    def observe(self, week, soh, q, r, p0, threshold):
+        if self.first_week is None:
+            self.first_week = week
+        self.week, self.soh = week, soh
+        self.n_points += 1
+        self.slope_win.push(week, soh)
+        # EOL'e inen hücrede RUL penceresi, eşikten önceki son noktada (origin) donar
+        if self.eol_week is None:
+            if np.isfinite(soh) and soh <= threshold:
+                self.eol_week = week
+            else:
+                self.rul_win.push(week, soh)
+
+        # kalman_smooth_batch ile aynı adım: ilk sonlu gözlem başlatır, NaN sadece tahmin
+        if not np.isfinite(soh):
+            if self.kf_p is not None:
+                self.kf_p += q
+            return
+        if self.kf_p is None:
+            self.kf_x, self.kf_p = soh, p0
+        p_prior = self.kf_p + q
+        gain = p_prior / (p_prior + r)
+        self.kf_x += gain * (soh - self.kf_x)
+        self.kf_p = (1.0 - gain) * p_prior
+
+    def features(self):
+        """FEATURE_COLS sırasıyla özellik vektörü (eğitimdeki gibi NaN -> 0.0)."""
+        slope, _ = self.slope_win.fit(min_points=self.slope_win.k)
+        dv = self.avgV_chg - self.avgV_dchg
+        row = [self.soh, self.week - self.first_week, slope, self.avgV_chg, self.avgV_dchg, dv]
+        return [v if np.isfinite(v) else 0.0 for v in row]
+
+    def rul(self, threshold):
+        """rul_linear.compute_rul_vectorized ile aynı kural: origin'e kadarki son K noktanın doğrusu."""
+        if not self.rul_win.points:
+            return np.nan
+        a, b = self.rul_win.fit()
+        if not (np.isfinite(a) and np.isfinite(b) and a < 0):
+            return np.nan
+        x_star = (threshold - b) / a
+        if not np.isfinite(x_star):
+            return np.nan
+        origin_week = self.rul_win.points[-1][0]
+        return max(0.0, x_star - origin_week)
+
+class LatencyStats:
+    """Uç nokta başına son N isteğin gecikmesi (ms)."""
+
+    def __init__(self, maxlen=10000):
+        self._lat = {}
+        self._count = {}
+        self._lock = threading.Lock()
+        self.maxlen = maxlen
+
+    def add(self, name, ms):
+        with self._lock:
+            self._lat.setdefault(name, deque(maxlen=self.maxlen)).append(ms)
+            self._count[name] = self._count.get(name, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            snap = {k: np.fromiter(v, float) for k, v in self._lat.items()}
+            counts = dict(self._count)
+        return {k: {"count": counts[k], "p50_ms": float(np.percentile(v, 50)),
+                    "p99_ms": float(np.percentile(v, 99)), "max_ms": float(v.max())}
+                for k, v in snap.items() if len(v)}
+
+def load_model(path):
+    """
+    Artefakt (sürüm dizini, models/<ad> dizini ya da manifest.json) veya joblib dosyası
+    (doğrudan tahminci ya da {"model": ..., "feature_cols": [...]} sözlüğü).
+    """
+    if is_artifact(path):
+        model, manifest = load_artifact(path, mmap_mode="r")
+        cols = manifest["feature_cols"]
+        print(f"[INFO] Model artefaktı: {manifest['name']} {manifest['version']} ({manifest['model_class']}, "
+              f"{manifest['format']})")
+    else:
+        import joblib
+        obj = joblib.load(path)
+        if isinstance(obj, dict):
+            model, cols = obj["model"], list(obj.get("feature_cols", FEATURE_COLS))
+        else:
+            model, cols = obj, FEATURE_COLS
+    if cols != FEATURE_COLS:
+        raise ValueError(f"Model özellikleri desteklenmiyor: {cols}")
+    return model
+
+class InferenceService:
+    """Hücre durumları + mikro-batch tahmin kuyruğu. HTTP katmanından bağımsız kullanılabilir."""
+
+    def __init__(self, model=None, k=3, rul_k=4, threshold=0.80, q=1e-5, r=1e-3, p0=1.0,
+                 batch_window_ms=2.0, max_batch=1024, start=True):
+        self.model = model
+        self.k, self.rul_k, self.threshold = k, rul_k, threshold
+        self.q, self.r, self.p0 = q, r, p0
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.cells = {}
+        self.lock = threading.Lock()
+        self.latency = LatencyStats()
+        self.batch_sizes = deque(maxlen=10000)
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._batch_loop, daemon=True)
+        if start:
+            self.start()
+
+    def start(self):
+        """Batch işçisini başlatır (start=False ile kurulduysa; kuyruktaki istekler ilk batch'te toplanır)."""
+        if self._worker.ident is None:
+            self._worker.start()
+
+    # --- durum ---
+
+    def observe(self, obs):
+        """obs: gözlem sözlükleri listesi (hafta sırasıyla) -> (işlenen gözlem sayısı, hatalar)."""
+        errors = []
+        with self.lock:
+            for o in obs:
+                key = (o["group_id"], o["cell_id"])
+                st = self.cells.get(key)
+                if st is None:
+                    st = self.cells[key] = CellState(self.k, self.rul_k)
+                if "SOH" in o and o["SOH"] is not None:
+                    soh = float(o["SOH"])
+                else:
+                    cap = float(o["capacity_Ah"]) if o.get("capacity_Ah") is not None else np.nan
+                    if st.first_cap is None and np.isfinite(cap):
+                        st.first_cap = cap
+                    if st.first_cap is None and st.n_points:
+                        errors.append({"group_id": key[0], "cell_id": key[1],
+                                       "error": "ilk kapasite bilinmiyor; SOH gönderin"})
+                        continue
+                    soh = cap / st.first_cap if st.first_cap else np.nan
+                for name in ("avgV_chg", "avgV_dchg"):
+                    if o.get(name) is not None:
+                        setattr(st, name, float(o[name]))
+                st.observe(float(o["week_idx"]), soh, self.q, self.r, self.p0, self.threshold)
+        return len(obs) - len(errors), errors
+
+    def _snapshot(self, keys):
+        with self.lock:
+            out = []
+            for key in keys:
+                st = self.cells.get(key)
+                if st is None or st.n_points == 0:
+                    out.append(None)
+                    continue
+                slope, _ = st.slope_win.fit(min_points=st.slope_win.k)
+                out.append({
+                    "features": st.features(),
+                    "SOH": st.soh,
+                    "SOH_kf": st.kf_x,
+                    "local_slope_k": slope,
+                    "RUL_weeks": 0.0 if st.eol_week is not None else st.rul(self.threshold),
+                    "eol_reached": st.eol_week is not None,
+                    "n_points": st.n_points,
+                })
+            return out
+
+    # --- mikro-batch ---
+
+    def predict(self, keys, timeout=10.0):
+        """keys: [(group_id, cell_id), ...] -> tahmin sözlükleri (bilinmeyen hücre -> error)."""
+        snaps = self._snapshot(keys)
+        fut = Future()
+        rows = [s["features"] for s in snaps if s is not None]
+        if self.model is not None and rows:
+            self._queue.put((np.asarray(rows, dtype=float), fut))
+            preds = iter(fut.result(timeout=timeout))
+        else:
+            preds = iter(())
+
+        out = []
+        for (g, c), s in zip(keys, snaps):
+            if s is None:
+                out.append({"group_id": g, "cell_id": c, "error": "bilinmeyen hücre"})
+                continue
+            rec = {"group_id": g, "cell_id": c}
+            rec.update({k: v for k, v in s.items() if k != "features"})
+            rec["SOH_next"] = float(next(preds)) if self.model is not None else None
+            out.append({k: (None if isinstance(v, float) and not np.isfinite(v) else v)
+                        for k, v in rec.items()})
+        return out
+
+    def _batch_loop(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = [first]
+            n_rows = len(first[0])
+            deadline = time.perf_counter() + self.batch_window
+            while n_rows < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            try:
+                X = np.vstack([x for x, _ in batch])
+                y = self.model.predict(X)
+                self.batch_sizes.append(len(X))
+                pos = 0
+                for x, fut in batch:
+                    fut.set_result(y[pos:pos + len(x)])
+                    pos += len(x)
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+
+    def stats(self):
+        sizes = np.fromiter(self.batch_sizes, float)
+        return {
+            "cells": len(self.cells),
+            "model": type(self.model).__name__ if self.model is not None else None,
+            "latency": self.latency.summary(),
+            "batches": {"count": len(sizes),
+                        "mean_rows": float(sizes.mean()) if len(sizes) else 0.0,
+                        "max_rows": int(sizes.max()) if len(sizes) else 0},
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._worker.ident is not None:
+            self._worker.join(timeout=1.0)
+
+    def warm_from_features(self, path):
+        """features.parquet (ya da bölümlü features/) içindeki SOH geçmişini hücre durumlarına yeniden oynatır."""
+        from feature_store import read_features
+        df = read_features(path, columns=["group_id", "cell_id", "week_idx", "SOH", "avgV_chg", "avgV_dchg"])
+        df = df.sort_values(["group_id", "cell_id", "week_idx"])
+        self.observe(df.to_dict("records"))
+        return len(df)
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):   # erişim günlüğü gecikmeyi bozmasın
+            pass
+
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            n = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(n) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send(200, service.stats())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok", "cells": len(service.cells)})
+            else:
+                self._send(404, {"error": "bilinmeyen yol"})
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            try:
+                req = self._read_json()
+                if self.path == "/observe":
+                    obs = req.get("observations", [req] if "cell_id" in req else [])
+                    n, errors = service.observe(obs)
+                    payload = {"updated": n, "errors": errors}
+                elif self.path == "/predict":
+                    keys = [(c["group_id"], c["cell_id"]) for c in req.get("cells", [])]
+                    payload = {"predictions": service.predict(keys)}
+                else:
+                    self._send(404, {"error": "bilinmeyen yol"})
+                    return
+            except (KeyError, TypeError, ValueError) as e:
+                self._send(400, {"error": f"geçersiz istek: {e}"})
+                return
+            except Exception as e:
+                self._send(500, {"error": str(e)})
+                return
+            # Yanıttan önce kaydedilir: istemci yanıtı aldığında /stats bu isteği içerir
+            service.latency.add(self.path, (time.perf_counter() - t0) * 1000.0)
+            self._send(200, payload)
+
+    return Handler
+
+def build_service(args):
+    cfg = load_config(args.config)
+    soh_cfg = cfg.get("soh", {})
+    model = load_model(args.model) if args.model else None
+    service = InferenceService(
+        model=model,
+        k=max(3, int(soh_cfg.get("min_points_for_trend", 3))),
+        rul_k=args.rul_k,
+        threshold=float(soh_cfg.get("eol_threshold", 0.80)),
+        q=float(soh_cfg.get("kalman_q", 1e-5)),
+        r=float(soh_cfg.get("kalman_r", 1e-3)),
+        batch_window_ms=args.batch_window_ms,
+        max_batch=args.max_batch,
+    )
+    if args.warm_from:
+        n = service.warm_from_features(args.warm_from)
+        print(f"[INFO] {args.warm_from} -> {len(service.cells)} hücre, {n} gözlem yüklendi")
+    return service
+
+def main(args):
+    service = build_service(args)
+    if service.model is None:
+        print("[WARN] --model verilmedi: SOH_next döndürülmeyecek (RUL ve SOH_kf çalışır).")
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"[OK] serve_soh dinliyor -> http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--model", default=None,
+                        help="SOH_next modeli: out_dir/models/<ad>[/vNNNN] artefaktı ya da joblib dosyası")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rul-k", type=int, default=4, help="RUL doğrusu için son K nokta")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0,
+                        help="Mikro-batch toplama penceresi (ms)")
+    parser.add_argument("--max-batch", type=int, default=1024, help="Tek predict çağrısındaki en fazla satır")
+    parser.add_argument("--warm-from", default=None, help="Durumları bu features.parquet'ten başlat")
+    main(parser.parse_args())
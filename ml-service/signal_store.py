@@ -0,0 +1,141 @@
+"""
+Cycle verileri için sütunlu, memory-map edilebilen ham sinyal deposu.
+- Her kanal (V_charge, I_discharge, ...) tek bir ham float64 dosyasıdır: <kanal>.f64
+- index.parquet her cycle için (group_id, cell_id, cycle) anahtarını ve kanal başına
+  (başlangıç, uzunluk) ofsetlerini tutar.
+- Yazıcı cycle'ları (group_id, cell_id, cycle) sırasıyla ekler; böylece bir hücrenin tüm
+  cycle'ları her kanalda bitişiktir ve np.memmap üzerinden kopyasız dilimlenebilir.
+"""
+import json, os
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+DTYPE = np.dtype("<f8")
+
+def _flat(values):
+    """Liste/iç içe listeyi tek boyutlu float64 diziye çevirir (düzensiz listelere toleranslı)."""
+    try:
+        return np.asarray(values, dtype=DTYPE).ravel()
+    except (TypeError, ValueError):
+        out = []
+
+        def walk(x):
+            if isinstance(x, (list, tuple, np.ndarray)):
+                for it in x:
+                    walk(it)
+            elif isinstance(x, (int, float)):
+                out.append(float(x))
+
+        walk(values)
+        return np.asarray(out, dtype=DTYPE)
+
+class SignalStoreWriter:
+    """Cycle dizilerini kanal dosyalarının sonuna parça parça ekler (bellekte tek dosya kadar veri)."""
+
+    def __init__(self, root, channels):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.channels = list(channels)
+        self._fh = {ch: open(self.root / f"{ch}.f64", "wb") for ch in self.channels}
+        self._pos = {ch: 0 for ch in self.channels}
+        self._index = []
+
+    def append(self, key, arrays):
+        """key: {"group_id", "cell_id", "cycle", ...}; arrays: {kanal: liste/dizi}."""
+        rec = dict(key)
+        for ch in self.channels:
+            arr = _flat(arrays.get(ch, ()))
+            arr.tofile(self._fh[ch])
+            rec[f"{ch}_start"] = self._pos[ch]
+            rec[f"{ch}_len"] = len(arr)
+            self._pos[ch] += len(arr)
+        self._index.append(rec)
+
+    def close(self):
+        for fh in self._fh.values():
+            fh.close()
+        pd.DataFrame(self._index).to_parquet(self.root / "index.parquet", index=False)
+        meta = {"version": STORE_VERSION, "dtype": DTYPE.str, "channels": self.channels,
+                "n_cycles": len(self._index), "n_samples": self._pos}
+        tmp = self.root / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self.root / "meta.json")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class SignalStore:
+    """
+    Salt okunur depo. Kanallar np.memmap ile açılır; cycle/hücre dilimleri kopyasız görünümdür.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.meta = json.loads((self.root / "meta.json").read_text(encoding="utf-8"))
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Desteklenmeyen signal store sürümü: {self.meta.get('version')}")
+        self.channels = self.meta["channels"]
+        self.index = pd.read_parquet(self.root / "index.parquet")
+        self._maps = {}
+
+        # (group_id, cell_id) -> [ilk satır, son satır + 1)
+        g = self.index["group_id"].to_numpy()
+        c = self.index["cell_id"].to_numpy()
+        n = len(self.index)
+        new_cell = np.ones(n, dtype=bool)
+        new_cell[1:] = (g[1:] != g[:-1]) | (c[1:] != c[:-1])
+        starts = np.flatnonzero(new_cell)
+        ends = np.append(starts[1:], n)
+        self._cells = {(g[s], c[s]): (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    def channel(self, ch):
+        """Kanalın tamamı (memmap; boş kanal için boş dizi)."""
+        if ch not in self._maps:
+            path = self.root / f"{ch}.f64"
+            if path.stat().st_size == 0:
+                self._maps[ch] = np.empty(0, dtype=DTYPE)
+            else:
+                self._maps[ch] = np.memmap(path, dtype=DTYPE, mode="r")
+        return self._maps[ch]
+
+    def cells(self):
+        return list(self._cells)
+
+    def cell_rows(self, group_id, cell_id):
+        """Hücrenin index satırları (bitişik)."""
+        s, e = self._cells[(group_id, cell_id)]
+        return self.index.iloc[s:e]
+
+    def cycle(self, row, ch):
+        """index'in row. satırındaki cycle'ın kanal verisi (görünüm)."""
+        start = int(self.index[f"{ch}_start"].iat[row])
+        length = int(self.index[f"{ch}_len"].iat[row])
+        return self.channel(ch)[start:start + length]
+
+    def offsets(self, ch):
+        """
+        Kanalın tamamı için cycle sınırları (uzunluk = cycle sayısı + 1). Cycle'lar index
+        sırasıyla bitişik yazıldığından channel(ch) tek parça olarak segmentlenebilir.
+        """
+        starts = self.index[f"{ch}_start"].to_numpy(dtype=np.int64)
+        lens = self.index[f"{ch}_len"].to_numpy(dtype=np.int64)
+        stop = int(starts[-1] + lens[-1]) if len(starts) else 0
+        return np.append(starts, stop)
+
+    def cell(self, group_id, cell_id, ch):
+        """
+        Hücrenin kanal verisi tek bir kopyasız görünüm olarak ve cycle sınırları
+        (görünüme göre ofsetler, uzunluk = cycle sayısı + 1) ile döner.
+        """
+        s, e = self._cells[(group_id, cell_id)]
+        starts = self.index[f"{ch}_start"].to_numpy()[s:e]
+        lens = self.index[f"{ch}_len"].to_numpy()[s:e]
+        base = int(starts[0]) if len(starts) else 0
+        stop = int(starts[-1] + lens[-1]) if len(starts) else 0
+        offsets = np.append(starts - base, stop - base)
+        return self.channel(ch)[base:stop], offsets
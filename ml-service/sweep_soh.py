@@ -0,0 +1,167 @@
+"""
+sweep_soh.py
+config.yaml'daki `sweep:` bölümüyle SOH_next modelleri için hiperparametre / özellik alt kümesi taraması.
+
+- Arama: grid (tüm kombinasyonlar) ya da random (grid'den n_iter örnek).
+- GroupKFold bölmeleri bir kez hesaplanır; (özellik kümesi, fold) eğitim/test matrisleri önbelleğe alınır.
+- RandomForest'ta n_estimators listesi ayrı aday değildir: orman warm_start ile en küçük değerden
+  büyütülür ve her ara boyutta skorlanır (100 ağaç = 50 ağaç + 50 yeni ağaç, sıfırdan eğitimle aynı).
+- Successive halving: tüm adaylar önce ilk min_folds fold'da değerlendirilir; her basamakta en iyi
+  1/eta kısmı kalır ve fold sayısı eta katına çıkar; tüm fold'ları tamamlayan adaylar raporlanır.
+"""
+import itertools, json, math, time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from sklearn.model_selection import GroupKFold
+
+MODEL_TYPES = {
+    "rf": RandomForestRegressor,
+    "linreg": LinearRegression,
+    "ridge": Ridge,
+}
+
+def expand_grid(space):
+    """{param: [değerler]} -> parametre sözlükleri listesi (tek değerler listeye sarılır)."""
+    keys = sorted(space)
+    values = [v if isinstance(v, list) else [v] for v in (space[k] for k in keys)]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def build_candidates(sweep_cfg, default_features, seed=42):
+    """Aday listesi: {"model", "params", "features", "n_levels"}; random aramada grid'den örneklenir."""
+    feature_sets = sweep_cfg.get("feature_sets") or {"default": list(default_features)}
+    candidates = []
+    for model_name, space in (sweep_cfg.get("models") or {}).items():
+        if model_name not in MODEL_TYPES:
+            raise ValueError(f"Bilinmeyen model tipi: {model_name} (seçenekler: {sorted(MODEL_TYPES)})")
+        space = dict(space or {})
+        n_levels = [None]
+        if model_name == "rf":
+            n_est = space.pop("n_estimators", [100])
+            n_levels = sorted(set(n_est if isinstance(n_est, list) else [n_est]))
+        for params in expand_grid(space):
+            for fs_name in feature_sets:
+                candidates.append({"model": model_name, "params": params,
+                                   "features": fs_name, "n_levels": n_levels})
+
+    if sweep_cfg.get("search", "grid") == "random":
+        n_iter = int(sweep_cfg.get("n_iter", 20))
+        if n_iter < len(candidates):
+            rng = np.random.default_rng(sweep_cfg.get("seed", seed))
+            pick = np.sort(rng.choice(len(candidates), size=n_iter, replace=False))
+            candidates = [candidates[i] for i in pick]
+    return candidates, feature_sets
+
+class FoldCache:
+    """(özellik kümesi, fold) -> (X_train, y_train, X_test, y_test); her matris bir kez kopyalanır."""
+
+    def __init__(self, df, feature_sets, y, splits):
+        self.df = df
+        self.feature_sets = feature_sets
+        self.y = y
+        self.splits = splits
+        self._full = {}
+        self._folds = {}
+
+    def get(self, fs_name, fold):
+        key = (fs_name, fold)
+        if key not in self._folds:
+            if fs_name not in self._full:
+                cols = self.feature_sets[fs_name]
+                self._full[fs_name] = self.df[cols].fillna(0.0).to_numpy(dtype=float)
+            X = self._full[fs_name]
+            tr, te = self.splits[fold]
+            self._folds[key] = (X[tr], self.y[tr], X[te], self.y[te])
+        return self._folds[key]
+
+def _scores(y_true, y_pred):
+    return (float(mean_absolute_error(y_true, y_pred)),
+            float(np.sqrt(mean_squared_error(y_true, y_pred))))
+
+def evaluate_candidate_fold(cand, data, n_jobs=1, seed=42):
+    """Adayı tek fold'da değerlendirir -> (n_levels sırasıyla [(mae, rmse)], fit süresi)."""
+    X_tr, y_tr, X_te, y_te = data
+    t0 = time.perf_counter()
+    out = []
+    if cand["model"] == "rf":
+        model = RandomForestRegressor(warm_start=True, random_state=seed, n_jobs=n_jobs, **cand["params"])
+        for n in cand["n_levels"]:
+            model.set_params(n_estimators=n)
+            model.fit(X_tr, y_tr)      # warm_start: sadece eksik ağaçlar eğitilir
+            out.append(_scores(y_te, model.predict(X_te)))
+    else:
+        model = MODEL_TYPES[cand["model"]](**cand["params"]).fit(X_tr, y_tr)
+        out.append(_scores(y_te, model.predict(X_te)))
+    return out, time.perf_counter() - t0
+
+def run_sweep(df, y, groups, sweep_cfg, default_features, n_jobs=1, seed=42):
+    """Taramayı çalıştırır; her (aday, n_estimators) için bir satırlık sonuç tablosu döndürür."""
+    candidates, feature_sets = build_candidates(sweep_cfg, default_features, seed)
+    if not candidates:
+        raise ValueError("Taranacak aday yok: sweep.models boş ya da grid/n_iter hiç aday üretmiyor")
+    n_groups = len(np.unique(groups))
+    n_splits = min(int(sweep_cfg.get("n_splits", 5)), n_groups)
+    if n_splits < 2:
+        raise ValueError(f"Tarama için en az 2 grup gerekli (grup sayısı={n_groups})")
+    splits = list(GroupKFold(n_splits=n_splits).split(df, y, groups))
+    cache = FoldCache(df, feature_sets, y, splits)
+
+    halving = sweep_cfg.get("halving") or {}
+    eta = max(2, int(halving.get("eta", 3)))
+    min_folds = max(1, min(n_splits, int(halving.get("min_folds", 1))))
+    if not halving.get("enabled", True):
+        min_folds = n_splits
+
+    scores = {i: [] for i in range(len(candidates))}      # aday -> fold başına [(mae, rmse)] listesi
+    fit_s = {i: 0.0 for i in range(len(candidates))}
+    pruned_at = {}
+    alive = list(range(len(candidates)))
+    done, rung = 0, 0
+    print(f"[INFO] Sweep: {len(candidates)} aday, {n_splits} fold, halving eta={eta}, ilk basamak={min_folds} fold")
+
+    while alive:
+        target = min(n_splits, min_folds * eta ** rung)
+        for cid in alive:
+            for fold in range(done, target):
+                res, sec = evaluate_candidate_fold(candidates[cid], cache.get(candidates[cid]["features"], fold),
+                                                   n_jobs=n_jobs, seed=seed)
+                scores[cid].append(res)
+                fit_s[cid] += sec
+        done = target
+        if done == n_splits:
+            break
+
+        # Adayın skoru: en iyi n_estimators seviyesindeki ortalama MAE
+        best_mae = {cid: np.mean(scores[cid], axis=0)[:, 0].min() for cid in alive}
+        ranked = sorted(alive, key=lambda cid: best_mae[cid])
+        keep = max(1, math.ceil(len(alive) / eta))
+        for cid in ranked[keep:]:
+            pruned_at[cid] = done
+        print(f"[INFO] Basamak {rung}: {done} fold sonrası {len(alive)} adaydan {keep} kaldı")
+        alive = ranked[:keep]
+        rung += 1
+
+    rows = []
+    for cid, cand in enumerate(candidates):
+        per_fold = np.asarray(scores[cid])       # (fold, seviye, 2)
+        for li, n in enumerate(cand["n_levels"]):
+            rows.append({
+                "model": cand["model"],
+                "params": json.dumps(cand["params"], sort_keys=True),
+                "features": cand["features"],
+                "n_estimators": n,
+                "folds_done": len(per_fold),
+                "mae_mean": float(per_fold[:, li, 0].mean()),
+                "mae_std": float(per_fold[:, li, 0].std()),
+                "rmse_mean": float(per_fold[:, li, 1].mean()),
+                "pruned_after_folds": pruned_at.get(cid),
+                "fit_s": fit_s[cid],
+            })
+    res = pd.DataFrame(rows)
+    for col in ("n_estimators", "pruned_after_folds"):
+        res[col] = res[col].astype("Int64")
+    # Tüm fold'ları tamamlayanlar önce, sonra MAE
+    res["complete"] = res["folds_done"] == n_splits
+    return res.sort_values(["complete", "mae_mean"], ascending=[False, True]).reset_index(drop=True)
@@ -0,0 +1,144 @@
+"""
+synth_data.py
+ISU-ILCC düzeninde sentetik RPT ve cycle JSON ağacı üretir (gerçek veri seti olmadan benchmark/test için).
+
+Dizin yapısı (out altında):
+  rpt/G1/C1/RPT_W001.json         -> {"capacity_discharge_C_5": [...], "meta": {"QV_charge_C_5": [...], ...}}
+  cycle/Cycle_json/G1/C1/cycle_0001.json -> {"cycle": 1, "data": {"capacity_charge_Ah": [...], "V_charge": [...], ...}}
+  config_rpt.yaml / config_cycle.yaml  -> prepare_data_isu_ilcc / prepare_data_cycle için hazır config
+  synth_meta.json                  -> üretim parametreleri ve dosya/bayt sayıları
+
+- Anahtarlar scan_for_capacity (CAP_KEYS, iç içe QV_*) ve scan_cycle (alt metin eşleşmesi) ile bulunur.
+- Kapasite hafta hafta doğrusal + diz noktalı (knee) bir eğriyle düşer; hücrelerin bir kısmı
+  EOL eşiğinin (SOH 0.80) altına iner, böylece RUL değerlendirmesinde sansürsüz hücreler olur.
+- trace_len: her dosyadaki voltaj/akım dizisinin uzunluğu (dosya boyutunu ölçekler).
+- Aynı parametreler + seed her zaman aynı ağacı üretir.
+"""
+import argparse, json, shutil
+from pathlib import Path
+import numpy as np
+import yaml
+
+NOMINAL_CAP = 2.0
+
+def capacity_curve(rng, n_weeks):
+    """Bir hücrenin haftalık RPT kapasiteleri (Ah)."""
+    cap0 = NOMINAL_CAP * rng.normal(0.96, 0.015)
+    fade = rng.uniform(0.001, 0.008)              # haftalık göreli kayıp
+    knee = rng.uniform(0.4, 1.0) * n_weeks         # diz sonrası kayıp hızlanır
+    w = np.arange(n_weeks, dtype=float)
+    soh = 1.0 - fade * w - 2.5 * fade * np.clip(w - knee, 0, None)
+    soh += rng.normal(0, 0.002, n_weeks)
+    return cap0 * np.clip(soh, 0.3, None)
+
+def _trace(rng, center, spread, n):
+    return np.round(center + rng.normal(0, spread, n), 6).tolist()
+
+def rpt_document(rng, cap, trace_len):
+    """Tek RPT dosyası: birkaç kapasite ölçümü ve QV eğrileri meta altında."""
+    return {
+        "capacity_discharge_C_5": np.round(cap + rng.normal(0, 0.002, 5), 6).tolist(),
+        "meta": {
+            "QV_charge_C_5": _trace(rng, 3.74, 0.03, trace_len),
+            "QV_discharge_C_5": _trace(rng, 3.64, 0.03, trace_len),
+        },
+    }
+
+def cycle_document(rng, cycle, cap, trace_len):
+    """Tek cycle dosyası: kapasite, V ve I dizileri data altında."""
+    n_cap = max(1, trace_len // 100)
+    return {
+        "cycle": cycle,
+        "data": {
+            "capacity_charge_Ah": np.round(cap * 1.02 + rng.normal(0, 0.01, n_cap), 6).tolist(),
+            "capacity_discharge_Ah": np.round(cap + rng.normal(0, 0.01, n_cap), 6).tolist(),
+            "V_charge": _trace(rng, 3.75, 0.1, trace_len),
+            "V_discharge": _trace(rng, 3.6, 0.1, trace_len),
+            "I_charge": _trace(rng, 1.0, 0.05, trace_len),
+            "I_discharge": _trace(rng, -1.5, 0.05, trace_len),
+        },
+    }
+
+def _write_json(path, doc):
+    text = json.dumps(doc, separators=(",", ":"))
+    path.write_text(text, encoding="utf-8")
+    return len(text)
+
+def generate(out, groups=3, cells=4, weeks=20, cycles=10, trace_len=200, seed=0, overwrite=False):
+    """
+    Ağacı out altına yazar ve synth_meta.json içeriğini döndürür.
+    Aynı parametrelerle üretilmiş bir ağaç zaten varsa (overwrite=False) yeniden yazılmaz.
+    """
+    out = Path(out)
+    params = {"groups": groups, "cells": cells, "weeks": weeks, "cycles": cycles,
+              "trace_len": trace_len, "seed": seed}
+    meta_path = out / "synth_meta.json"
+    if meta_path.exists() and not overwrite:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("params") == params:
+            return meta
+    if out.exists():
+        shutil.rmtree(out)
+
+    rng = np.random.default_rng(seed)
+    rpt_root, cycle_root = out / "rpt", out / "cycle"
+    n_rpt = n_cycle = rpt_bytes = cycle_bytes = 0
+    for g in range(1, groups + 1):
+        for c in range(1, cells + 1):
+            caps = capacity_curve(rng, weeks)
+
+            cell_dir = rpt_root / f"G{g}" / f"C{c}"
+            cell_dir.mkdir(parents=True)
+            for w, cap in enumerate(caps, 1):
+                rpt_bytes += _write_json(cell_dir / f"RPT_W{w:03d}.json", rpt_document(rng, cap, trace_len))
+                n_rpt += 1
+
+            if cycles:
+                cell_dir = cycle_root / "Cycle_json" / f"G{g}" / f"C{c}"
+                cell_dir.mkdir(parents=True)
+                # Cycle'lar hücrenin ömrüne eşit aralıkla yayılır
+                cap_at = np.interp(np.linspace(0, weeks - 1, cycles), np.arange(weeks), caps)
+                for n, cap in enumerate(cap_at, 1):
+                    cycle_bytes += _write_json(cell_dir / f"cycle_{n:04d}.json",
+                                               cycle_document(rng, n, cap, trace_len))
+                    n_cycle += 1
+
+    configs, out_dirs = {}, {}
+    for name, root in (("rpt", rpt_root), ("cycle", cycle_root)):
+        cfg = {
+            "paths": {"data_root": str(root.resolve()), "out_dir": str((out / f"out_{name}").resolve())},
+            "random_seed": seed,
+            "nominal_capacity_Ah": NOMINAL_CAP,
+            "soh": {"eol_threshold": 0.80, "min_points_for_trend": 3},
+        }
+        path = out / f"config_{name}.yaml"
+        path.write_text(yaml.safe_dump(cfg, sort_keys=False), encoding="utf-8")
+        configs[name] = str(path)
+        out_dirs[name] = cfg["paths"]["out_dir"]
+
+    meta = {
+        "params": params,
+        "rpt_files": n_rpt, "rpt_bytes": rpt_bytes,
+        "cycle_files": n_cycle, "cycle_bytes": cycle_bytes,
+        "configs": configs,
+        "out_dirs": out_dirs,
+    }
+    meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", required=True, help="Çıktı dizini")
+    parser.add_argument("--groups", type=int, default=3)
+    parser.add_argument("--cells", type=int, default=4, help="Grup başına hücre sayısı")
+    parser.add_argument("--weeks", type=int, default=20, help="Hücre başına RPT (hafta) sayısı")
+    parser.add_argument("--cycles", type=int, default=10, help="Hücre başına cycle dosyası (0 = yok)")
+    parser.add_argument("--trace-len", type=int, default=200, help="Dosya başına V/I dizisi uzunluğu")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--overwrite", action="store_true", help="Aynı parametreli ağaç varsa da yeniden üret")
+    args = parser.parse_args()
+    meta = generate(args.out, args.groups, args.cells, args.weeks, args.cycles, args.trace_len,
+                    args.seed, args.overwrite)
+    print(f"[OK] Sentetik veri -> {args.out} | RPT={meta['rpt_files']} dosya "
+          f"({meta['rpt_bytes'] / 1e6:.1f} MB), cycle={meta['cycle_files']} dosya "
+          f"({meta['cycle_bytes'] / 1e6:.1f} MB)")
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# ml-service script'leri paket değil; testler modülleri doğrudan import edebilsin
+ML_SERVICE = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ML_SERVICE))
+sys.path.insert(0, str(ML_SERVICE.parent))
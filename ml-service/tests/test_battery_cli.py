@@ -0,0 +1,77 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+import battery
+import cli_args
+from tests.test_rul_engine import synthetic_soh_frame
+from utils import load_config
+
+ML_SERVICE = Path(__file__).resolve().parents[1]
+
+
+def _config(tmp_path, **extra):
+    cfg = {"paths": {"data_root": str(tmp_path), "out_dir": str(tmp_path / "out")},
+           "soh": {"eol_threshold": 0.9}, **extra}
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+    return path
+
+
+def test_health_does_not_import_heavy_modules(tmp_path):
+    config = _config(tmp_path)
+    code = ("import sys, battery; rc = battery.main(['--config', sys.argv[1], '--quiet', 'health']);"
+            "print(rc, sorted(m for m in ('pandas', 'numpy', 'sklearn') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code, str(config)], cwd=ML_SERVICE,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "0 []"
+
+
+def test_subcommand_help_does_not_import_heavy_modules(tmp_path):
+    config = _config(tmp_path)
+    code = ("import sys, battery\n"
+            "for cmd in [c for c, (mod, *_) in battery.COMMANDS.items() if mod]:\n"
+            "    try:\n"
+            "        battery.main(['--config', sys.argv[1], '--quiet', cmd, '--help'])\n"
+            "    except SystemExit as e:\n"
+            "        assert e.code == 0, cmd\n"
+            "print(sorted(m for m in ('pandas', 'numpy', 'sklearn') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code, str(config)], cwd=ML_SERVICE,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+
+
+def test_train_soh_import_is_light():
+    code = "import sys, train_soh; print(sorted(m for m in ('pandas', 'sklearn', 'pyarrow') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ML_SERVICE, capture_output=True, text=True, check=True).stdout
+    assert out.strip().splitlines()[-1] == "[]"
+
+
+def test_cli_choices_match_module_tables():
+    import bench, export_lod, rul_linear
+    assert sorted(cli_args.RUL_ENGINE_NAMES) == sorted(rul_linear.RUL_ENGINES)
+    assert sorted(cli_args.LOD_METHODS) == sorted(export_lod.METHODS)
+    assert list(cli_args.BENCH_SCALES) == list(bench.SCALES)
+    assert set(cli_args.ADD_ARGS) == {mod for mod, *_ in battery.COMMANDS.values() if mod}
+
+
+def test_rul_defaults_come_from_config(tmp_path):
+    config = _config(tmp_path)
+    (tmp_path / "out").mkdir()
+    synthetic_soh_frame().to_parquet(tmp_path / "out" / "features.parquet", index=False)
+
+    assert battery.main(["--config", str(config), "--quiet", "rul", "--k", "3"]) == 0
+    res = pd.read_parquet(tmp_path / "out" / "rul_linear.parquet")
+    assert (res["threshold"] == 0.9).all() and (res["k_used"] == 3).all()
+
+
+def test_load_config_parses_once_and_returns_copies(tmp_path):
+    config = _config(tmp_path)
+    a = load_config(config)
+    a["soh"]["eol_threshold"] = 0.5
+    assert load_config(config)["soh"]["eol_threshold"] == 0.9
+    config.write_text(config.read_text().replace("0.9", "0.7"))
+    assert load_config(config)["soh"]["eol_threshold"] == 0.7
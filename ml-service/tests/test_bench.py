@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import bench
+import synth_data
+from prepare_data_cycle import cycle_means
+from prepare_data_isu_ilcc import infer_ids_from_path, load_rpt_json, summarize_rpt_json
+
+TINY = {"groups": 2, "cells": 2, "weeks": 8, "cycles": 3, "trace_len": 50}
+
+
+def test_synthetic_tree_matches_scanners(tmp_path):
+    meta = synth_data.generate(tmp_path / "d", seed=1, **TINY)
+    assert meta["rpt_files"] == 2 * 2 * 8 and meta["cycle_files"] == 2 * 2 * 3
+
+    rpt = sorted((tmp_path / "d" / "rpt").rglob("*.json"))
+    assert infer_ids_from_path(rpt[0]) == ("G1", "C1")
+    (cap, avg_chg, avg_dchg), _ = summarize_rpt_json(load_rpt_json(rpt[0]))
+    assert 1.7 < cap < 2.1 and np.isfinite(avg_chg) and np.isfinite(avg_dchg)
+
+    cyc = sorted((tmp_path / "d" / "cycle" / "Cycle_json").rglob("*.json"))
+    means = cycle_means(json.loads(cyc[0].read_text(encoding="utf-8")))
+    assert all(np.isfinite(means))
+
+    # Aynı parametrelerle ikinci çağrı mevcut ağacı yeniden kullanır; seed değişince içerik değişir
+    assert synth_data.generate(tmp_path / "d", seed=1, **TINY) == meta
+    first = rpt[0].read_bytes()
+    synth_data.generate(tmp_path / "d", seed=2, **TINY)
+    assert rpt[0].read_bytes() != first
+
+
+def test_benchmark_writes_results(tmp_path):
+    results = bench.run_benchmarks({"tiny": TINY}, bench.CASES, tmp_path / "data", repeat=1, rf_trees=5)
+    assert [r["case"] for r in results] == list(bench.CASES)
+    for r in results:
+        assert r["scale"] == "tiny" and r["median_s"] > 0 and r["items"] > 0
+
+    by_case = {r["case"]: r for r in results}
+    assert by_case["prepare_rpt"]["items"] == 32 and by_case["prepare_rpt"]["mb_per_s"] > 0
+    assert "parse_files" in by_case["prepare_rpt"]["stages"]
+    feats = pd.read_parquet(tmp_path / "data" / "tiny" / "out_rpt" / "features.parquet")
+    assert set(feats["group_id"]) == {"G1", "G2"}
+
+    cmp = bench.compare({"results": results}, {"results": results})
+    assert (cmp["ratio"] == 1.0).all()
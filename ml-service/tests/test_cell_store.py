@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cell_store import CellSeriesStore
+from feature_store import write_partitioned
+from tests.test_prepare_features import synthetic_rpt_rows
+
+
+@pytest.fixture
+def rows():
+    df = synthetic_rpt_rows(n_groups=3, n_cells=6, max_weeks=15).sample(frac=1.0, random_state=0)
+    df.loc[df.index[:10], "rpt_capacity_Ah"] = np.nan
+    return df.reset_index(drop=True)
+
+
+def test_segments_match_groupby(rows):
+    store = CellSeriesStore.from_frame(rows, columns=["week_idx", "rpt_capacity_Ah"], dtype=None)
+    d = rows.sort_values(["group_id", "cell_id", "week_idx"]).reset_index(drop=True)
+    grp = d.groupby(["group_id", "cell_id"], sort=True)
+
+    assert store.order is not None
+    np.testing.assert_array_equal(store["week_idx"], d["week_idx"])
+    g, c = store.keys()
+    assert list(zip(g, c)) == list(grp.groups)
+    np.testing.assert_array_equal(store.lengths, grp.size().to_numpy())
+    np.testing.assert_array_equal(store.position(), grp.cumcount())
+
+    cap = d["rpt_capacity_Ah"]
+    np.testing.assert_array_equal(store.first_valid("rpt_capacity_Ah"), grp["rpt_capacity_Ah"].first())
+    np.testing.assert_array_equal(store.shift("rpt_capacity_Ah", -1), cap.groupby([d["group_id"], d["cell_id"]]).shift(-1))
+    np.testing.assert_array_equal(store.diff("rpt_capacity_Ah"), grp["rpt_capacity_Ah"].diff())
+    np.testing.assert_array_equal(store.reduce("week_idx", np.maximum), grp["week_idx"].max())
+
+    i = store.locate("G2", "C3")
+    view = store.cell(i, "rpt_capacity_Ah")
+    assert np.shares_memory(view, store["rpt_capacity_Ah"])
+    np.testing.assert_array_equal(view, d.loc[(d["group_id"] == "G2") & (d["cell_id"] == "C3"), "rpt_capacity_Ah"])
+
+
+def test_from_parquet_file_and_dataset(tmp_path, rows):
+    d = rows.sort_values(["group_id", "cell_id", "week_idx"]).reset_index(drop=True)
+    d.to_parquet(tmp_path / "rows.parquet", index=False)
+    write_partitioned(d, tmp_path / "rows")
+    ref = CellSeriesStore.from_frame(d, columns=["week_idx", "avgV_chg"])
+
+    for path in (tmp_path / "rows.parquet", tmp_path / "rows"):
+        store = CellSeriesStore.from_parquet(path, columns=["week_idx", "avgV_chg"])
+        assert store.order is None                      # kaynak sıralı: permütasyon yok
+        assert store["week_idx"].dtype == np.int32 and store["avgV_chg"].dtype == np.float32
+        np.testing.assert_array_equal(store.offsets, ref.offsets)
+        assert list(store.groups) == list(ref.groups) and list(store.cells) == list(ref.cells)
+        np.testing.assert_array_equal(store["avgV_chg"], ref["avgV_chg"])
+
+    sub = CellSeriesStore.from_parquet(tmp_path / "rows", columns=["week_idx"], groups=["G2"], cells=["C1"])
+    assert sub.n_cells == 1 and list(sub.keys()[0]) == ["G2"]
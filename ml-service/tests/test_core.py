@@ -1,31 +1,71 @@
-import ctypes
 import numpy as np
+import pytest
 
-# Derlenen DLL dosyasını yükle
-lib = ctypes.CDLL(r"C:\Users\berha\battery_project\core-engine\build\core_engine.dll")
-
-# Fonksiyonun imzasını tanımla
-lib.compute_features.argtypes = [
-    ctypes.POINTER(ctypes.c_double),  # data pointer
-    ctypes.c_int,                     # length
-    ctypes.POINTER(ctypes.c_double),  # mean output
-    ctypes.POINTER(ctypes.c_double)   # std output
-]
-lib.compute_features.restype = None
-
-# Test verisi
-data = np.array([1.0, 2.0, 3.0, 4.0, 5.0], dtype=np.float64)
-
-mean_val = ctypes.c_double()
-std_val = ctypes.c_double()
-
-# C++ fonksiyonunu çağır
-lib.compute_features(
-    data.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
-    len(data),
-    ctypes.byref(mean_val),
-    ctypes.byref(std_val)
-)
-
-print("Mean:", mean_val.value)
-print("Std :", std_val.value)
+import native
+
+
+@pytest.fixture(params=["native", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "native":
+        if native.load_library("core_engine") is None:
+            pytest.skip("core_engine kütüphanesi derlenmemiş")
+    else:
+        monkeypatch.setattr(native, "load_library", lambda name: None)
+    return request.param
+
+
+def test_compute_mean_std_matches_numpy(backend):
+    data = np.random.default_rng(0).normal(3.0, 0.5, 10_001)
+    mean, std = native.compute_mean_std(data)
+    assert mean == pytest.approx(np.mean(data), rel=1e-12)
+    assert std == pytest.approx(np.std(data), rel=1e-9)
+
+
+def test_compute_mean_std_small_and_empty(backend):
+    mean, std = native.compute_mean_std([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert mean == pytest.approx(3.0)
+    assert std == pytest.approx(np.sqrt(2.0))
+    assert all(np.isnan(native.compute_mean_std(np.empty(0))))
+
+
+def test_kalman_smooth_matches_reference(backend):
+    if backend == "native" and native.load_library("kalman_soh") is None:
+        pytest.skip("kalman_soh kütüphanesi derlenmemiş")
+    z = np.linspace(1.0, 0.8, 50) + np.random.default_rng(1).normal(0, 0.01, 50)
+    expected = native._kalman_smooth_numpy(z, 1e-5, 1e-3, 1.0, 1.0)
+    np.testing.assert_allclose(native.kalman_smooth(z), expected, rtol=1e-12)
+
+
+def _reference_segment_stats(values, offsets):
+    rows = []
+    for a, b in zip(offsets[:-1], offsets[1:]):
+        seg = values[a:b]
+        seg = seg[~np.isnan(seg)]
+        if len(seg) == 0:
+            rows.append((np.nan, np.nan, np.nan, np.nan, 0))
+        else:
+            rows.append((seg.mean(), seg.std(), seg.min(), seg.max(), len(seg)))
+    return [np.array(col) for col in zip(*rows)]
+
+
+def test_segment_stats_matches_reference(backend):
+    rng = np.random.default_rng(2)
+    lens = rng.integers(0, 300, 200)
+    lens[[3, 50]] = 0
+    lens[7] = 200_000   # birden fazla bloğa bölünen segment
+    values = rng.normal(3.7, 0.2, int(lens.sum()))
+    values[rng.random(len(values)) < 0.05] = np.nan
+    offsets = np.append(0, np.cumsum(lens))
+    values[offsets[10]:offsets[11]] = np.nan   # tamamı NaN
+
+    got = native.segment_stats(values, offsets)
+    expected = _reference_segment_stats(values, offsets)
+    for g, e in zip(got, expected):
+        np.testing.assert_allclose(g, e, rtol=1e-10, equal_nan=True)
+
+
+def test_segment_stats_is_stable_for_large_offsets(backend):
+    # sq_sum/n - mean^2 formülü bu veride tüm anlamlı basamakları kaybeder
+    values = 1e9 + np.random.default_rng(3).normal(0, 1e-3, 100_000)
+    _, std, _, _, _ = native.segment_stats(values, [0, len(values)])
+    assert std[0] == pytest.approx(np.std(values), rel=1e-6)
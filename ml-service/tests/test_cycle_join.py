@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_store import asof_join
+from prepare_data_cycle import aggregate_cycle_weeks, cycle_keys
+from prepare_data_isu_ilcc import join_cycle_features
+
+
+def _reference_asof(left, right, tolerance):
+    """pandas merge_asof ile aynı sonuç (sıralama gerektirir; left sırasına geri döndürülür)."""
+    lw = left.reset_index().assign(w=left["week_idx"].astype(float)).sort_values("w")
+    rw = right.rename(columns={"week_idx": "w"}).assign(w=lambda d: d["w"].astype(float)).sort_values("w")
+    merged = pd.merge_asof(lw, rw, on="w", by=["group_id", "cell_id"], tolerance=tolerance)
+    return merged.set_index("index").sort_index()
+
+
+@pytest.mark.parametrize("tolerance", [None, 3])
+def test_asof_join_matches_merge_asof(tolerance):
+    rng = np.random.default_rng(0)
+    n, m = 400, 250
+    left = pd.DataFrame({"group_id": rng.choice(["G1", "G2", "G3"], n),
+                         "cell_id": rng.choice(["C1", "C2", "C3", "C4"], n),
+                         "week_idx": rng.integers(0, 40, n)})
+    right = pd.DataFrame({"group_id": rng.choice(["G1", "G2", "G9"], m),
+                          "cell_id": rng.choice(["C1", "C2", "C3"], m),
+                          "week_idx": rng.integers(0, 40, m),
+                          "DoD": rng.random(m)}).drop_duplicates(["group_id", "cell_id", "week_idx"])
+
+    got = asof_join(left, right, ["group_id", "cell_id"], "week_idx", ["DoD"], tolerance=tolerance,
+                    matched_col="matched")
+    ref = _reference_asof(left, right, tolerance)
+    np.testing.assert_array_equal(got["DoD"].to_numpy(), ref["DoD"].to_numpy())
+    assert got["matched"].notna().sum() == ref["DoD"].notna().sum()
+    pd.testing.assert_frame_equal(got[left.columns], left)
+
+
+def test_asof_join_empty_right():
+    left = pd.DataFrame({"group_id": ["G1"], "cell_id": ["C1"], "week_idx": [3]})
+    right = pd.DataFrame({"group_id": [], "cell_id": [], "week_idx": [], "DoD": []})
+    assert asof_join(left, right, ["group_id", "cell_id"], "week_idx", ["DoD"])["DoD"].isna().all()
+
+
+def test_cycle_keys_and_week_windows():
+    files = [Path("Cycle_json/G1/C1/cycle_0003.json"), Path("Cycle_json/G1/C1/extra.json"),
+             Path("Cycle_json/G2/C5/cyc7.json")]
+    assert cycle_keys(files) == [("G1", "C1", 3), ("G1", "C1", 2), ("G2", "C5", 7)]
+
+    cycles = pd.DataFrame({"group_id": ["G1"] * 5, "cell_id": ["C1"] * 5, "cycle": [1, 2, 3, 4, 5],
+                           "DoD": [0.9, 0.8, 0.7, 0.6, 0.5], "C_rate_chg": 1.0, "C_rate_dchg": 0.5})
+    weekly = aggregate_cycle_weeks(cycles, cycles_per_week=2)
+    assert weekly["week_idx"].tolist() == [1, 2, 3]
+    assert weekly["n_cycles"].tolist() == [2, 2, 1]
+    np.testing.assert_allclose(weekly["DoD"], [0.85, 0.65, 0.5])
+
+    soh = pd.DataFrame({"group_id": ["G1"] * 5, "cell_id": ["C1"] * 5, "week_idx": [1, 2, 3, 4, 9],
+                        "DoD": np.nan})
+    joined = join_cycle_features(soh, weekly, tolerance=2)
+    np.testing.assert_allclose(joined["DoD"], [0.85, 0.65, 0.5, 0.5, np.nan])
+    np.testing.assert_allclose(joined["cycle_week_idx"], [1, 2, 3, 3, np.nan])
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pytest
+
+from export_lod import LOD_SERIES, LodFile, export_lod, lttb, minmax, write_group
+from tests.test_rul_engine import synthetic_soh_frame
+
+
+def test_lttb_and_minmax_keep_endpoints_and_extremes():
+    rng = np.random.default_rng(0)
+    x = np.arange(1000, dtype=float)
+    y = np.cumsum(rng.normal(size=1000))
+    idx = lttb(x, y, 50)
+    assert len(idx) == 50 and idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+    mm = minmax(x, y, 50)
+    assert len(mm) <= 50 and mm[0] == 0 and mm[-1] == 999
+    assert np.argmin(y) in mm and np.argmax(y) in mm
+    np.testing.assert_array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+
+
+def test_write_group_round_trip(tmp_path):
+    x = np.arange(1, 301, dtype=float)
+    cells = [{"soh": (x, 1.0 - 0.001 * x), "rul": (x[:5], np.full(5, 40.0))}, {}]
+    write_group(tmp_path / "G.lod", cells, [0, 100, 20])
+    f = LodFile(tmp_path / "G.lod")
+    assert f.levels == [0, 100, 20] and f.directory.shape == (2, len(LOD_SERIES), 3)
+    wx, wy = f.series(0, "soh", 0)
+    np.testing.assert_array_equal(wx, x.astype(np.float32))
+    np.testing.assert_array_equal(wy, (1.0 - 0.001 * x).astype(np.float32))
+    assert [len(f.series(0, "soh", lv)[0]) for lv in range(3)] == [300, 100, 20]
+    # Kısa seri: tüm seviyeler aynı bloğu gösterir
+    assert len(set(f.directory[0, LOD_SERIES.index("rul")]["offset"].tolist())) == 1
+    assert all(len(f.series(1, s, 0)[0]) == 0 for s in LOD_SERIES)
+
+
+def test_export_lod_index_and_files(tmp_path):
+    df = synthetic_soh_frame(n_cells=10, seed=1)
+    df["rpt_capacity_Ah"] = 2.0 * df["SOH"]
+    df.to_parquet(tmp_path / "features.parquet", index=False)
+    index = export_lod(tmp_path / "features.parquet", tmp_path / "lod", levels=[0, 8])
+    assert json.loads((tmp_path / "lod" / "index.json").read_text()) == index
+    assert sorted(index["groups"]) == sorted(df["group_id"].unique())
+    for g, info in index["groups"].items():
+        f = LodFile(tmp_path / "lod" / info["file"])
+        for i, c in enumerate(info["cells"]):
+            cell = df[(df["group_id"] == g) & (df["cell_id"] == c)].sort_values("week_idx")
+            x, y = f.series(i, "capacity", 0)
+            np.testing.assert_allclose(y, cell["rpt_capacity_Ah"], rtol=1e-6)
+            assert len(f.series(i, "soh", 1)[0]) == min(len(cell), 8)
+
+
+def test_missing_capacity_column_only_drops_capacity_series(tmp_path, capsys):
+    df = synthetic_soh_frame(n_cells=4, seed=2)
+    df.to_parquet(tmp_path / "features.parquet", index=False)
+    index = export_lod(tmp_path / "features.parquet", tmp_path / "lod", levels=[0])
+    assert "rpt_capacity_Ah yok" in capsys.readouterr().out
+    info = next(iter(index["groups"].values()))
+    f = LodFile(tmp_path / "lod" / info["file"])
+    assert len(f.series(0, "capacity", 0)[0]) == 0 and len(f.series(0, "soh", 0)[0]) > 0
+
+    # Kapasite dışındaki okuma hataları kapasite kolonsuz yeniden denenmez
+    df["rpt_capacity_Ah"] = 2.0 * df["SOH"]
+    df.drop(columns="SOH").to_parquet(tmp_path / "features.parquet", index=False)
+    with pytest.raises(ValueError):
+        export_lod(tmp_path / "features.parquet", tmp_path / "lod2", levels=[0])
+    assert "rpt_capacity_Ah yok" not in capsys.readouterr().out
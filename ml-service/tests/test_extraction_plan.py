@@ -0,0 +1,101 @@
+import time
+import warnings
+
+import numpy as np
+
+import synth_data
+from extraction_plan import ExtractionPlan, sample_files
+from json_decode import read_json
+from prepare_data_cycle import CYCLE_PLAN_SLOTS, cycle_means, scan_cycle
+from prepare_data_isu_ilcc import RPT_PLAN_SLOTS, pick_capacity, scan_for_voltage, summarize_rpt_json
+
+
+def rpt_doc(cap, v0):
+    return {
+        "capacity_discharge_C_5": [cap, cap + 0.01],
+        "steps": [{"QV_charge_C_5": [v0 + 0.2, v0 + 0.3]}, {"QV_discharge_C_5": [v0, v0 + 0.1]}],
+        "meta": {"Capacity": f"{cap} Ah"},
+    }
+
+
+def test_plan_hit_matches_recursive_scan():
+    plan = ExtractionPlan(RPT_PLAN_SLOTS)
+    plan.learn(rpt_doc(2.0, 3.5))
+    for cap, v0 in [(1.9, 3.4), (1.8, 3.45)]:
+        doc = rpt_doc(cap, v0)
+        got, status = summarize_rpt_json(doc, plan)
+        expected, _ = summarize_rpt_json(doc)
+        assert status == "hit"
+        np.testing.assert_allclose(got, expected, rtol=1e-12)
+
+
+def test_plan_miss_falls_back():
+    plan = ExtractionPlan(RPT_PLAN_SLOTS)
+    plan.learn(rpt_doc(2.0, 3.5))
+    doc = rpt_doc(1.9, 3.4)
+    doc["steps"] = [{"QV_charge_C_5": [3.6]}]          # aynı kök düzen, eksik yol
+    got, status = summarize_rpt_json(doc, plan)
+    assert status == "miss"
+    np.testing.assert_allclose(got, summarize_rpt_json(doc)[0], equal_nan=True)
+    assert summarize_rpt_json({"other": 1}, plan)[1] == "miss"
+
+
+def test_plan_keeps_scan_order_and_nan_rules():
+    plan = ExtractionPlan(RPT_PLAN_SLOTS)
+    doc = {"steps": [{"QV_charge_a": [3.0]}, {"QV_charge_b": [3.5]}, {"QV_charge_a": [3.9]}], "capacity": 2.0}
+    plan.learn(doc)
+    got, status = summarize_rpt_json(doc, plan)
+    assert status == "hit" and got[1] == 3.9
+    np.testing.assert_allclose(got, summarize_rpt_json(doc)[0], equal_nan=True)
+
+    # Doğrudan NaN ataması taramada olduğu gibi sonraki alt düğüm sonucunu ezer
+    doc = {"a": {"QV_charge_x": [3.7]}, "QV_charge_y": [np.nan], "capacity": 2.0}
+    plan.learn(doc)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)         # tüm-NaN dizinin nanmean'i
+        got, status = summarize_rpt_json(doc, plan)
+        expected, _ = summarize_rpt_json(doc)
+    assert status == "hit" and np.isnan(got[1])
+    np.testing.assert_allclose(got, expected, equal_nan=True)
+
+
+def test_changed_value_kind_is_a_miss():
+    plan = ExtractionPlan(RPT_PLAN_SLOTS)
+    plan.learn({"capacity": 2.0, "extra": {}})
+    doc = {"capacity": {"value": 1.0}, "extra": {}}          # aynı yol, skaler yerine dict
+    got, status = summarize_rpt_json(doc, plan)
+    assert status == "miss"
+    np.testing.assert_allclose(got, summarize_rpt_json(doc)[0], equal_nan=True)
+
+
+def _best_of(fn, docs, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for j in docs:
+            fn(j)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_plan_is_faster_than_recursive_scan(tmp_path):
+    synth_data.generate(tmp_path, seed=0, groups=1, cells=2, weeks=4, cycles=2, trace_len=2000)
+    cases = [("rpt", RPT_PLAN_SLOTS, lambda j: (pick_capacity(j), scan_for_voltage(j))),
+             ("cycle", CYCLE_PLAN_SLOTS, scan_cycle)]
+    for kind, slots, scan in cases:
+        files = sorted((tmp_path / kind).rglob("*.json"))
+        # Liste yolu (arrays=False): tarama her sayıya uğrar, plan sadece öğrenilen yolları çözer
+        docs = [read_json(f, arrays=False) for f in files]
+        plan = ExtractionPlan(slots)
+        for f in sample_files(files, 2):
+            plan.learn(read_json(f, arrays=False))
+        assert all(plan.lookup(j) is not None for j in docs)
+        assert _best_of(lambda j: plan.lookup(j, positions=True), docs) * 5 < _best_of(scan, docs)
+
+    files = sorted((tmp_path / "cycle").rglob("*.json"))
+    plan = ExtractionPlan(CYCLE_PLAN_SLOTS)
+    plan.learn(read_json(files[0], arrays=True))
+    for f in files:
+        j = read_json(f, arrays=True)
+        np.testing.assert_allclose(cycle_means(j, plan), cycle_means(j), rtol=1e-12)
+    assert plan.misses == 0
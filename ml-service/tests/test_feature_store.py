@@ -0,0 +1,53 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from feature_store import read_features, write_partitioned
+from prepare_data_isu_ilcc import build_features
+from tests.test_prepare_features import synthetic_rpt_rows
+
+
+@pytest.fixture
+def features():
+    return build_features(synthetic_rpt_rows(n_groups=3, n_cells=5, max_weeks=12), k=3)
+
+
+def test_roundtrip_matches_single_file(tmp_path, features):
+    root = write_partitioned(features, tmp_path / "features", row_group_rows=10)
+    assert sorted(p.name for p in root.iterdir()) == ["_common_metadata", "group_id=G1", "group_id=G2", "group_id=G3"]
+    pd.testing.assert_frame_equal(read_features(root), features)
+
+    # Satır grupları hücre sınırında kesilir: cell_id aralıkları çakışmaz
+    meta = pq.ParquetFile(root / "group_id=G1" / "part-0.parquet").metadata
+    col = meta.schema.names.index("cell_id")
+    ranges = [(meta.row_group(i).column(col).statistics.min, meta.row_group(i).column(col).statistics.max)
+              for i in range(meta.num_row_groups)]
+    assert meta.num_row_groups > 1
+    assert all(hi < lo2 for (_, hi), (lo2, _) in zip(ranges, ranges[1:]))
+
+
+def test_filters_and_projection(tmp_path, features):
+    features.to_parquet(tmp_path / "features.parquet", index=False)
+    write_partitioned(features, tmp_path / "features", row_group_rows=10)
+    expected = features[(features["group_id"] == "G2") & features["cell_id"].isin(["C1", "C4"])]
+    expected = expected[["cell_id", "week_idx", "SOH"]].reset_index(drop=True)
+    for path in (tmp_path / "features", tmp_path / "features.parquet"):
+        got = read_features(path, groups=["G2"], cells=["C1", "C4"], columns=["cell_id", "week_idx", "SOH"])
+        pd.testing.assert_frame_equal(got, expected)
+    with pytest.raises(ValueError):
+        read_features(tmp_path / "features", columns=["nope"])
+
+
+def test_partial_rewrite_touches_only_given_groups(tmp_path, features):
+    root = write_partitioned(features, tmp_path / "features")
+    before = {p.parent.name: p.stat().st_mtime_ns for p in root.glob("*/part-0.parquet")}
+
+    changed = features.copy()
+    changed.loc[changed["group_id"] == "G2", "SOH"] = 0.5
+    changed = changed[changed["group_id"] != "G3"]
+    write_partitioned(changed, root, groups={"G2", "G3"})
+
+    after = {p.parent.name: p.stat().st_mtime_ns for p in root.glob("*/part-0.parquet")}
+    assert set(after) == {"group_id=G1", "group_id=G2"}
+    assert after["group_id=G1"] == before["group_id=G1"]
+    pd.testing.assert_frame_equal(read_features(root), changed.reset_index(drop=True))
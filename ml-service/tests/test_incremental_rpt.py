@@ -0,0 +1,48 @@
+import argparse
+import json
+
+import pandas as pd
+import yaml
+
+import synth_data
+from prepare_data_isu_ilcc import add_args, main
+
+TINY = {"groups": 2, "cells": 2, "weeks": 8, "cycles": 0, "trace_len": 20}
+
+
+def _run(config, *extra):
+    parser = argparse.ArgumentParser()
+    add_args(parser)
+    main(parser.parse_args(["--config", str(config), *extra]))
+
+
+def _config(tmp_path, name, data_root):
+    path = tmp_path / f"{name}.yaml"
+    path.write_text(yaml.safe_dump({"paths": {"data_root": str(data_root), "out_dir": str(tmp_path / name)},
+                                    "soh": {"eol_threshold": 0.8, "min_points_for_trend": 3}}))
+    return path
+
+
+def test_incremental_rebuild_matches_full_rebuild(tmp_path):
+    synth_data.generate(tmp_path / "d", seed=3, **TINY)
+    rpt = tmp_path / "d" / "rpt"
+    inc = _config(tmp_path, "inc", rpt)
+    _run(inc, "--incremental")
+
+    # Bir dosya değişir, biri silinir, yeni biri eklenir; G2/C2 dokunulmadan kalır
+    doc = json.loads((rpt / "G1" / "C1" / "RPT_W005.json").read_text())
+    doc["capacity_discharge_C_5"] = [v * 0.9 for v in doc["capacity_discharge_C_5"]]
+    (rpt / "G1" / "C1" / "RPT_W005.json").write_text(json.dumps(doc))
+    (rpt / "G1" / "C2" / "RPT_W008.json").unlink()
+    (rpt / "G2" / "C1" / "RPT_W009.json").write_text((rpt / "G2" / "C1" / "RPT_W008.json").read_text())
+
+    _run(inc, "--incremental")
+    _run(_config(tmp_path, "full", rpt))
+
+    got = pd.read_parquet(tmp_path / "inc" / "features.parquet")
+    expected = pd.read_parquet(tmp_path / "full" / "features.parquet")
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-12)
+
+    data = json.loads((tmp_path / "inc" / "manifest_rpt.json").read_text())
+    assert data["meta"]["recomputed_cells"] == [["G1", "C1"], ["G1", "C2"], ["G2", "C1"]]
+    assert len(data["entries"]) == 2 * 2 * 8
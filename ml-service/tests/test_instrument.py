@@ -0,0 +1,77 @@
+import json
+import time
+
+import instrument
+
+
+def test_stage_noop_when_disabled():
+    assert not instrument.enabled()
+    with instrument.stage("x", items=1) as st:
+        st.add(items=5, nbytes=10)
+    instrument.record("y", 1.0)
+    instrument.count("z")
+    assert not instrument.enabled()
+
+
+def test_stages_and_counters_aggregate():
+    prof = instrument.enable("t", sample_interval=None)
+    try:
+        for _ in range(3):
+            with instrument.stage("read", items=1) as st:
+                st.add(nbytes=1000)
+                time.sleep(0.001)
+        instrument.record("fold", 0.5, items=10)
+        instrument.record("fold", 1.5, items=30)
+        instrument.count("files_failed")
+        instrument.count("files_failed", 2)
+    finally:
+        instrument.disable()
+
+    rep = prof.report()
+    read = rep["stages"]["read"]
+    assert read["calls"] == 3 and read["items"] == 3 and read["bytes"] == 3000
+    assert read["total_s"] > 0 and read["mb_per_s"] > 0
+    fold = rep["stages"]["fold"]
+    assert fold["calls"] == 2 and fold["total_s"] == 2.0 and fold["max_ms"] == 1500.0
+    assert fold["items_per_s"] == 20.0
+    assert rep["counters"] == {"files_failed": 3}
+
+
+def test_profiled_writes_json(tmp_path, capsys):
+    out = tmp_path / "sub" / "profile.json"
+    with instrument.profiled(out, "run"):
+        with instrument.stage("work", items=2):
+            sum(range(1000))
+    assert not instrument.enabled()
+
+    rep = json.loads(out.read_text(encoding="utf-8"))
+    assert rep["run"] == "run"
+    assert rep["stages"]["work"]["items"] == 2
+    assert rep["peak_rss_mb"] > 0
+    assert "[PROFILE] run" in capsys.readouterr().out
+
+
+def test_profiled_none_path_is_noop(tmp_path):
+    with instrument.profiled(None, "run") as prof:
+        assert prof is None
+        assert not instrument.enabled()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_worker_stages_reach_parent_profile(tmp_path):
+    import synth_data
+    from prepare_data_isu_ilcc import iter_parsed_files
+
+    synth_data.generate(tmp_path / "d", seed=0, groups=1, cells=2, weeks=3, cycles=0, trace_len=20)
+    files = sorted((tmp_path / "d" / "rpt").rglob("*.json"))
+    prof = instrument.enable("t", sample_interval=None)
+    try:
+        results = list(iter_parsed_files(files, workers=2))
+    finally:
+        instrument.disable()
+
+    assert len(results) == len(files) and all(res is not None for _, res, _ in results)
+    stages = prof.report()["stages"]
+    for name in ("file_read", "json_decode", "scan"):
+        assert stages[name]["calls"] == len(files)
+    assert stages["file_read"]["bytes"] == sum(f.stat().st_size for f in files)
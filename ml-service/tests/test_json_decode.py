@@ -0,0 +1,77 @@
+import codecs
+import json
+
+import numpy as np
+import pytest
+
+import json_decode
+from prepare_data_cycle import _safe_mean, cycle_means, scan_cycle
+from prepare_data_isu_ilcc import parse_rpt_file, summarize_rpt_json
+
+DOC = {"capacity_discharge_C_5": [1.9, 1.91, 1.92], "meta": {"QV_charge_C_5": [3.7, 3.8, float("nan")]}}
+
+
+@pytest.fixture(params=json_decode.available_backends())
+def backend(request, monkeypatch):
+    monkeypatch.setenv("BATTERY_JSON_BACKEND", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("encode", [
+    lambda s: s.encode("utf-8"),
+    lambda s: codecs.BOM_UTF8 + s.encode("utf-8"),
+    lambda s: codecs.BOM_UTF16_LE + s.encode("utf-16-le"),
+    lambda s: codecs.BOM_UTF32_BE + s.encode("utf-32-be"),
+    lambda s: json.dumps(s).encode("utf-8"),          # çift kodlanmış
+])
+def test_decode_encodings(backend, encode):
+    got = json_decode.decode_bytes(encode(json.dumps(DOC)))
+    assert got["capacity_discharge_C_5"] == DOC["capacity_discharge_C_5"]
+    assert np.isnan(got["meta"]["QV_charge_C_5"][2])     # NaN literali hızlı backend'de de çözülür
+
+
+def test_decode_latin1_fallback(backend):
+    raw = '{"note": "ölçüm", "capacity": 2.0}'.encode("latin-1")
+    assert json_decode.decode_bytes(raw) == {"note": "ölçüm", "capacity": 2.0}
+    with pytest.raises(ValueError):
+        json_decode.decode_bytes(b"{not json")
+
+
+def test_to_arrays_only_converts_flat_numeric_dict_values():
+    doc = {"v": [1, 2.5, 3], "s": ["1", 2, 3], "none": [1.0, None, 2.0], "short": [1.0],
+           "nested": [[1.0, 2.0], [3.0, 4.0]], "deep": {"x": [{"y": [4.0, 5.0, 6.0]}]}}
+    out = json_decode.to_arrays(doc, min_len=2)
+    assert isinstance(out["v"], np.ndarray) and out["v"].dtype == np.float64
+    assert isinstance(out["deep"]["x"][0]["y"], np.ndarray)
+    for k in ("s", "none", "short"):
+        assert isinstance(out[k], list)
+    assert all(isinstance(x, list) for x in out["nested"])
+
+
+def test_ragged_numeric_list_stays_a_list(tmp_path):
+    # Sayıyla başlayıp sonradan iç içe liste içeren değer ndarray'e çevrilemez; dosya düşmemeli
+    f = tmp_path / "rpt.json"
+    f.write_text(json.dumps({"capacity": [2.0] * 16 + [[2.0, 2.0]]}))
+    doc = json_decode.read_json(f, arrays=True)
+    assert isinstance(doc["capacity"], list)
+    assert parse_rpt_file(f)[0] == 2.0
+
+
+def test_scanners_match_on_arrays(tmp_path, backend):
+    rng = np.random.default_rng(0)
+    rpt = {"capacity_discharge_C_5": rng.normal(1.9, 0.01, 40).tolist(),
+           "meta": {"QV_charge_C_5": rng.normal(3.7, 0.1, 200).tolist(),
+                    "QV_discharge_C_5": rng.normal(3.6, 0.1, 200).tolist(),
+                    "cap": [{"capacity": 2.0}]}}
+    cycle = {"cycle": 3, "data": [{"V_charge": rng.normal(3.7, 0.1, 300).tolist(), "I_charge": [1.0, 2.0]},
+                                  {"V_charge": [3.9] * 50, "capacity_discharge_Ah": [1.8, 1.9]}]}
+    for doc, summarize in ((rpt, lambda j: summarize_rpt_json(j)[0]), (cycle, cycle_means)):
+        f = tmp_path / "doc.json"
+        f.write_text(json.dumps(doc))
+        expected = summarize(json.loads(f.read_text()))
+        got = summarize(json_decode.read_json(f, arrays=True))
+        np.testing.assert_allclose(got, expected, rtol=1e-12, equal_nan=True)
+
+    parts = scan_cycle(json_decode.to_arrays(json.loads(json.dumps(cycle))))
+    assert isinstance(parts[2], np.ndarray) and len(parts[2]) == 350
+    assert np.isnan(_safe_mean(parts[5])) and parts[4] == [1.0, 2.0]
@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ijson")
+
+import json_stream
+from prepare_data_cycle import CYCLE_KEYS, _safe_mean, scan_cycle
+from prepare_data_isu_ilcc import CAP_KEYS, parse_rpt_file
+
+RPT_DOCS = [
+    {"capacity_discharge_C_5": [1.9, 1.91, [1.89, [1.88, [5.0]]]], "QV_charge_C_5": [3.7, 3.8],
+     "QV_discharge_C_5": [3.5, 3.6]},
+    {"meta": {"Capacity": "1.95 Ah", "cap": None, "Q": {"capacity": 2.0}},
+     "rpt": [{"QV_discharge": [3.4, 3.5, 3.6]}, {"QV_discharge": []}, {"QV_charge": [3.9]}]},
+    {"QV_charge": [3.7, 3.8], "inner": {"QV_charge": [4.0]}, "capacity": ["2.1", "x", 2.3]},
+    [1.9, [2.0, "2.1"], {"capacity": 9.0}],
+    {"a": {"b": {"c": {"d": {"e": {"f": {"g": {"h": {"i": {"j": {"k": {"capacity": 7.0}}}}}}}}}}},
+     "Qd": 2.2, "Q_discharge": True},
+    {"nothing": [1, 2, 3]},
+]
+
+
+@pytest.mark.parametrize("doc", RPT_DOCS)
+def test_stream_rpt_summary_matches_in_memory(tmp_path, doc):
+    f = tmp_path / "rpt.json"
+    f.write_text(json.dumps(doc))
+    expected = parse_rpt_file(f)
+    got = json_stream.stream_rpt_summary(f, CAP_KEYS)
+    np.testing.assert_allclose(got, expected, rtol=1e-12, equal_nan=True)
+
+
+def test_stream_rpt_falls_back_for_double_encoded(tmp_path):
+    f = tmp_path / "rpt.json"
+    f.write_text(json.dumps(json.dumps({"capacity": 2.0})))
+    with pytest.raises(json_stream.StreamFallback):
+        json_stream.stream_rpt_summary(f, CAP_KEYS)
+    assert parse_rpt_file(f, stream=True) == parse_rpt_file(f)
+
+
+def test_stream_cycle_sums_match_scan_cycle(tmp_path):
+    doc = {"cycles": [
+        {"capacity_charge_Ah": [2.0, 2.1], "capacity_discharge_Ah": [1.9],
+         "V_charge": [[3.6, 3.7], [3.8, 3.9]], "QV_charge": [[4.0, 4.1]], "I_discharge": [-1.0, -1.5]},
+        {"data": {"V_discharge": [3.1, 3.2], "I_charge": [1.2]}},
+    ]}
+    f = tmp_path / "cycle.json"
+    f.write_text(json.dumps(doc))
+    expected = [_safe_mean(x) for x in scan_cycle(doc)]
+    sums = json_stream.stream_cycle_sums(f, CYCLE_KEYS)
+    got = [t / c if c else np.nan for t, c in sums]
+    np.testing.assert_allclose(got, expected, rtol=1e-12, equal_nan=True)
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from model_artifact import data_fingerprint, load_artifact, save_artifact
+
+COLS = ["a", "b", "c"]
+
+
+def _data(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=COLS)
+    df["y"] = df["a"] * 2 - df["b"] + rng.normal(0, 0.1, n)
+    return df
+
+
+def test_forest_artifact_is_memory_mapped_and_predicts_identically(tmp_path):
+    df = _data()
+    X = df[COLS].to_numpy()
+    rf = RandomForestRegressor(n_estimators=15, random_state=0).fit(X, df["y"])
+    fp = data_fingerprint(df, COLS + ["y"])
+    save_artifact(tmp_path, "soh_rf", rf, COLS, fp, metrics={"mae_mean": 0.1})
+
+    model, manifest = load_artifact(tmp_path / "models" / "soh_rf")
+    assert manifest["version"] == "v0001" and manifest["format"] == "flat_forest"
+    assert manifest["data_fingerprint"] == fp and manifest["metrics"] == {"mae_mean": 0.1}
+    assert isinstance(model.threshold, np.memmap) and isinstance(model.left, np.memmap)
+
+    X_new = np.vstack([X, _data(seed=1)[COLS].to_numpy()])
+    np.testing.assert_allclose(model.predict(X_new), rf.predict(X_new), rtol=1e-12)
+
+    # mmap_mode=None tam sklearn nesnesini döndürür
+    full, _ = load_artifact(tmp_path / "models" / "soh_rf", mmap_mode=None)
+    assert isinstance(full, RandomForestRegressor)
+
+
+def test_versions_increment_and_latest_points_to_newest(tmp_path):
+    df = _data()
+    fp = data_fingerprint(df, COLS + ["y"])
+    for _ in range(2):
+        lr = LinearRegression().fit(df[COLS], df["y"])
+        save_artifact(tmp_path, "soh_linreg", lr, COLS, fp)
+    model_dir = tmp_path / "models" / "soh_linreg"
+    assert (model_dir / "latest").read_text() == "v0002"
+    model, manifest = load_artifact(model_dir / "v0001" / "manifest.json")
+    assert manifest["version"] == "v0001"
+    np.testing.assert_allclose(model.predict(df[COLS]), lr.predict(df[COLS]))
+    assert json.loads((model_dir / "v0002" / "manifest.json").read_text())["model_class"] == "LinearRegression"
+
+
+def test_fingerprint_changes_with_data():
+    df = _data()
+    a = data_fingerprint(df, COLS)
+    df.loc[0, "a"] += 1e-9
+    assert data_fingerprint(df, COLS)["blake2b"] != a["blake2b"]
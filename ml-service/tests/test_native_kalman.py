@@ -0,0 +1,34 @@
+import numpy as np
+
+import native
+
+
+def reference_kalman(z, q, r, p0):
+    """kalman_create + kalman_update ile aynı tek seri filtre (NaN gözlemlerde sadece tahmin)."""
+    out, x, p, started = [], np.nan, p0, False
+    for zi in z:
+        if not np.isfinite(zi):
+            if started:
+                p += q
+            out.append(x if started else np.nan)
+            continue
+        if not started:
+            x, started = zi, True
+        p_prior = p + q
+        k = p_prior / (p_prior + r)
+        x, p = x + k * (zi - x), (1.0 - k) * p_prior
+        out.append(x)
+    return np.array(out)
+
+
+def test_kalman_smooth_batch_matches_per_series_filter():
+    rng = np.random.default_rng(0)
+    lens = rng.integers(0, 40, size=50)
+    offsets = np.concatenate([[0], np.cumsum(lens)])
+    z = 1.0 - 0.01 * rng.random(offsets[-1]).cumsum() / 10 + rng.normal(0, 0.01, offsets[-1])
+    z[rng.random(len(z)) < 0.1] = np.nan
+
+    expected = np.concatenate([reference_kalman(z[a:b], 1e-5, 1e-3, 1.0) for a, b in zip(offsets[:-1], offsets[1:])])
+    np.testing.assert_allclose(native.kalman_smooth_batch(z, offsets), expected, rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(native._kalman_smooth_batch_numpy(z, offsets, 1e-5, 1e-3, 1.0), expected,
+                               rtol=1e-12, equal_nan=True)
@@ -0,0 +1,95 @@
+import textwrap
+
+import pytest
+import yaml
+
+from pipeline import load_stages, run_pipeline
+
+STEP = textwrap.dedent("""
+    import sys
+    src, dst, tag = sys.argv[1:4]
+    if tag == "fail":
+        sys.exit(3)
+    with open(src) as f:
+        text = f.read()
+    with open(dst, "w") as f:
+        f.write(text + tag)
+    with open("runs.log", "a") as f:
+        f.write(dst + "\\n")
+""")
+
+
+def _write_config(tmp_path, scale=1, b_tag="b"):
+    (tmp_path / "step.py").write_text(STEP)
+    cfg = {"paths": {"out_dir": "out"}, "scale": scale,
+           "pipeline": {"workers": 2, "stages": {
+               "a": {"script": "step.py", "args": ["raw.txt", "out/a.txt", "a"],
+                     "inputs": ["raw.txt"], "outputs": ["out/a.txt"], "params": ["scale"]},
+               "b": {"script": "step.py", "args": ["out/a.txt", "out/b.txt", b_tag],
+                     "inputs": ["out/a.txt"], "outputs": ["out/b.txt"]},
+               "c": {"script": "step.py", "args": ["raw.txt", "out/c.txt", "c"],
+                     "inputs": ["raw.txt"], "outputs": ["out/c.txt"]},
+           }}}
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(cfg))
+    (tmp_path / "out").mkdir(exist_ok=True)
+    return path
+
+
+def _runs(tmp_path):
+    log = tmp_path / "runs.log"
+    runs = sorted(l.split("/")[-1] for l in log.read_text().split()) if log.exists() else []
+    log.unlink(missing_ok=True)
+    return runs
+
+
+def test_dependencies_and_cache(tmp_path):
+    (tmp_path / "raw.txt").write_text("x")
+    config = _write_config(tmp_path)
+    stages = load_stages(yaml.safe_load(config.read_text()), config)
+    assert stages["b"].deps == {"a"} and not stages["c"].deps
+
+    assert set(run_pipeline(config).values()) == {"ran"}
+    assert (tmp_path / "out" / "b.txt").read_text() == "xab"
+    assert _runs(tmp_path) == ["a.txt", "b.txt", "c.txt"]
+
+    assert set(run_pipeline(config).values()) == {"cached"}
+    assert _runs(tmp_path) == []
+
+    # İçerik aynı, sadece mtime değişti -> yine önbellek
+    (tmp_path / "raw.txt").write_text("x")
+    run_pipeline(config)
+    assert _runs(tmp_path) == []
+
+    # Parametre sadece a'yı bayatlatır; a'nın çıktısı aynı kaldığından b önbellekten gelir
+    config = _write_config(tmp_path, scale=2)
+    assert run_pipeline(config) == {"a": "ran", "b": "cached", "c": "cached"}
+    assert _runs(tmp_path) == ["a.txt"]
+
+    (tmp_path / "raw.txt").write_text("y")
+    assert run_pipeline(config, targets=["b"]) == {"a": "ran", "b": "ran"}
+    assert _runs(tmp_path) == ["a.txt", "b.txt"]
+
+    # Kod değişikliği script'i kullanan her aşamayı bayatlatır
+    (tmp_path / "step.py").write_text(STEP + "\n# değişti\n")
+    assert run_pipeline(config, dry_run=True) == {"a": "stale", "b": "stale", "c": "stale"}
+    assert _runs(tmp_path) == []
+
+
+def test_failure_blocks_downstream(tmp_path):
+    (tmp_path / "raw.txt").write_text("x")
+    config = _write_config(tmp_path, b_tag="fail")
+    cfg = yaml.safe_load(config.read_text())
+    cfg["pipeline"]["stages"]["d"] = {"script": "step.py", "args": ["out/b.txt", "out/d.txt", "d"],
+                                      "inputs": ["out/b.txt"], "outputs": ["out/d.txt"]}
+    config.write_text(yaml.safe_dump(cfg))
+    status = run_pipeline(config)
+    assert status == {"a": "ran", "b": "failed", "c": "ran", "d": "blocked"}
+    assert (tmp_path / "out" / "logs" / "b.log").exists()
+
+
+def test_cycle_is_rejected(tmp_path):
+    cfg = {"paths": {"out_dir": "out"}, "pipeline": {"stages": {
+        "a": {"script": "s.py", "after": ["b"]}, "b": {"script": "s.py", "after": ["a"]}}}}
+    with pytest.raises(ValueError):
+        load_stages(cfg, tmp_path / "config.yaml")
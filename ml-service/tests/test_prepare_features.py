@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+
+from prepare_data_isu_ilcc import build_features, local_slope_last_k, rolling_slope_last_k
+
+
+def legacy_build_features(df, k):
+    """iterrows tabanlı eski özellik aşaması (eşdeğerlik referansı)."""
+    df = df.sort_values(["group_id","cell_id","week_idx"])
+    df["first_cap"] = df.groupby(["group_id","cell_id"])["rpt_capacity_Ah"].transform("first")
+    df["SOH"] = df["rpt_capacity_Ah"] / df["first_cap"]
+    df["SOH_next"] = df.groupby(["group_id","cell_id"])["SOH"].shift(-1)
+    df["cap_fade"] = df.groupby(["group_id","cell_id"])["rpt_capacity_Ah"].diff()
+    df["DoD"] = np.nan
+    nominal_cap = df["first_cap"].mean()
+    df["C_rate"] = df["rpt_capacity_Ah"] / nominal_cap
+
+    feats = []
+    for (g,c), grp in df.groupby(["group_id","cell_id"]):
+        slope = local_slope_last_k(grp["week_idx"].tolist(), grp["SOH"].tolist(), k=k)
+        for _, r in grp.iterrows():
+            feats.append({
+                "group_id": g, "cell_id": c, "week_idx": r["week_idx"],
+                "SOH": r["SOH"], "current_SOH": r["SOH"],
+                "weeks_since_start": r["week_idx"] - grp["week_idx"].iloc[0],
+                "local_slope_k": slope, "n_points_cell": len(grp),
+                "SOH_next": r["SOH_next"], "avgV_chg": r["avgV_chg"],
+                "avgV_dchg": r["avgV_dchg"], "deltaV_hyst": r["deltaV_hyst"],
+                "cap_fade": r["cap_fade"], "DoD": r["DoD"], "C_rate": r["C_rate"],
+                "rpt_capacity_Ah": r["rpt_capacity_Ah"],
+            })
+    return pd.DataFrame(feats)
+
+
+def synthetic_rpt_rows(n_groups=4, n_cells=6, max_weeks=20, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for g in range(1, n_groups + 1):
+        for c in range(1, n_cells + 1):
+            n = int(rng.integers(1, max_weeks))
+            cap = 2.0 + rng.normal(0, 0.05)
+            for w in range(1, n + 1):
+                cap -= rng.uniform(0.0, 0.03)
+                chg, dchg = 3.7 + rng.normal(0, 0.01), 3.6 + rng.normal(0, 0.01)
+                rows.append({
+                    "group_id": f"G{g}", "cell_id": f"C{c}", "week_idx": w,
+                    "rpt_capacity_Ah": cap, "avgV_chg": chg, "avgV_dchg": dchg,
+                    "deltaV_hyst": chg - dchg,
+                })
+    # Giriş sırası özellik aşamasını etkilememeli
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def test_build_features_matches_legacy():
+    df = synthetic_rpt_rows()
+    for k in (3, 5):
+        expected = legacy_build_features(df.copy(), k)
+        got = build_features(df.copy(), k)
+        pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9, atol=1e-12)
+
+
+def test_rolling_slope_matches_polyfit():
+    rng = np.random.default_rng(1)
+    x = np.arange(1, 11, dtype=float)
+    y = 1.0 - 0.01 * x + rng.normal(0, 1e-3, size=len(x))
+    slope = rolling_slope_last_k(x, y, np.arange(len(x)), k=4)
+    assert np.isnan(slope[:3]).all()
+    for i in range(3, len(x)):
+        assert np.isclose(slope[i], np.polyfit(x[i-3:i+1], y[i-3:i+1], 1)[0])
+    # Sadece seçili satırlar: tam hesaplamanın aynı satırlarıyla aynı
+    rows = np.array([1, 5, 9])
+    np.testing.assert_array_equal(rolling_slope_last_k(x, y, np.arange(len(x)), k=4, rows=rows), slope[rows])
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from rul_linear import backtest_rul, compute_rul_vectorized, mae_vs_horizon
+from tests.test_rul_engine import synthetic_soh_frame
+
+
+def test_last_origin_matches_single_origin_engine():
+    df = synthetic_soh_frame()
+    bt = backtest_rul(df, ks=(2, 4, 7), thresholds=(0.8, 0.9))
+    for k in (2, 4, 7):
+        for thr in (0.8, 0.9):
+            sub = bt[(bt["k_used"] == k) & (bt["threshold"] == thr)]
+            last = sub.groupby(["group_id", "cell_id"], sort=True).tail(1).reset_index(drop=True)
+            ref = compute_rul_vectorized(df, k=k, threshold=thr)
+            cols = ["group_id", "cell_id", "origin_week_idx", "slope_a", "RUL_pred_weeks", "RUL_true_weeks"]
+            pd.testing.assert_frame_equal(last[cols], ref[cols], check_exact=False, rtol=1e-7, atol=1e-9)
+
+
+def test_every_origin_matches_polyfit():
+    df = synthetic_soh_frame(n_cells=12, seed=3)
+    df.loc[df.index[5], "SOH"] = np.nan
+    bt = backtest_rul(df, ks=(3,), thresholds=(0.85,))
+    d = df.sort_values(["group_id", "cell_id", "week_idx"])
+    for (g, c), grp in bt.groupby(["group_id", "cell_id"]):
+        cell = d[(d["group_id"] == g) & (d["cell_id"] == c)]
+        w, y = cell["week_idx"].to_numpy(float), cell["SOH"].to_numpy(float)
+        for i, r in enumerate(grp.itertuples()):
+            assert r.origin_week_idx == w[i]
+            lo = max(0, i - 2)
+            if i - lo + 1 < 2 or np.isnan(y[lo:i + 1]).any():
+                assert np.isnan(r.slope_a)
+                continue
+            a, b = np.polyfit(w[lo:i + 1], y[lo:i + 1], 1)
+            np.testing.assert_allclose(r.slope_a, a, rtol=1e-7, atol=1e-12)
+            if a < 0:
+                np.testing.assert_allclose(r.RUL_pred_weeks, max((0.85 - b) / a - w[i], 0.0), rtol=1e-6)
+
+
+def test_mae_vs_horizon_bins():
+    bt = pd.DataFrame({"k_used": 4, "threshold": 0.8,
+                       "RUL_pred_weeks": [1.0, 3.0, np.nan, 10.0, 0.0],
+                       "RUL_true_weeks": [1.0, 2.0, 3.0, 6.0, np.nan]})
+    curves = mae_vs_horizon(bt, bin_weeks=4)
+    assert curves["horizon_weeks"].tolist() == [0.0, 4.0]
+    assert curves["n_origins"].tolist() == [3, 1]
+    np.testing.assert_allclose(curves["coverage"], [2 / 3, 1.0])
+    np.testing.assert_allclose(curves["MAE_weeks"], [0.5, 4.0])
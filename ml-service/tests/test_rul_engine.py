@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from rul_linear import compute_rul_per_cell, compute_rul_vectorized
+
+
+def synthetic_soh_frame(n_cells=60, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_cells):
+        n = int(rng.integers(1, 30))
+        rate = rng.choice([0.0, 0.004, 0.012, 0.03])   # bazı hücreler hiç düşmez (sansürlü)
+        soh = 1.0
+        for w in range(1, n + 1):
+            rows.append({"group_id": f"G{i % 5}", "cell_id": f"C{i}", "week_idx": w, "SOH": soh})
+            soh += -rate + rng.normal(0, 0.002)
+    # İlk noktada EOL'ün altında başlayan hücre
+    rows += [{"group_id": "G9", "cell_id": "C0", "week_idx": w, "SOH": 0.7 - 0.01 * w} for w in range(1, 5)]
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed)
+
+
+def test_vectorized_engine_matches_loop():
+    df = synthetic_soh_frame()
+    for k in (2, 4, 7):
+        for thr in (0.8, 0.9):
+            expected = compute_rul_per_cell(df, k=k, threshold=thr)
+            got = compute_rul_vectorized(df, k=k, threshold=thr)
+            pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-7, atol=1e-9)
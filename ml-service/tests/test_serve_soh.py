@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from prepare_data_isu_ilcc import build_features
+from rul_linear import compute_rul_vectorized
+from serve_soh import FEATURE_COLS, InferenceService, make_handler
+from tests.test_prepare_features import synthetic_rpt_rows
+
+
+def _observations(df):
+    df = df.sort_values(["group_id", "cell_id", "week_idx"])
+    return [{"group_id": r.group_id, "cell_id": r.cell_id, "week_idx": r.week_idx,
+             "capacity_Ah": r.rpt_capacity_Ah, "avgV_chg": r.avgV_chg, "avgV_dchg": r.avgV_dchg}
+            for r in df.itertuples()]
+
+
+@pytest.fixture
+def trained():
+    raw = synthetic_rpt_rows()
+    feats = build_features(raw.copy(), k=3, kalman=(1e-5, 1e-3))
+    train = feats.dropna(subset=["SOH_next"])
+    model = LinearRegression().fit(train[FEATURE_COLS].fillna(0.0).values, train["SOH_next"].values)
+    return raw, feats, model
+
+
+def test_online_state_matches_batch_pipeline(trained):
+    raw, feats, model = trained
+    svc = InferenceService(model=model, k=3, rul_k=4, threshold=0.95)
+    try:
+        n, errors = svc.observe(_observations(raw))
+        assert n == len(raw) and not errors
+
+        last = feats.groupby(["group_id", "cell_id"], sort=True).tail(1)
+        keys = list(zip(last["group_id"], last["cell_id"]))
+        preds = pd.DataFrame(svc.predict(keys))
+    finally:
+        svc.close()
+
+    expected_next = model.predict(last[FEATURE_COLS].fillna(0.0).values)
+    np.testing.assert_allclose(preds["SOH_next"], expected_next, rtol=1e-9)
+    np.testing.assert_allclose(preds["SOH_kf"], last["SOH_kf"], rtol=1e-12)
+    np.testing.assert_allclose(preds["local_slope_k"].astype(float), last["local_slope_k"],
+                               rtol=1e-7, atol=1e-12, equal_nan=True)
+
+    # Eşiğe inmemiş hücrelerde RUL, rul_linear'ın sansürlü tahminiyle aynı
+    rul = compute_rul_vectorized(feats, k=4, threshold=0.95)
+    merged = preds.merge(rul, on=["group_id", "cell_id"])
+    cens = merged[merged["censored"]]
+    np.testing.assert_allclose(cens["RUL_weeks"].astype(float), cens["RUL_pred_weeks"],
+                               rtol=1e-7, atol=1e-9, equal_nan=True)
+    assert (merged.loc[~merged["censored"], "RUL_weeks"] == 0.0).all()
+
+
+def test_http_endpoints_and_microbatching(trained):
+    raw, _, model = trained
+    svc = InferenceService(model=model, k=3, batch_window_ms=20.0, start=False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(svc))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def post(path, payload):
+        req = urllib.request.Request(url + path, data=json.dumps(payload).encode(),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+
+    try:
+        assert post("/observe", {"observations": _observations(raw)})["updated"] == len(raw)
+        cells = [{"group_id": "G1", "cell_id": f"C{c}"} for c in range(1, 7)]
+
+        results = [None] * 8
+        def worker(i):
+            results[i] = post("/predict", {"cells": cells})
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        # İşçi, 8 istek de kuyruğa girdikten sonra başlar: hepsi tek predict çağrısında birleşir
+        deadline = time.monotonic() + 10.0
+        while svc._queue.qsize() < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        svc.start()
+        for t in threads:
+            t.join()
+
+        assert all(len(r["predictions"]) == 6 for r in results)
+        unknown = post("/predict", {"cells": [{"group_id": "G1", "cell_id": "nope"}]})
+        assert "error" in unknown["predictions"][0]
+
+        with urllib.request.urlopen(url + "/stats") as resp:
+            stats = json.loads(resp.read())
+        assert stats["latency"]["/predict"]["count"] == 9
+        assert stats["latency"]["/predict"]["p99_ms"] >= stats["latency"]["/predict"]["p50_ms"]
+        assert stats["batches"]["count"] == 1 and stats["batches"]["max_rows"] == 8 * 6
+    finally:
+        server.shutdown()
+        server.server_close()
+        svc.close()
@@ -0,0 +1,39 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import synth_data
+from prepare_data_cycle import add_args, cycle_keys, main, parse_cycle_file
+from signal_store import SignalStore, SignalStoreWriter
+
+
+def test_store_roundtrip_and_zero_copy_cell_slices(tmp_path):
+    rng = np.random.default_rng(0)
+    cycles = [("G1", "C1", 1), ("G1", "C1", 2), ("G1", "C2", 1), ("G2", "C1", 1)]
+    data = {key: {"V": rng.normal(size=int(rng.integers(0, 50))), "I": rng.normal(size=5)} for key in cycles}
+    with SignalStoreWriter(tmp_path, ["V", "I"]) as w:
+        for (g, c, cyc), arrays in data.items():
+            w.append({"group_id": g, "cell_id": c, "cycle": cyc}, arrays)
+
+    store = SignalStore(tmp_path)
+    assert store.cells() == [("G1", "C1"), ("G1", "C2"), ("G2", "C1")]
+    values, offsets = store.cell("G1", "C1", "V")
+    assert np.shares_memory(values, store.channel("V"))
+    for i, cyc in enumerate((1, 2)):
+        np.testing.assert_array_equal(values[offsets[i]:offsets[i + 1]], data[("G1", "C1", cyc)]["V"])
+    np.testing.assert_array_equal(store.cycle(3, "I"), data[("G2", "C1", 1)]["I"])
+
+
+def test_store_features_match_json_path(tmp_path):
+    meta = synth_data.generate(tmp_path / "d", seed=4, groups=2, cells=2, weeks=4, cycles=5, trace_len=60)
+    parser = add_args(argparse.ArgumentParser())
+    out = tmp_path / "d" / "out_cycle"
+    files = sorted((tmp_path / "d" / "cycle" / "Cycle_json").rglob("*.json"))
+    rows = [{**parse_cycle_file(f), "cycle": key[2]} for f, key in zip(files, cycle_keys(files))]
+    expected = pd.DataFrame(rows)
+
+    for flag in ("--build-store", "--from-store"):
+        main(parser.parse_args(["--config", meta["configs"]["cycle"], flag]))
+        got = pd.read_parquet(out / "features_cycle.parquet")
+        pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-12)
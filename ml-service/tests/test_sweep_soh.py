@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from sweep_soh import build_candidates, evaluate_candidate_fold, expand_grid, run_sweep
+
+FEATURES = ["a", "b", "c"]
+
+
+def _frame(n=240, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(n, 3)), columns=FEATURES)
+    y = (2 * df["a"] - df["b"] + rng.normal(0, 0.1, n)).to_numpy()
+    groups = np.repeat(np.arange(8), n // 8)
+    return df, y, groups
+
+
+def test_warm_started_levels_match_fresh_forests():
+    df, y, _ = _frame()
+    X = df.to_numpy()
+    data = (X[:200], y[:200], X[200:], y[200:])
+    cand = {"model": "rf", "params": {"min_samples_leaf": 2}, "features": "all", "n_levels": [5, 12]}
+    scores, _ = evaluate_candidate_fold(cand, data, seed=7)
+    for (mae, _), n in zip(scores, cand["n_levels"]):
+        fresh = RandomForestRegressor(n_estimators=n, min_samples_leaf=2, random_state=7).fit(X[:200], y[:200])
+        assert np.isclose(mae, np.mean(np.abs(fresh.predict(X[200:]) - y[200:])), rtol=1e-12)
+
+
+def test_grid_and_random_candidates():
+    assert expand_grid({"x": [1, 2], "y": 3}) == [{"x": 1, "y": 3}, {"x": 2, "y": 3}]
+    cfg = {"feature_sets": {"all": FEATURES, "ab": ["a", "b"]},
+           "models": {"rf": {"n_estimators": [10, 5], "max_depth": [None, 4]}, "ridge": {"alpha": [0.1, 1.0]}}}
+    cands, _ = build_candidates(cfg, FEATURES)
+    assert len(cands) == 8 and cands[0]["n_levels"] == [5, 10]
+    cands, _ = build_candidates(dict(cfg, search="random", n_iter=3), FEATURES, seed=1)
+    assert len(cands) == 3
+
+
+def test_successive_halving_prunes_bad_configs():
+    df, y, groups = _frame()
+    cfg = {"n_splits": 4, "feature_sets": {"all": FEATURES, "noise": ["c"]},
+           "models": {"rf": {"n_estimators": [5, 10], "min_samples_leaf": [1, 20]}, "linreg": {}},
+           "halving": {"eta": 2, "min_folds": 1}}
+    res = run_sweep(df, y, groups, cfg, FEATURES, seed=0)
+    complete = res[res["complete"]]
+    assert (complete["folds_done"] == 4).all()
+    assert res["pruned_after_folds"].notna().any()
+    # Sadece gürültü sütunuyla eğitilen aday hiçbir zaman en iyi olmamalı
+    assert res.iloc[0]["features"] == "all"
+
+
+def test_empty_candidate_list_is_a_clear_error():
+    df, y, groups = _frame()
+    for cfg in ({"models": {}}, {"models": {"ridge": {"alpha": [0.1]}}, "search": "random", "n_iter": 0}):
+        with pytest.raises(ValueError, match="aday yok"):
+            run_sweep(df, y, groups, cfg, FEATURES)
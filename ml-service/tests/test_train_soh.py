@@ -0,0 +1,29 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from train_soh import cpu_budget, evaluate_models
+
+
+def test_cpu_budget_splits_between_folds_and_trees():
+    assert cpu_budget(8, 10) == (8, 1)
+    assert cpu_budget(8, 2) == (2, 4)
+    assert cpu_budget(1, 10) == (1, 1)
+    workers, trees = cpu_budget(-1, 3)
+    assert 1 <= workers <= 3 and trees >= 1
+
+
+def test_parallel_folds_match_serial():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 6))
+    y = X[:, 0] - 0.5 * X[:, 1] + rng.normal(0, 0.05, 300)
+    groups = np.repeat(np.arange(6), 50)
+    models = {
+        "lr": ("Linear Regression", LinearRegression()),
+        "rf": ("Random Forest", RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=-1)),
+    }
+    serial = evaluate_models(models, X, y, groups, n_jobs=1)
+    parallel = evaluate_models(models, X, y, groups, n_jobs=2)
+    for name in models:
+        np.testing.assert_allclose(parallel[name]["fold_mae"], serial[name]["fold_mae"], rtol=1e-12)
+        assert len(parallel[name]["fold_timing"]) == serial[name]["n_splits"] == 5
@@ -0,0 +1,83 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from feature_store import write_partitioned
+from model_artifact import data_fingerprint, load_artifact
+from train_soh import FEATURE_COLS, TARGET_COL
+import train_streaming as ts
+
+
+def _features_file(tmp_path, n_groups=12, rows=60, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_groups * rows
+    df = pd.DataFrame(rng.normal(size=(n, len(FEATURE_COLS))), columns=FEATURE_COLS)
+    df.loc[rng.random(n) < 0.05, "avgV_chg"] = np.nan
+    df[TARGET_COL] = 0.9 + 0.05 * df["current_SOH"] - 0.02 * df["local_slope_k"] + rng.normal(0, 0.01, n)
+    df.loc[rng.random(n) < 0.1, TARGET_COL] = np.nan
+    df["group_id"] = np.repeat([f"G{i}" for i in range(n_groups)], rows)
+    df["unused"] = "x"
+    path = tmp_path / "features.parquet"
+    df.to_parquet(path, index=False, row_group_size=97)
+    return path, df
+
+
+def test_batches_are_projected_float32_and_folds_are_group_disjoint(tmp_path):
+    path, df = _features_file(tmp_path)
+    Xs, ys, gs = zip(*[(X, y, g) for X, y, g, _ in ts.iter_batches(path, batch_size=50)])
+    X, y, g = np.vstack(Xs), np.concatenate(ys), np.concatenate(gs)
+    ref = df.dropna(subset=[TARGET_COL])
+    assert X.dtype == np.float32 and len(X) == len(ref)
+    np.testing.assert_allclose(X, ref[FEATURE_COLS].fillna(0.0).to_numpy(), rtol=1e-6)
+
+    folds = ts.group_folds(g, 5)
+    per_group = pd.Series(folds).groupby(g).nunique()
+    assert (per_group == 1).all()
+    np.testing.assert_array_equal(ts.group_folds(g[::-1], 5), folds[::-1])
+
+
+def test_partitioned_dataset_streams_with_group_filter(tmp_path):
+    _, df = _features_file(tmp_path)
+    root = write_partitioned(df.assign(cell_id="C1", week_idx=np.arange(len(df))), tmp_path / "features",
+                             row_group_rows=40)
+    batches = list(ts.iter_batches(root, batch_size=25, groups=["G1", "G3"]))
+    X, g = np.vstack([b[0] for b in batches]), np.concatenate([b[2] for b in batches])
+    ref = df[df["group_id"].isin(["G1", "G3"])].dropna(subset=[TARGET_COL])
+    assert max(len(b[1]) for b in batches) <= 25 and list(np.unique(g)) == ["G1", "G3"]
+    np.testing.assert_allclose(X, ref[FEATURE_COLS].fillna(0.0).to_numpy(), rtol=1e-6)
+
+    _, _, fp, n_rows = ts.scan(root, batch_size=64, sample_rows=1000, seed=0, groups=["G1", "G3"])
+    assert n_rows == len(ref) and fp == data_fingerprint(ref, ts.COLUMNS)
+
+
+def test_streaming_fingerprint_matches_in_memory(tmp_path):
+    path, df = _features_file(tmp_path)
+    _, _, fp, n_rows = ts.scan(path, batch_size=64, sample_rows=1000, seed=0)
+    ref = df.dropna(subset=[TARGET_COL])
+    assert fp == data_fingerprint(ref, ts.COLUMNS) and n_rows == len(ref)
+
+
+def test_quantile_binner_codes_fit_uint8():
+    x = np.random.default_rng(0).normal(size=(5000, 2)).astype(np.float32)
+    binner = ts.QuantileBinner(ts.quantile_edges(x))
+    codes = binner.transform(x)
+    assert codes.dtype == np.uint8 and codes.max() <= 254
+    order = np.argsort(x[:, 0])
+    assert (np.diff(codes[order, 0].astype(int)) >= 0).all()
+
+
+def test_main_trains_and_exports_loadable_pipelines(tmp_path):
+    path, df = _features_file(tmp_path)
+    args = argparse.Namespace(input=str(path), models="sgd,hgb", batch_size=100, n_folds=3, epochs=5,
+                              sample_rows=10_000, hgb_max_rows=10_000, seed=0, export=True,
+                              config=None, out_dir=str(tmp_path / "out"))
+    metrics = ts.main(args)
+    assert metrics["soh_sgd_stream"]["n_splits"] == 3
+    assert metrics["soh_hgb_stream"]["mae_mean"] < 0.05
+
+    X = df[FEATURE_COLS].fillna(0.0).to_numpy()[:10]
+    for name in ("soh_sgd_stream", "soh_hgb_stream"):
+        model, manifest = load_artifact(tmp_path / "out" / "models" / name)
+        assert manifest["feature_cols"] == FEATURE_COLS
+        assert np.isfinite(model.predict(X)).all()
@@ -2,78 +2,218 @@
 train_soh.py
 SOH (State of Health) prediction using LinearRegression and RandomForest.
 Group-level cross-validation (GroupKFold) ile MAE ve RMSE raporlar.
+Tüm (model, fold) görevleri paylaşılan bir özellik matrisiyle süreç havuzunda birlikte çalışır.
+--export: modeller tüm veriyle yeniden eğitilip out_dir/models altına sürümlü artefakt olarak yazılır
+(bkz. model_artifact.py).
+--sweep: config.yaml'daki sweep: bölümüyle hiperparametre taraması (bkz. sweep_soh.py).
+scikit-learn/joblib, pandas okuyucusu (feature_store) ve model_artifact fonksiyon içinde import edilir:
+modülü (FEATURE_COLS, add_args) içe aktarmak ucuzdur.
 """
 
-import argparse
-import pandas as pd
+import argparse, os, tempfile, time
+from pathlib import Path
 import numpy as np
-from sklearn.model_selection import GroupKFold
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error
+from utils import load_config
+import instrument
+from cli_args import add_train_args as add_args
+
+FEATURE_COLS = [
+    "current_SOH", "weeks_since_start", "local_slope_k",
+    "avgV_chg", "avgV_dchg", "deltaV_hyst"
+]
+TARGET_COL = "SOH_next"
+
+
+def _shared_array(a, folder, name):
+    """Diziyi diske yazıp salt okunur memmap olarak açar; işçi süreçler aynı sayfaları paylaşır."""
+    path = Path(folder) / f"{name}.npy"
+    np.save(path, np.ascontiguousarray(a))
+    return np.load(path, mmap_mode="r")
+
+
+def _fit_fold(name, model, X, y, train_idx, test_idx, fold, tree_jobs):
+    """Tek (model, fold) görevi. X/y paylaşılan memmap; eğitim kopyası sadece bu görevde oluşur."""
+    from sklearn.base import clone
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+    t0 = time.perf_counter()
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_test, y_test = X[test_idx], y[test_idx]
+    t1 = time.perf_counter()
+
+    model = clone(model)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=tree_jobs)
+    model.fit(X_train, y_train)
+    t2 = time.perf_counter()
+    y_pred = model.predict(X_test)
+    t3 = time.perf_counter()
+
+    return {
+        "model": name, "fold": fold,
+        "mae": float(mean_absolute_error(y_test, y_pred)),
+        "rmse": float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        "n_train": len(train_idx), "n_test": len(test_idx),
+        "gather_s": t1 - t0, "fit_s": t2 - t1, "predict_s": t3 - t2,
+        "pid": os.getpid(),
+    }
+
+
+def cpu_budget(n_jobs, n_tasks):
+    """n_jobs çekirdeği (fold işçileri, işçi başına ağaç işi) olarak böler."""
+    total = (os.cpu_count() or 1) if n_jobs is None or n_jobs < 1 else n_jobs
+    fold_workers = max(1, min(n_tasks, total))
+    return fold_workers, max(1, total // fold_workers)
+
+
+def evaluate_models(models, X, y, groups, n_jobs=-1):
+    """
+    Tüm (model, fold) görevlerini GroupKFold ile birlikte çalıştırır.
+    models: {ad: (etiket, tahminci)} -> {ad: metrik sözlüğü} (CV yapılamazsa None).
+    X/y bir kez memmap'e yazılır ve süreç havuzundaki işçilerle kopyalanmadan paylaşılır;
+    CPU bütçesi fold-düzeyi ve ağaç-düzeyi paralellik arasında bölünür.
+    """
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import GroupKFold
 
-
-def evaluate_model(model, X, y, groups, model_name="Model"):
-    """GroupKFold ile MAE ve RMSE hesapla"""
     unique_groups = np.unique(groups)
     n_splits = min(5, len(unique_groups))  # grup sayısından fazla split olmasın
 
     if n_splits < 2:
-        print(f"[WARN] {model_name}: Yeterli grup yok (grup sayısı={len(unique_groups)}). CV yapılamadı.")
-        return
-
-    gkf = GroupKFold(n_splits=n_splits)
-    maes, rmses = [], []
-
-    for fold, (train_idx, test_idx) in enumerate(gkf.split(X, y, groups), 1):
-        X_train, X_test = X[train_idx], X[test_idx]
-        y_train, y_test = y[train_idx], y[test_idx]
-
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-
-        mae = mean_absolute_error(y_test, y_pred)
-        rmse = mean_squared_error(y_test, y_pred, squared=False)
-
-        maes.append(mae)
-        rmses.append(rmse)
-
-        print(f"[Fold {fold}] {model_name} → MAE={mae:.4f}, RMSE={rmse:.4f}")
-
-    print(f"\n📊 {model_name} ({n_splits}-fold GroupKFold)")
-    print(f"  MAE  : {np.mean(maes):.4f} ± {np.std(maes):.4f}")
-    print(f"  RMSE : {np.mean(rmses):.4f} ± {np.std(rmses):.4f}\n")
+        for label, _ in models.values():
+            print(f"[WARN] {label}: Yeterli grup yok (grup sayısı={len(unique_groups)}). CV yapılamadı.")
+        return {name: None for name in models}
+
+    splits = list(GroupKFold(n_splits=n_splits).split(X, y, groups))
+    n_tasks = len(models) * len(splits)
+    fold_workers, tree_jobs = cpu_budget(n_jobs, n_tasks)
+
+    t0 = time.perf_counter()
+    with instrument.stage("cv", items=n_tasks, nbytes=X.nbytes), \
+            tempfile.TemporaryDirectory(prefix="train_soh_") as tmp:
+        X_sh = _shared_array(X, tmp, "X") if fold_workers > 1 else X
+        y_sh = _shared_array(y, tmp, "y") if fold_workers > 1 else y
+        tasks = (delayed(_fit_fold)(name, model, X_sh, y_sh, tr, te, fold, tree_jobs)
+                 for name, (_, model) in models.items()
+                 for fold, (tr, te) in enumerate(splits, 1))
+        results = Parallel(n_jobs=fold_workers)(tasks)
+    wall = time.perf_counter() - t0
+
+    # Fold'lar işçi süreçlerde koşar; süreleri kendi ölçtükleri değerlerden eklenir
+    for r in results:
+        instrument.record(f"cv_fit:{r['model']}", r["fit_s"], items=r["n_train"])
+        instrument.record(f"cv_predict:{r['model']}", r["predict_s"], items=r["n_test"])
+
+    print(f"[INFO] CV: {n_tasks} görev | fold işçisi={fold_workers}, ağaç işi={tree_jobs} | "
+          f"duvar süresi={wall:.2f}s, görev toplamı={sum(r['fit_s'] + r['predict_s'] for r in results):.2f}s")
+
+    metrics = {}
+    for name, (label, _) in models.items():
+        rows = [r for r in results if r["model"] == name]
+        maes = [r["mae"] for r in rows]
+        rmses = [r["rmse"] for r in rows]
+        for r in rows:
+            print(f"[Fold {r['fold']}] {label} → MAE={r['mae']:.4f}, RMSE={r['rmse']:.4f} "
+                  f"| fit={r['fit_s']:.2f}s predict={r['predict_s']:.3f}s gather={r['gather_s']:.3f}s")
+
+        print(f"\n📊 {label} ({n_splits}-fold GroupKFold)")
+        print(f"  MAE  : {np.mean(maes):.4f} ± {np.std(maes):.4f}")
+        print(f"  RMSE : {np.mean(rmses):.4f} ± {np.std(rmses):.4f}\n")
+
+        metrics[name] = {
+            "cv": "GroupKFold",
+            "n_splits": n_splits,
+            "mae_mean": float(np.mean(maes)), "mae_std": float(np.std(maes)),
+            "rmse_mean": float(np.mean(rmses)), "rmse_std": float(np.std(rmses)),
+            "fold_mae": maes, "fold_rmse": rmses,
+            "fold_timing": [{k: r[k] for k in ("fold", "n_train", "n_test", "gather_s", "fit_s", "predict_s")}
+                            for r in rows],
+        }
+    return metrics
+
+
+def evaluate_model(model, X, y, groups, model_name="Model", n_jobs=-1):
+    """GroupKFold ile MAE ve RMSE hesapla; metrik sözlüğü döndürür (CV yapılamazsa None)"""
+    return evaluate_models({model_name: (model_name, model)}, X, y, groups, n_jobs=n_jobs)[model_name]
 
 
 def main(args):
+    from feature_store import read_features
+
     # Veri yükle
-    df = pd.read_parquet(args.input)
+    groups = args.groups.split(",") if getattr(args, "groups", None) else None
+    with instrument.stage("parquet_read", items=1):
+        df = read_features(args.input, groups=groups)
     print(f"[INFO] Loaded dataset with {len(df)} rows and {df.shape[1]} columns.")
 
     # Hedef → SOH_next (NaN'leri at)
-    df = df.dropna(subset=["SOH_next"])
+    df = df.dropna(subset=[TARGET_COL])
     print(f"[INFO] Rows after dropping NaN targets: {len(df)}")
 
     # Özellikler
-    feature_cols = [
-        "current_SOH", "weeks_since_start", "local_slope_k",
-        "avgV_chg", "avgV_dchg", "deltaV_hyst"
-    ]
-    X = df[feature_cols].fillna(0.0).values
-    y = df["SOH_next"].values
+    X = df[FEATURE_COLS].fillna(0.0).values
+    y = df[TARGET_COL].values
     groups = df["group_id"].values
 
-    # Modeller
-    linreg = LinearRegression()
-    rf = RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1)
+    if args.sweep:
+        run_sweep_mode(args, df, y, groups)
+        return
+
+    # Modeller (scikit-learn sadece eğitim yolunda yüklenir)
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    models = {
+        "soh_linreg": ("Linear Regression", LinearRegression()),
+        "soh_rf": ("Random Forest", RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1)),
+    }
 
     # Değerlendirme
-    evaluate_model(linreg, X, y, groups, model_name="Linear Regression")
-    evaluate_model(rf, X, y, groups, model_name="Random Forest")
+    metrics = evaluate_models(models, X, y, groups, n_jobs=args.n_jobs)
+
+    if args.export:
+        export_models(args, df, X, y, models, metrics)
+
+
+def run_sweep_mode(args, df, y, groups):
+    """config.yaml'daki sweep: bölümüyle taramayı çalıştırır, sonuçları out_dir/sweep_results.parquet'e yazar."""
+    from sweep_soh import run_sweep
+
+    cfg = load_config(args.config)
+    sweep_cfg = cfg.get("sweep")
+    if not sweep_cfg:
+        raise ValueError(f"{args.config} içinde 'sweep:' bölümü yok")
+    res = run_sweep(df, y, groups, sweep_cfg, FEATURE_COLS, n_jobs=args.n_jobs,
+                    seed=int(cfg.get("random_seed", 42)))
+
+    cols = ["model", "params", "features", "n_estimators", "folds_done", "mae_mean", "rmse_mean"]
+    print("\n📊 Sweep sonuçları (ilk 10)")
+    print(res[cols].head(10).to_string(index=False))
+
+    out_dir = Path(args.out_dir) if args.out_dir else Path(cfg["paths"]["out_dir"])
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "sweep_results.parquet"
+    res.to_parquet(out_path, index=False)
+    print(f"[OK] Sweep → {out_path} | configs={len(res)}, tamamlanan={int(res['complete'].sum())}")
+
+
+def export_models(args, df, X, y, models, metrics):
+    """Modelleri tüm veriyle eğitip out_dir/models altına sürümlü artefakt olarak yazar."""
+    from model_artifact import data_fingerprint, save_artifact
+
+    out_dir = Path(args.out_dir) if args.out_dir else Path(load_config(args.config)["paths"]["out_dir"])
+    fingerprint = data_fingerprint(df, FEATURE_COLS + [TARGET_COL, "group_id"])
+    fingerprint["source"] = str(args.input)
+
+    for name, (label, model) in models.items():
+        with instrument.stage(f"export_fit:{name}", items=len(X)):
+            model.fit(X, y)
+        with instrument.stage("export_save", items=1):
+            path = save_artifact(out_dir, name, model, FEATURE_COLS, fingerprint, metrics=metrics[name])
+        print(f"[OK] {label} → {path}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--input", default="artifacts/features.parquet", help="Path to features.parquet")
+    add_args(parser)
     args = parser.parse_args()
-    main(args)
+    with instrument.profiled(args.profile, "train_soh"):
+        main(args)
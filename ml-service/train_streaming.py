@@ -0,0 +1,247 @@
+"""
+train_streaming.py
+features.parquet bellekten büyük olduğunda SOH_next modellerini akışla (out-of-core) eğitir.
+
+- Girdi tek parquet dosyası ya da group_id bölümlü features/ veri seti olabilir; feature_store.iter_batches
+  ile batch'ler halinde okunur. Sadece FEATURE_COLS + hedef + group_id sütunları projekte edilir,
+  --groups filtresi bölüm düzeyinde uygulanır, özellikler float32'ye indirilir. Bellekte hiçbir zaman
+  tüm tablo yoktur.
+- Grup bazlı doğrulama: her group_id sabit bir hash ile K fold'dan birine düşer
+  (GroupKFold gibi bir grup asla hem eğitimde hem testte olmaz, ama bölme akışla hesaplanabilir).
+- sgd: StandardScaler (1. geçişte partial_fit) + SGDRegressor.partial_fit; K fold modeli aynı
+  geçişte birlikte güncellenir (epoch başına tek okuma).
+- hgb: 1. geçişteki örneklemden kantil kenarları çıkarılır, satırlar uint8 kutu kodlarına
+  indirilir (float64'e göre 8 kat küçük) ve HistGradientBoostingRegressor bu kodlarla eğitilir.
+  Not: sklearn fit sırasında X'i float64'e çevirir; --hgb-max-rows bu geçici kopyayı sınırlar.
+"""
+
+import argparse, time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.linear_model import SGDRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from utils import load_config
+from feature_store import count_rows, iter_batches as iter_feature_batches
+from model_artifact import DataFingerprint, save_artifact
+from train_soh import FEATURE_COLS, TARGET_COL
+
+COLUMNS = FEATURE_COLS + [TARGET_COL, "group_id"]
+MAX_BINS = 255   # HGB'nin kutu sınırı; kodlar 0..254 -> uint8
+
+def group_folds(groups, n_folds):
+    """group_id -> fold (sabit anahtarlı hash; çalıştırmalar ve batch'ler arasında tutarlı)."""
+    h = pd.util.hash_array(np.asarray(groups, dtype=object))
+    return (h % np.uint64(n_folds)).astype(np.int8)
+
+def iter_batches(path, batch_size=65536, with_frame=False, groups=None):
+    """
+    (X float32, y float32, groups, frame) üreteci. Hedefi NaN olan satırlar atılır,
+    eksik özellikler train_soh'taki gibi 0.0 olur. with_frame=True ise parmak izi için ham
+    (dönüştürülmemiş) projeksiyon da döner. groups: sadece bu group_id'ler (None = hepsi).
+    """
+    for rb in iter_feature_batches(path, batch_size, groups=groups, columns=COLUMNS):
+        y = rb.column(TARGET_COL).to_numpy(zero_copy_only=False).astype(np.float32)
+        keep = np.isfinite(y)
+        X = np.empty((rb.num_rows, len(FEATURE_COLS)), dtype=np.float32)
+        for j, c in enumerate(FEATURE_COLS):
+            X[:, j] = rb.column(c).to_numpy(zero_copy_only=False)
+        np.nan_to_num(X, copy=False, nan=0.0)
+        groups = rb.column("group_id").to_numpy(zero_copy_only=False)
+        frame = rb.to_pandas()[keep].reset_index(drop=True) if with_frame else None
+        yield X[keep], y[keep], groups[keep], frame
+
+class QuantileBinner(BaseEstimator, TransformerMixin):
+    """Sabit kantil kenarlarıyla float -> uint8 kutu kodu (dışa aktarılan hgb pipeline'ının ilk adımı)."""
+
+    def __init__(self, edges=None):
+        self.edges = edges
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(X.shape, dtype=np.uint8)
+        for j, e in enumerate(self.edges):
+            out[:, j] = np.searchsorted(e, X[:, j], side="right")
+        return out
+
+def quantile_edges(sample, max_bins=MAX_BINS):
+    """Özellik başına en fazla max_bins - 1 tekil iç kenar."""
+    qs = np.linspace(0.0, 1.0, max_bins + 1)[1:-1]
+    return [np.unique(np.quantile(sample[:, j], qs)).astype(np.float32) for j in range(sample.shape[1])]
+
+class _ErrorSums:
+    """Fold başına akışla MAE/RMSE toplamları."""
+
+    def __init__(self, n_folds):
+        self.abs = np.zeros(n_folds)
+        self.sq = np.zeros(n_folds)
+        self.n = np.zeros(n_folds, dtype=np.int64)
+
+    def add(self, f, y_true, y_pred):
+        err = np.asarray(y_pred, dtype=np.float64) - y_true
+        self.abs[f] += np.abs(err).sum()
+        self.sq[f] += (err * err).sum()
+        self.n[f] += len(err)
+
+    def metrics(self):
+        ok = self.n > 0
+        maes = (self.abs[ok] / self.n[ok]).tolist()
+        rmses = np.sqrt(self.sq[ok] / self.n[ok]).tolist()
+        return {
+            "cv": "GroupHashKFold", "n_splits": int(ok.sum()),
+            "mae_mean": float(np.mean(maes)), "mae_std": float(np.std(maes)),
+            "rmse_mean": float(np.mean(rmses)), "rmse_std": float(np.std(rmses)),
+            "fold_mae": maes, "fold_rmse": rmses, "fold_rows": self.n[ok].tolist(),
+        }
+
+def _print_metrics(label, m):
+    for f, (mae, rmse) in enumerate(zip(m["fold_mae"], m["fold_rmse"]), 1):
+        print(f"[Fold {f}] {label} → MAE={mae:.4f}, RMSE={rmse:.4f}")
+    print(f"\n📊 {label} ({m['n_splits']}-fold group-hash)")
+    print(f"  MAE  : {m['mae_mean']:.4f} ± {m['mae_std']:.4f}")
+    print(f"  RMSE : {m['rmse_mean']:.4f} ± {m['rmse_std']:.4f}\n")
+
+def scan(path, batch_size, sample_rows, seed, groups=None):
+    """1. geçiş: scaler istatistikleri, kantil örneklemi, parmak izi ve satır sayısı."""
+    total = count_rows(path, groups=groups)
+    frac = min(1.0, sample_rows / max(total, 1))
+    rng = np.random.default_rng(seed)
+    scaler = StandardScaler()
+    fp = DataFingerprint(COLUMNS)
+    sample, n_rows = [], 0
+    for X, y, _, frame in iter_batches(path, batch_size, with_frame=True, groups=groups):
+        if len(y) == 0:
+            continue
+        scaler.partial_fit(X)
+        fp.update(frame)
+        sample.append(X[rng.random(len(X)) < frac])
+        n_rows += len(y)
+    if n_rows == 0:
+        raise ValueError(f"{path}: hedefi dolu satır yok")
+    return scaler, np.vstack(sample), fp.result(), n_rows
+
+def train_sgd(path, scaler, n_folds, epochs, batch_size, seed, fit_full, groups=None):
+    """K fold modeli + (istenirse) tüm veri modeli, her epoch'ta tek okumayla partial_fit."""
+    def make():
+        return SGDRegressor(learning_rate="invscaling", eta0=0.01, alpha=1e-5, random_state=seed)
+    models = [make() for _ in range(n_folds)]
+    full = make() if fit_full else None
+    rng = np.random.default_rng(seed)
+
+    for _ in range(epochs):
+        for X, y, g, _ in iter_batches(path, batch_size, groups=groups):
+            if len(y) == 0:
+                continue
+            perm = rng.permutation(len(y))
+            Xs = scaler.transform(X[perm]).astype(np.float32)
+            y, folds = y[perm], group_folds(g[perm], n_folds)
+            for f, m in enumerate(models):
+                mask = folds != f
+                if mask.any():
+                    m.partial_fit(Xs[mask], y[mask])
+            if full is not None:
+                full.partial_fit(Xs, y)
+
+    errors = _ErrorSums(n_folds)
+    for X, y, g, _ in iter_batches(path, batch_size, groups=groups):
+        if len(y) == 0:
+            continue
+        Xs = scaler.transform(X).astype(np.float32)
+        folds = group_folds(g, n_folds)
+        for f, m in enumerate(models):
+            mask = folds == f
+            if mask.any() and hasattr(m, "coef_"):
+                errors.add(f, y[mask], m.predict(Xs[mask]))
+    return errors.metrics(), full
+
+def collect_binned(path, edges, n_folds, batch_size, max_rows, total_rows, seed, groups=None):
+    """2. geçiş: satırları uint8 kodlara indirger (gerekirse max_rows'a örnekleyerek)."""
+    binner = QuantileBinner(edges)
+    frac = min(1.0, max_rows / max(total_rows, 1))
+    rng = np.random.default_rng(seed + 1)
+    codes, ys, folds = [], [], []
+    for X, y, g, _ in iter_batches(path, batch_size, groups=groups):
+        if frac < 1.0:
+            keep = rng.random(len(y)) < frac
+            X, y, g = X[keep], y[keep], g[keep]
+        codes.append(binner.transform(X))
+        ys.append(y)
+        folds.append(group_folds(g, n_folds))
+    return np.vstack(codes), np.concatenate(ys), np.concatenate(folds), binner
+
+def train_hgb(codes, y, folds, n_folds, seed, fit_full, max_iter=200):
+    def make():
+        return HistGradientBoostingRegressor(max_bins=MAX_BINS, max_iter=max_iter, random_state=seed)
+    errors = _ErrorSums(n_folds)
+    for f in range(n_folds):
+        test = folds == f
+        if not test.any() or test.all():
+            continue
+        m = make().fit(codes[~test], y[~test])
+        errors.add(f, y[test], m.predict(codes[test]))
+    full = make().fit(codes, y) if fit_full else None
+    return errors.metrics(), full
+
+def main(args):
+    path = Path(args.input)
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    groups = args.groups.split(",") if getattr(args, "groups", None) else None
+    t0 = time.perf_counter()
+    scaler, sample, fingerprint, n_rows = scan(path, args.batch_size, args.sample_rows, args.seed, groups)
+    fingerprint["source"] = str(path)
+    print(f"[INFO] {path.name}: {n_rows} satır (hedef dolu), örneklem={len(sample)} | {time.perf_counter() - t0:.2f}s")
+
+    results = {}
+    if "sgd" in models:
+        t = time.perf_counter()
+        metrics, full = train_sgd(path, scaler, args.n_folds, args.epochs, args.batch_size, args.seed, args.export,
+                                  groups)
+        _print_metrics("SGD (streaming)", metrics)
+        print(f"[INFO] sgd: {time.perf_counter() - t:.2f}s")
+        pipe = Pipeline([("scale", scaler), ("sgd", full)]) if full is not None else None
+        results["soh_sgd_stream"] = (metrics, pipe)
+
+    if "hgb" in models:
+        t = time.perf_counter()
+        edges = quantile_edges(sample)
+        codes, y, folds, binner = collect_binned(path, edges, args.n_folds, args.batch_size,
+                                                 args.hgb_max_rows, n_rows, args.seed, groups)
+        print(f"[INFO] hgb: {codes.shape[0]}x{codes.shape[1]} uint8 kod ({codes.nbytes / 1e6:.1f} MB)")
+        metrics, full = train_hgb(codes, y, folds, args.n_folds, args.seed, args.export)
+        _print_metrics("HistGradientBoosting (binned)", metrics)
+        print(f"[INFO] hgb: {time.perf_counter() - t:.2f}s")
+        pipe = Pipeline([("bin", binner), ("hgb", full)]) if full is not None else None
+        results["soh_hgb_stream"] = (metrics, pipe)
+
+    if args.export:
+        out_dir = Path(args.out_dir) if args.out_dir else Path(load_config(args.config)["paths"]["out_dir"])
+        for name, (metrics, pipe) in results.items():
+            p = save_artifact(out_dir, name, pipe, FEATURE_COLS, fingerprint, metrics=metrics)
+            print(f"[OK] {name} → {p}")
+    return {name: metrics for name, (metrics, _) in results.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", default="artifacts/features.parquet",
+                        help="Path to features.parquet or the group_id-partitioned features/ directory")
+    parser.add_argument("--groups", default=None, help="Only these group_ids (comma-separated)")
+    parser.add_argument("--models", default="sgd,hgb", help="Virgülle ayrılmış: sgd, hgb")
+    parser.add_argument("--batch-size", type=int, default=65536, help="iter_batches satır sayısı")
+    parser.add_argument("--n-folds", type=int, default=5, help="Grup-hash fold sayısı")
+    parser.add_argument("--epochs", type=int, default=3, help="SGD için veri üzerinden geçiş sayısı")
+    parser.add_argument("--sample-rows", type=int, default=200_000, help="Kantil kenarları için örneklem")
+    parser.add_argument("--hgb-max-rows", type=int, default=5_000_000,
+                        help="HGB'ye verilecek en fazla satır (fazlası rastgele örneklenir)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--export", action="store_true",
+                        help="Tüm veriyle eğitilen modelleri out_dir/models altına artefakt olarak yaz")
+    parser.add_argument("--config", default="config.yaml", help="out_dir için config (--export)")
+    parser.add_argument("--out-dir", default=None, help="out_dir'i config yerine doğrudan ver")
+    main(parser.parse_args())
@@ -11,13 +11,21 @@ Basit doğrusal eğilimle (last K SOH points) RUL (hafta) tahmini.
 - Aksi halde x* = (threshold - b)/a, RUL_pred = x* - week_origin
 - Gerçek RUL (uncensored için): first_week_at_or_below_0.80 - week_origin
 - MAE sadece uncensored hücrelerde raporlanır.
+- --backtest: her geçmiş hafta origin alınarak (--k-list x --threshold-list) geri test;
+  pencere fitleri hücre başına önek toplamlarıyla O(1), MAE-ufuk eğrisi CSV'ye yazılır.
 """
 
-import argparse
+import argparse, sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
+# Ortak ölçüm katmanı ml-service altında
+sys.path.insert(0, str(Path(__file__).resolve().parent / "ml-service"))
+import instrument
+from cli_args import add_rul_args as add_args
+from cell_store import CellSeriesStore, as_cell_store
+
 def fit_rul_from_last_k(weeks, sohs, origin_idx, k, threshold=0.80):
     """
     weeks, sohs: sıralı listeler (aynı uzunlukta)
@@ -57,14 +65,17 @@ def fit_rul_from_last_k(weeks, sohs, origin_idx, k, threshold=0.80):
 def compute_rul_per_cell(df, k=4, threshold=0.80):
     """
     df: features.parquet içeriği (group_id, cell_id, week_idx, SOH kolonları olmalı)
+        ya da aynı kolonlu CellSeriesStore
     """
+    store = as_cell_store(df, ["week_idx", "SOH"])
     results = []
-    for (g, c), grp in df.sort_values(["group_id","cell_id","week_idx"]).groupby(["group_id","cell_id"]):
-        weeks = grp["week_idx"].astype(float).tolist()
-        sohs  = grp["SOH"].astype(float).tolist()
+    for i, (g, c) in enumerate(zip(*store.keys())):
+        weeks = store.cell(i, "week_idx").astype(float)
+        sohs  = store.cell(i, "SOH").astype(float)
 
         # İlk SOH<=threshold haftasını bul
-        idx_cross = next((i for i, s in enumerate(sohs) if np.isfinite(s) and s <= threshold), None)
+        hit = np.flatnonzero(np.isfinite(sohs) & (sohs <= threshold))
+        idx_cross = int(hit[0]) if len(hit) else None
 
         if idx_cross is None:
             # Sansürlü: hiç 0.80 altına inmemiş
@@ -104,16 +115,264 @@ def compute_rul_per_cell(df, k=4, threshold=0.80):
         })
     return pd.DataFrame(results)
 
+RUL_COLUMNS = [
+    "group_id", "cell_id", "k_used", "threshold", "origin_week_idx", "slope_a", "intercept_b",
+    "x_star_week", "RUL_pred_weeks", "RUL_true_weeks", "censored", "n_points",
+]
+
+def compute_rul_vectorized(df, k=4, threshold=0.80):
+    """
+    compute_rul_per_cell ile aynı tabloyu hücre döngüsü ve np.polyfit olmadan üretir.
+    - Hücreler CellSeriesStore'da bitişik segmentlerdir (starts/ends ofsetleri).
+    - İlk SOH<=threshold indeksi segment bazında minimum.reduceat ile bulunur.
+    - Son K nokta (hücre, K) boyutlu bir pencereye toplanır; eğim/kesişim
+      merkezlenmiş segment toplamlarından kapalı formda hesaplanır.
+    """
+    store = as_cell_store(df, ["week_idx", "SOH"])
+    n = len(store)
+    if n == 0:
+        return pd.DataFrame(columns=RUL_COLUMNS)
+
+    g, c = store.keys()
+    weeks = store["week_idx"].astype(float)
+    sohs  = store["SOH"].astype(float)
+    starts, ends = store.starts, store.ends
+
+    # İlk SOH<=threshold indeksi (yoksa n -> sansürlü)
+    hit = np.isfinite(sohs) & (sohs <= threshold)
+    idx_cross = np.minimum.reduceat(np.where(hit, np.arange(n), n), starts)
+    censored = idx_cross >= ends
+    origin = np.where(censored, ends - 1, np.maximum(starts, idx_cross - 1))
+
+    # Son K nokta penceresi: [max(start, origin-K+1), origin]
+    win_start = np.maximum(starts, origin - (k - 1))
+    m = origin - win_start + 1
+    offs = np.arange(max(k, 1))
+    valid = offs[None, :] < m[:, None]
+    win = np.where(valid, win_start[:, None] + offs[None, :], origin[:, None])
+    W = np.where(valid, weeks[win], 0.0)
+    Y = np.where(valid, sohs[win], 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w_mean = W.sum(axis=1) / m
+        y_mean = Y.sum(axis=1) / m
+        wc = np.where(valid, W - w_mean[:, None], 0.0)
+        yc = np.where(valid, Y - y_mean[:, None], 0.0)
+        a = (wc * yc).sum(axis=1) / (wc * wc).sum(axis=1)
+        b = y_mean - a * w_mean
+        # En az 2 nokta lazım
+        a = np.where(m >= 2, a, np.nan)
+        b = np.where(m >= 2, b, np.nan)
+
+        # EOL kesişimi (sadece negatif ve sonlu eğimde)
+        degrading = np.isfinite(a) & np.isfinite(b) & (a < 0)
+        x_star = np.where(degrading, (threshold - b) / a, np.nan)
+        x_star = np.where(np.isfinite(x_star), x_star, np.nan)
+
+    origin_week = weeks[origin]
+    rul_pred = x_star - origin_week
+    rul_pred = np.where(np.isfinite(x_star) & ~(rul_pred >= 0), 0.0, rul_pred)
+
+    true_rul = np.where(censored, np.nan, weeks[np.minimum(idx_cross, n - 1)] - origin_week)
+    true_rul = np.where(true_rul < 0, 0.0, true_rul)
+
+    return pd.DataFrame({
+        "group_id": g,
+        "cell_id": c,
+        "k_used": k,
+        "threshold": threshold,
+        "origin_week_idx": origin_week,
+        "slope_a": a,
+        "intercept_b": b,
+        "x_star_week": x_star,
+        "RUL_pred_weeks": rul_pred,
+        "RUL_true_weeks": true_rul,
+        "censored": censored,
+        "n_points": ends - starts,
+    })
+
+RUL_ENGINES = {
+    "loop": compute_rul_per_cell,
+    "vectorized": compute_rul_vectorized,
+}
+
+BACKTEST_COLUMNS = [
+    "group_id", "cell_id", "k_used", "threshold", "origin_week_idx", "n_window",
+    "slope_a", "RUL_pred_weeks", "RUL_true_weeks",
+]
+
+def _prefix(values, starts, cell):
+    """
+    Sıralı satırlar üzerinde düz önek toplamı; her hücrenin önünde bir sıfırlama slotu vardır
+    (uzunluk satır + hücre, bellek O(satır)). Hücre i'deki [lo, hi) satırlarının toplamı
+    P[hi + i] - P[lo + i]. Sıfırlama slotu önceki hücrenin toplamını düşer: birikim hücre
+    ölçeğinde kalır, pencere farkları hücreler arası büyüklükten etkilenmez.
+    """
+    values = np.asarray(values, dtype=float)
+    ext = np.zeros(len(values) + len(starts))
+    ext[np.arange(len(values)) + cell + 1] = values
+    if len(starts) > 1:
+        ext[starts[1:] + np.arange(1, len(starts))] = -np.add.reduceat(values, starts)[:-1]
+    return np.cumsum(ext)
+
+def backtest_rul(df, ks=(4,), thresholds=(0.80,)):
+    """
+    Kayan-origin (rolling-origin) geri test: her hücrede EOL'den önceki HER hafta origin alınır,
+    her (K, threshold) için compute_rul_vectorized ile aynı kurallarla RUL tahmini üretilir.
+    - Uncensored hücrelerde origin'ler ilk SOH<=threshold noktasından öncekilerdir
+      (son origin tek-origin motorunun origin'iyle aynı); sansürlü hücrelerde tüm noktalar,
+      gerçek RUL NaN.
+    - Sıralı satırlar üzerinde week, SOH, week², week·SOH düz önek toplamları bir kez kurulur;
+      pencereler hücre içinde kaldığından her fit iki önek farkıyla O(1), bellek O(satır).
+      Haftalar hücrenin ilk haftasına, SOH hücrenin ilk geçerli SOH'una göre kaydırılır
+      (önek toplamları küçük kalsın, farklarda sayısal iptal olmasın).
+    - Penceresinde NaN olan origin'lerin eğimi NaN (NaN sayacı da önek toplamıyla izlenir).
+    """
+    store = as_cell_store(df, ["week_idx", "SOH"])
+    n = len(store)
+    if n == 0:
+        return pd.DataFrame(columns=BACKTEST_COLUMNS)
+
+    g, c = store.row_keys()
+    weeks = store["week_idx"].astype(float)
+    sohs  = store["SOH"].astype(float)
+    starts, ends = store.starts, store.ends
+    cell = store.row_cell()
+    pos = store.position()
+
+    bad = ~(np.isfinite(weeks) & np.isfinite(sohs))
+    w0 = weeks[starts][cell]
+    y0 = np.nan_to_num(store.first_valid(np.where(bad, np.nan, sohs)))[cell]
+    ws = np.where(bad, 0.0, weeks - w0)
+    ys = np.where(bad, 0.0, sohs - y0)
+    P_w, P_y = _prefix(ws, starts, cell), _prefix(ys, starts, cell)
+    P_ww, P_wy = _prefix(ws * ws, starts, cell), _prefix(ws * ys, starts, cell)
+    P_nan = _prefix(bad, starts, cell)
+
+    # Eşik başına ilk SOH<=threshold indeksi (yoksa n -> sansürlü)
+    crosses = {}
+    for thr in thresholds:
+        hit = np.isfinite(sohs) & (sohs <= thr)
+        crosses[thr] = np.minimum.reduceat(np.where(hit, np.arange(n), n), starts)
+
+    frames = []
+    rows = np.arange(n)
+    hi = rows + cell + 1                       # önek indeksleri (hücre başına bir sıfırlama slotu kayar)
+    for k in ks:
+        lo = hi - 1 - np.minimum(pos, k - 1)   # pencere hücre içinde: son min(pos+1, k) satır
+        m = (hi - lo).astype(float)
+        S_w  = P_w[hi]  - P_w[lo]
+        S_y  = P_y[hi]  - P_y[lo]
+        S_ww = P_ww[hi] - P_ww[lo]
+        S_wy = P_wy[hi] - P_wy[lo]
+        has_nan = (P_nan[hi] - P_nan[lo]) > 0.5
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            a = (m * S_wy - S_w * S_y) / (m * S_ww - S_w * S_w)
+            a = np.where((m >= 2) & ~has_nan, a, np.nan)
+            b = (S_y - a * S_w) / m + y0     # kaydırılmış haftalarda kesişim
+
+        for thr in thresholds:
+            idx_cross = crosses[thr]
+            censored = idx_cross >= ends
+            # Origin'ler: uncensored hücrede ilk kesişimden öncekiler (yoksa sadece ilk nokta), sansürlüde tümü
+            last = np.where(censored, ends - 1, np.maximum(starts, idx_cross - 1))
+            keep = np.arange(n) <= last[cell]
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                degrading = np.isfinite(a) & np.isfinite(b) & (a < 0)
+                x_star = np.where(degrading, (thr - b) / a, np.nan)
+                x_star = np.where(np.isfinite(x_star), x_star, np.nan)
+            rul_pred = x_star - ws
+            rul_pred = np.where(np.isfinite(x_star) & ~(rul_pred >= 0), 0.0, rul_pred)
+
+            cross_week = weeks[np.minimum(idx_cross, n - 1)][cell]
+            true_rul = np.where(censored[cell], np.nan, np.maximum(cross_week - weeks, 0.0))
+
+            frames.append(pd.DataFrame({
+                "group_id": g[keep],
+                "cell_id": c[keep],
+                "k_used": k,
+                "threshold": thr,
+                "origin_week_idx": weeks[keep],
+                "n_window": m[keep].astype(int),
+                "slope_a": a[keep],
+                "RUL_pred_weeks": rul_pred[keep],
+                "RUL_true_weeks": true_rul[keep],
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+def mae_vs_horizon(bt, bin_weeks=4):
+    """
+    Geri test tablosundan (K, threshold, ufuk) başına hata eğrisi.
+    Ufuk = gerçek RUL; bin_weeks genişliğinde kovalara ayrılır (alt sınır raporlanır).
+    coverage: kovadaki origin'lerden tahmin üretilebilenlerin (eğim < 0) oranı.
+    """
+    ev = bt[bt["RUL_true_weeks"].notna()].copy()
+    cols = ["k_used", "threshold", "horizon_weeks", "n_origins", "n_pred", "coverage",
+            "MAE_weeks", "bias_weeks", "median_AE_weeks"]
+    if ev.empty:
+        return pd.DataFrame(columns=cols)
+    ev["horizon_weeks"] = np.floor(ev["RUL_true_weeks"] / bin_weeks) * bin_weeks
+    ev["err"] = ev["RUL_pred_weeks"] - ev["RUL_true_weeks"]
+    ev["abs_err"] = ev["err"].abs()
+    curves = (ev.groupby(["k_used", "threshold", "horizon_weeks"])
+                .agg(n_origins=("RUL_true_weeks", "size"), n_pred=("err", "count"),
+                     MAE_weeks=("abs_err", "mean"), bias_weeks=("err", "mean"),
+                     median_AE_weeks=("abs_err", "median"))
+                .reset_index())
+    curves["coverage"] = curves["n_pred"] / curves["n_origins"]
+    return curves[cols]
+
+def _parse_list(text, cast):
+    return [cast(x) for x in str(text).split(",") if x.strip()]
+
+def run_backtest(store, args):
+    ks = _parse_list(args.k_list, int) if args.k_list else [args.k]
+    thresholds = _parse_list(args.threshold_list, float) if args.threshold_list else [args.threshold]
+    with instrument.stage("rul_backtest", items=store.n_cells):
+        bt = backtest_rul(store, ks=ks, thresholds=thresholds)
+        curves = mae_vs_horizon(bt, bin_weeks=args.horizon_bin)
+
+    for (k, thr), cur in curves.groupby(["k_used", "threshold"]):
+        ev = bt[(bt["k_used"] == k) & (bt["threshold"] == thr) & bt["RUL_true_weeks"].notna()]
+        mae = (ev["RUL_pred_weeks"] - ev["RUL_true_weeks"]).abs().mean()
+        print(f"[RUL] backtest K={k} thr={thr:.2f} | origins={len(ev)} | MAE (weeks) = {mae:.3f}")
+        for r in cur.itertuples():
+            print(f"    horizon {r.horizon_weeks:>5.0f}+ : n={r.n_origins:<6} cov={r.coverage:.2f} "
+                  f"MAE={r.MAE_weeks:.3f} bias={r.bias_weeks:+.3f}")
+
+    out_dir = Path(args.out).parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    bt_path, curve_path = out_dir / "rul_backtest.parquet", out_dir / "rul_backtest_curves.csv"
+    with instrument.stage("parquet_write", items=len(bt)) as st:
+        bt.to_parquet(bt_path, index=False)
+        st.add(nbytes=bt_path.stat().st_size)
+    curves.to_csv(curve_path, index=False)
+    print(f"[OK] Saved backtest → {bt_path} | rows={len(bt)}")
+    print(f"[OK] Saved MAE-vs-horizon curves → {curve_path} | rows={len(curves)}")
+
 def main(args):
     path = Path(args.input)
-    df = pd.read_parquet(path)
-    # gerekli kolonların varlığını garanti et
-    required = {"group_id","cell_id","week_idx","SOH"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing columns in input: {missing}")
+    # Bölümlü veri setinde sadece istenen grupların dosyaları ve gerekli kolonlar okunur;
+    # hücreler bir kez CellSeriesStore'a (CSR ofsetli diziler) alınır, motorlar groupby yapmaz
+    groups = args.groups.split(",") if getattr(args, "groups", None) else None
+    cells = args.cells.split(",") if getattr(args, "cells", None) else None
+    dtype = np.dtype(getattr(args, "dtype", "float64"))
+    with instrument.stage("parquet_read", items=1):
+        try:
+            store = CellSeriesStore.from_parquet(path, columns=["week_idx", "SOH"], groups=groups,
+                                                 cells=cells, dtype=dtype)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Missing columns in input: {e}") from e
+    if len(store) == 0:
+        raise ValueError(f"No rows for groups={groups} cells={cells} in {path}")
+    if getattr(args, "backtest", False):
+        run_backtest(store, args)
+        return
 
-    res = compute_rul_per_cell(df, k=args.k, threshold=args.threshold)
+    with instrument.stage(f"rul_fit:{args.engine}", items=store.n_cells):
+        res = RUL_ENGINES[args.engine](store, k=args.k, threshold=args.threshold)
 
     # MAE (sadece uncensored)
     eval_df = res[(~res["censored"]) & res["RUL_true_weeks"].notna() & res["RUL_pred_weeks"].notna()]
@@ -126,14 +385,14 @@ def main(args):
     # Kaydet
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    res.to_parquet(out_path, index=False)
+    with instrument.stage("parquet_write", items=len(res)) as st:
+        res.to_parquet(out_path, index=False)
+        st.add(nbytes=out_path.stat().st_size)
     print(f"[OK] Saved RUL table → {out_path} | rows={len(res)}")
 
 if __name__ == "__main__":
     p = argparse.ArgumentParser()
-    p.add_argument("--input", default="../artifacts/features.parquet", help="features.parquet path")
-    p.add_argument("--out",   default="../artifacts/rul_linear.parquet", help="output parquet path")
-    p.add_argument("--k", type=int, default=4, help="last K SOH points for linear fit")
-    p.add_argument("--threshold", type=float, default=0.80, help="EOL SOH threshold")
+    add_args(p)
     args = p.parse_args()
-    main(args)
+    with instrument.profiled(args.profile, "rul"):
+        main(args)